@@ -0,0 +1,218 @@
+# analytics.py
+
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count
+from django.utils import timezone
+from django.utils.crypto import get_random_string
+
+from .models import Enrollment, Feedback
+
+# Feedback ratings are given on a 1-5 scale; values outside it are clipped into the nearest bucket
+RATINGS = np.arange(1, 6)
+
+ANALYTICS_CACHE_TIMEOUT = getattr(settings, 'ANALYTICS_CACHE_TIMEOUT', 24 * 60 * 60)
+
+# Seconds a course's fold lock is held at most, should its holder die before releasing it
+ANALYTICS_LOCK_TIMEOUT = 30
+
+# Trend window -> pandas period frequency
+TREND_WINDOWS = {'week': 'W', 'month': 'M', 'quarter': 'Q'}
+
+# Two-sided 95% critical values of Student's t for 1-30 degrees of freedom; the normal value is used beyond
+T_CRITICAL_95 = np.array([
+    12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306, 2.262, 2.228,
+    2.201, 2.179, 2.160, 2.145, 2.131, 2.120, 2.110, 2.101, 2.093, 2.086,
+    2.080, 2.074, 2.069, 2.064, 2.060, 2.056, 2.052, 2.048, 2.045, 2.042,
+])
+Z_CRITICAL_95 = 1.96
+
+
+def analytics_cache_key(course_id):
+    return f'analytics:feedback:{course_id}'
+
+
+def analytics_lock_key(course_id):
+    return f'analytics:feedback:{course_id}:lock'
+
+
+def empty_daily():
+    return pd.DataFrame(0, index=pd.DatetimeIndex([], name='day'), columns=RATINGS, dtype=np.int64)
+
+
+def build_course_states(course_ids):
+    """
+    Computes the per-course analytics state from a single columnar pull of their feedback.
+
+    A state holds daily rating counts (a DataFrame of days x ratings) and the number of distinct
+    students who responded; every reported statistic is derived from these.
+    """
+    rows = Feedback.objects.filter(course_id__in=course_ids).values_list('course_id', 'student_id', 'rating', 'created_at')
+    frame = pd.DataFrame.from_records(list(rows), columns=['course', 'student', 'rating', 'created_at'])
+    states = {course_id: {'daily': empty_daily(), 'respondents': 0} for course_id in course_ids}
+    if frame.empty:
+        return states
+
+    frame['rating'] = frame['rating'].clip(RATINGS[0], RATINGS[-1])
+    created_at = pd.to_datetime(frame['created_at'], utc=True).dt.tz_convert(settings.TIME_ZONE)
+    frame['day'] = created_at.dt.tz_localize(None).dt.normalize()
+    daily = pd.crosstab([frame['course'], frame['day']], frame['rating']).reindex(columns=RATINGS, fill_value=0)
+    respondents = frame.groupby('course')['student'].nunique()
+
+    for course_id, course_daily in daily.groupby(level='course'):
+        states[course_id] = {
+            'daily': course_daily.droplevel('course').rename_axis(index='day', columns=None).astype(np.int64),
+            'respondents': int(respondents[course_id]),
+        }
+    return states
+
+
+def get_course_states(course_ids):
+    """
+    Returns the analytics states of several courses, building the uncached ones in one query.
+    """
+    keys = {analytics_cache_key(course_id): course_id for course_id in course_ids}
+    cached = cache.get_many(list(keys))
+    states = {keys[key]: state for key, state in cached.items()}
+    missing = [course_id for course_id in course_ids if course_id not in states]
+    if missing:
+        built = build_course_states(missing)
+        cache.set_many({analytics_cache_key(course_id): state for course_id, state in built.items()}, ANALYTICS_CACHE_TIMEOUT)
+        states.update(built)
+    return states
+
+
+def record_feedback(feedback):
+    """
+    Folds a new, committed feedback into its course's cached state instead of recomputing it.
+
+    Uncached courses are left alone; they are built on the next read. Folds of one course are
+    serialised with a cache lock (cache.add() is atomic); a feedback arriving while another is
+    folded drops the cached state instead, and marks the lock so the running fold does not
+    write back a state missing it.
+    """
+    key, lock_key = analytics_cache_key(feedback.course_id), analytics_lock_key(feedback.course_id)
+    token = get_random_string(12)
+    if not cache.add(lock_key, token, ANALYTICS_LOCK_TIMEOUT):
+        cache.set(lock_key, 'contended', ANALYTICS_LOCK_TIMEOUT)
+        invalidate_course_analytics(feedback.course_id)
+        return
+    try:
+        _fold_feedback(key, feedback)
+        if cache.get(lock_key) != token:
+            invalidate_course_analytics(feedback.course_id)
+    finally:
+        cache.delete(lock_key)
+
+
+def _fold_feedback(key, feedback):
+    state = cache.get(key)
+    if state is None:
+        return
+    rating = int(np.clip(feedback.rating, RATINGS[0], RATINGS[-1]))
+    created_at = timezone.localtime(feedback.created_at, timezone.get_default_timezone())
+    day = pd.Timestamp(created_at.date())
+    daily = state['daily']
+    if day not in daily.index:
+        daily.loc[day] = 0
+        daily.sort_index(inplace=True)
+    daily.loc[day, rating] += 1
+    if not Feedback.objects.filter(course_id=feedback.course_id, student_id=feedback.student_id).exclude(pk=feedback.pk).exists():
+        state['respondents'] += 1
+    cache.set(key, state, ANALYTICS_CACHE_TIMEOUT)
+
+
+def invalidate_course_analytics(course_id):
+    cache.delete(analytics_cache_key(course_id))
+
+
+def mean_confidence_interval(histogram):
+    """
+    Returns the mean rating and its 95% confidence interval from rating counts, or Nones when
+    there are too few ratings.
+    """
+    count = histogram.sum()
+    if not count:
+        return None, None
+    mean = histogram @ RATINGS / count
+    if count < 2:
+        return mean, None
+    variance = (histogram @ (RATINGS - mean) ** 2) / (count - 1)
+    critical = T_CRITICAL_95[count - 2] if count - 1 <= len(T_CRITICAL_95) else Z_CRITICAL_95
+    margin = critical * np.sqrt(variance / count)
+    return mean, (mean - margin, mean + margin)
+
+
+def trend(daily, window):
+    """
+    Returns the rating count and mean per period, and the least-squares change of the mean per
+    period (weighted by each period's count).
+    """
+    periods = daily.groupby(daily.index.to_period(TREND_WINDOWS[window])).sum()
+    periods = periods[periods.sum(axis=1) > 0]
+    counts = periods.sum(axis=1).to_numpy()
+    means = periods.to_numpy() @ RATINGS / counts if len(counts) else np.array([])
+
+    slope = None
+    if len(counts) >= 2:
+        positions = periods.index.asi8 - periods.index.asi8[0]  # Periods elapsed since the first one
+        slope = round(float(np.polyfit(positions, means, 1, w=np.sqrt(counts))[0]), 3)
+    return {
+        'periods': [
+            {'start': period.start_time.date().isoformat(), 'count': int(count), 'mean': round(float(mean), 2)}
+            for period, count, mean in zip(periods.index, counts, means)
+        ],
+        'slope': slope,
+    }
+
+
+def summarize(states, enrolled, window):
+    """
+    Combines one or more course states into the reported statistics.
+    """
+    frames = [state['daily'] for state in states if not state['daily'].empty]
+    daily = pd.concat(frames).groupby(level=0).sum() if frames else empty_daily()
+    histogram = daily.sum().reindex(RATINGS, fill_value=0).to_numpy()
+    mean, interval = mean_confidence_interval(histogram)
+    respondents = sum(state['respondents'] for state in states)
+    return {
+        'count': int(histogram.sum()),
+        'histogram': {str(rating): int(count) for rating, count in zip(RATINGS, histogram)},
+        'mean': round(float(mean), 2) if mean is not None else None,
+        'confidence_interval': [round(float(bound), 2) for bound in interval] if interval is not None else None,
+        'respondents': respondents,
+        'enrolled': enrolled,
+        'response_rate': round(respondents / enrolled, 3) if enrolled else None,
+        'trend': trend(daily, window),
+    }
+
+
+def enrollment_counts(course_ids):
+    rows = Enrollment.objects.filter(course_id__in=course_ids).values('course_id').annotate(count=Count('id'))
+    return {row['course_id']: row['count'] for row in rows}
+
+
+def get_course_feedback_analytics(course, window='week'):
+    """
+    Returns rating histogram, mean with 95% confidence interval, response rate and trend of a course.
+    """
+    state = get_course_states([course.pk])[course.pk]
+    return summarize([state], enrollment_counts([course.pk]).get(course.pk, 0), window)
+
+
+def get_teacher_feedback_analytics(courses, window='week'):
+    """
+    Returns the analytics over all of a teacher's courses together with a per-course breakdown.
+    """
+    course_ids = [course.pk for course in courses]
+    states = get_course_states(course_ids)
+    enrolled = enrollment_counts(course_ids)
+    return {
+        'overall': summarize(list(states.values()), sum(enrolled.values()), window),
+        'courses': [
+            {'id': course.pk, 'title': course.title, **summarize([states[course.pk]], enrolled.get(course.pk, 0), window)}
+            for course in courses
+        ],
+    }
@@ -0,0 +1,120 @@
+# authentication.py
+
+import time
+
+from django.core.cache import cache
+from rest_framework.authentication import SessionAuthentication
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+# User flags copied into tokens, readable as request.user.<claim> without a database lookup
+ROLE_CLAIMS = ('is_student', 'is_teacher', 'is_staff')
+
+
+def revocation_cache_key(jti):
+    return f'jwt:revoked:{jti}'
+
+
+def revoke_token(token):
+    """
+    Adds a token to the revocation list until it would have expired anyway, so the list stays small.
+    """
+    remaining = int(token['exp'] - time.time())
+    if remaining > 0:
+        cache.set(revocation_cache_key(token[api_settings.JTI_CLAIM]), True, remaining)
+
+
+def is_revoked(token):
+    return cache.get(revocation_cache_key(token.get(api_settings.JTI_CLAIM))) is not None
+
+
+def bearer_user_id(request):
+    """
+    Returns the user id of a request's valid bearer token, or None, without any lookup.
+
+    Lets code running before DRF authentication (e.g. middleware) tell token clients apart.
+    """
+    authentication = JWTAuthentication()
+    header = authentication.get_header(request)
+    raw_token = authentication.get_raw_token(header) if header else None
+    if raw_token is None:
+        return None
+    try:
+        return authentication.get_validated_token(raw_token).get(api_settings.USER_ID_CLAIM)
+    except InvalidToken:
+        return None
+
+
+def deactivation_cache_key(user_id):
+    return f'jwt:deactivated:{user_id}'
+
+
+def update_deactivation(user_id, active):
+    """
+    Records a deactivated (or deleted) user for as long as an access token issued before could
+    still be valid, so stateless reads stop at once; reactivation clears the record.
+    """
+    if active:
+        cache.delete(deactivation_cache_key(user_id))
+    else:
+        cache.set(deactivation_cache_key(user_id), True, int(api_settings.ACCESS_TOKEN_LIFETIME.total_seconds()))
+
+
+class RoleTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """
+    Issues refresh/access token pairs carrying the user's role claims.
+    """
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        for claim in ROLE_CLAIMS:
+            token[claim] = getattr(user, claim)
+        return token
+
+
+class RevocableTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Refuses to issue access tokens from a revoked refresh token.
+    """
+    def validate(self, attrs):
+        if is_revoked(RefreshToken(attrs['refresh'])):
+            raise InvalidToken("Token has been revoked.")
+        return super().validate(attrs)
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """
+    Authenticates `Authorization: Bearer <token>` requests without touching the session.
+
+    Safe (read-only) requests get a TokenUser built from the token's claims, so neither the
+    session nor the user row is read; role checks such as `request.user.is_teacher` read the
+    claims. Unsafe requests load the CustomUser, since writes assign it to model fields.
+
+    A TokenUser is not a model instance: views behind API_AUTHENTICATION_CLASSES must filter
+    on `request.user.pk` (e.g. `teacher_id=request.user.pk`), never on `request.user` itself.
+    """
+    def authenticate(self, request):
+        self.stateless = request.method in SAFE_METHODS
+        return super().authenticate(request)
+
+    def get_validated_token(self, raw_token):
+        token = super().get_validated_token(raw_token)
+        if is_revoked(token):
+            raise InvalidToken("Token has been revoked.")
+        return token
+
+    def get_user(self, validated_token):
+        if self.stateless and api_settings.USER_ID_CLAIM in validated_token:
+            if cache.get(deactivation_cache_key(validated_token[api_settings.USER_ID_CLAIM])):
+                raise AuthenticationFailed("User is inactive", code='user_inactive')
+            return api_settings.TOKEN_USER_CLASS(validated_token)
+        return super().get_user(validated_token)
+
+
+# Authentication for API views: bearer tokens first, then the browser session
+API_AUTHENTICATION_CLASSES = [StatelessJWTAuthentication, SessionAuthentication]
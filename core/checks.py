@@ -0,0 +1,22 @@
+# checks.py
+
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    """
+    Warns when the default cache is private to each process.
+
+    Cache invalidation (dashboards, ETags, course pages) and throttle buckets only work across
+    web and worker processes when they share the cache.
+    """
+    if settings.CACHES['default']['BACKEND'] != 'django.core.cache.backends.locmem.LocMemCache':
+        return []
+    return [Warning(
+        "The default cache is local to each process, so invalidations made by one process do not "
+        "reach the others.",
+        hint="Set REDIS_URL or REDIS_CACHE_URL to a Redis shared by the web and worker processes.",
+        id='core.W001',
+    )]
@@ -0,0 +1,72 @@
+# conditional.py
+
+import hashlib
+import uuid
+
+from django.core.cache import cache
+from django.utils.cache import get_conditional_response
+
+VERSION_CACHE_TIMEOUT = None  # Version tokens never expire on their own; a missing token is simply regenerated
+
+
+def version_cache_key(*parts):
+    """
+    Returns the cache key of a version token, e.g. ('course',) for a collection or ('course', 3) for a resource.
+    """
+    return 'version:' + ':'.join(str(part) for part in parts)
+
+
+def get_version(*parts):
+    """
+    Returns the current version token of a collection or resource, creating one if none is cached.
+    """
+    key = version_cache_key(*parts)
+    cache.add(key, uuid.uuid4().hex, VERSION_CACHE_TIMEOUT)
+    return cache.get(key)
+
+
+def bump_version(*parts):
+    """
+    Replaces the version token of a collection or resource, invalidating every ETag derived from it.
+    """
+    cache.set(version_cache_key(*parts), uuid.uuid4().hex, VERSION_CACHE_TIMEOUT)
+
+
+def get_versions(*keys):
+    """
+    Returns the version tokens of several collections or resources in one cache round trip.
+
+    Args:
+        *keys (tuple): Version key parts, e.g. ('course',) or ('course', 3).
+    """
+    cache_keys = [version_cache_key(*parts) for parts in keys]
+    found = cache.get_many(cache_keys)
+    missing = {key: uuid.uuid4().hex for key in cache_keys if key not in found}
+    for key, token in missing.items():
+        cache.add(key, token, VERSION_CACHE_TIMEOUT)
+    if missing:
+        found.update(cache.get_many(list(missing)))
+    return [found.get(key) for key in cache_keys]
+
+
+def make_etag(*parts):
+    """
+    Builds a strong, quoted ETag from validator parts.
+    """
+    digest = hashlib.md5(':'.join(str(part) for part in parts).encode(), usedforsecurity=False).hexdigest()
+    return f'"{digest}"'
+
+
+def not_modified(request, etag=None, last_modified=None):
+    """
+    Returns a 304 (or 412) response when the request's validators still match, otherwise None.
+
+    Args:
+        request (HttpRequest): The incoming request.
+        etag (str, optional): The quoted ETag of the current representation.
+        last_modified (datetime, optional): When the current representation last changed.
+    """
+    if request.method not in ('GET', 'HEAD'):
+        return None
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    return get_conditional_response(request, etag=etag, last_modified=timestamp)
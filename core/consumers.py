@@ -1,8 +1,11 @@
 import json
+from channels.consumer import SyncConsumer
 from channels.generic.websocket import AsyncWebsocketConsumer
 from django.utils import timezone
 from asgiref.sync import sync_to_async
 
+from .replicas import replica_reads
+
 
 class EchoConsumer(AsyncWebsocketConsumer):
     """
@@ -40,10 +43,11 @@ class EchoConsumer(AsyncWebsocketConsumer):
         # Import models locally to avoid circular import issues
         from .models import ChatMessage
 
-        # Fetch the last 20 messages from the database for this room
-        messages = await sync_to_async(list)(
-            ChatMessage.objects.filter(room__name=self.room_name).order_by('-timestamp')[:20]
-        )
+        # Fetch the last 20 messages from the database for this room, from a read replica if there is one
+        with replica_reads():
+            messages = await sync_to_async(list)(
+                ChatMessage.objects.filter(room__name=self.room_name).order_by('-timestamp')[:20]
+            )
 
         # Send the messages to the WebSocket
         for message in reversed(messages):
@@ -125,3 +129,23 @@ class EchoConsumer(AsyncWebsocketConsumer):
             'username': username,
             'timestamp': timestamp
         }))
+
+
+class ThumbnailConsumer(SyncConsumer):
+    """
+    Background worker building profile photo renditions off the request path.
+    Run it with `python manage.py runworker thumbnails`.
+    """
+    def generate_renditions(self, message):
+        from .thumbnails import generate_renditions  # Consumers are imported before the app registry is ready
+        generate_renditions(message['user_id'])
+
+
+class RecommendationConsumer(SyncConsumer):
+    """
+    Background worker refreshing course recommendations after enrollment changes.
+    Run it with `python manage.py runworker recommendations`.
+    """
+    def refresh_neighbors(self, message):
+        from .recommendations import refresh_after_enrollment_change
+        refresh_after_enrollment_change(message['course_id'], message.get('student_id'))
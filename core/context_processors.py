@@ -1,15 +1,15 @@
 # context_processors.py
 
-from .models import Notification
+from .dashboard import get_notification_summary
 
 
 def notifications_processor(request):
     """
     Context processor to include unread notifications for the authenticated user in all templates.
 
-    This function checks if the user is authenticated and retrieves all unread notifications
-    for that user from the Notification model. It then adds these notifications to the context
-    for all templates, making them accessible globally in the application.
+    This function checks if the user is authenticated and retrieves the cached unread notification
+    summary for that user (count plus the most recent notifications). It then adds these to the
+    context for all templates, so the navbar no longer queries the Notification table per render.
 
     Args:
         request (HttpRequest): The HTTP request object containing metadata about the request.
@@ -18,9 +18,13 @@ def notifications_processor(request):
         dict: A dictionary with the unread notifications for the user, or an empty dictionary if the user is not authenticated.
     """
     if request.user.is_authenticated:
-        # Retrieve all unread notifications for the authenticated user
-        user_notifications = Notification.objects.filter(user=request.user, read=False)
-        return {'notifications': user_notifications}
+        # Retrieve the cached unread notification summary for the authenticated user
+        summary = get_notification_summary(request.user)
+        return {
+            'notifications': summary['unread_notifications'],
+            'notification_count': summary['notification_count'],
+            'unread_notifications': summary['unread_notifications'],
+        }
 
     # Return an empty dictionary if the user is not authenticated
     return {}
@@ -0,0 +1,108 @@
+# dashboard.py
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Course, Enrollment, Notification, StatusUpdate
+
+# Upper bounds for every list shown on the home page, so the payload no longer grows with account age
+DASHBOARD_CACHE_TIMEOUT = getattr(settings, 'DASHBOARD_CACHE_TIMEOUT', 300)
+DASHBOARD_STATUS_UPDATE_LIMIT = getattr(settings, 'DASHBOARD_STATUS_UPDATE_LIMIT', 20)
+DASHBOARD_ENROLLMENT_LIMIT = getattr(settings, 'DASHBOARD_ENROLLMENT_LIMIT', 50)
+DASHBOARD_CREATED_COURSE_LIMIT = getattr(settings, 'DASHBOARD_CREATED_COURSE_LIMIT', 50)
+DASHBOARD_NOTIFICATION_LIMIT = getattr(settings, 'DASHBOARD_NOTIFICATION_LIMIT', 10)
+
+
+def dashboard_cache_key(user_id):
+    """
+    Returns the cache key holding the dashboard payload of a user.
+    """
+    return f'dashboard:{user_id}'
+
+
+def notifications_cache_key(user_id):
+    """
+    Returns the cache key holding the unread notification summary of a user.
+    """
+    return f'dashboard:notifications:{user_id}'
+
+
+def build_notification_summary(user):
+    """
+    Loads the unread notification count and the most recent unread notifications.
+
+    The count query is skipped when the bounded list already holds every unread notification.
+    """
+    unread = Notification.objects.filter(user=user, read=False)
+    recent = list(unread[:DASHBOARD_NOTIFICATION_LIMIT])
+    count = len(recent) if len(recent) < DASHBOARD_NOTIFICATION_LIMIT else unread.count()
+    return {'notification_count': count, 'unread_notifications': recent}
+
+
+def get_notification_summary(user):
+    """
+    Returns the cached unread notification summary for a user, building it on a cache miss.
+    """
+    key = notifications_cache_key(user.pk)
+    summary = cache.get(key)
+    if summary is None:
+        summary = build_notification_summary(user)
+        cache.set(key, summary, DASHBOARD_CACHE_TIMEOUT)
+    return summary
+
+
+def build_dashboard(user):
+    """
+    Assembles the home page data for a user with one bounded query per list.
+
+    Args:
+        user (CustomUser): The user whose dashboard is being built.
+
+    Returns:
+        dict: Enrollments (with their courses), status updates and created courses.
+    """
+    enrollments = list(
+        Enrollment.objects.filter(student=user)
+        .select_related('course')
+        .order_by('-enrolled_on')[:DASHBOARD_ENROLLMENT_LIMIT]
+    )
+    status_updates = list(
+        StatusUpdate.objects.filter(user=user).order_by('-timestamp')[:DASHBOARD_STATUS_UPDATE_LIMIT]
+    )
+    created_courses = []
+    if user.is_teacher:
+        created_courses = list(
+            Course.objects.filter(teacher=user).order_by('-id')[:DASHBOARD_CREATED_COURSE_LIMIT]
+        )
+
+    return {
+        'courses': enrollments,
+        'status_updates': status_updates,
+        'created_courses': created_courses,
+    }
+
+
+def get_dashboard(user):
+    """
+    Returns the cached dashboard payload for a user, merged with the notification summary.
+    """
+    key = dashboard_cache_key(user.pk)
+    dashboard = cache.get(key)
+    if dashboard is None:
+        dashboard = build_dashboard(user)
+        cache.set(key, dashboard, DASHBOARD_CACHE_TIMEOUT)
+    return {**dashboard, **get_notification_summary(user)}
+
+
+def invalidate_dashboard(*user_ids):
+    """
+    Drops the cached dashboard payloads of the given users.
+    """
+    cache.delete_many([dashboard_cache_key(user_id) for user_id in user_ids if user_id])
+
+
+def invalidate_notifications(*user_ids):
+    """
+    Drops the cached unread notification summaries of the given users.
+    """
+    cache.delete_many([notifications_cache_key(user_id) for user_id in user_ids if user_id])
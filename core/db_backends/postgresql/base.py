@@ -0,0 +1,92 @@
+# base.py
+
+import threading
+
+import psycopg2.extensions
+import psycopg2.extras
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.postgresql import base
+
+from core.pooling import POOLS, ConnectionPool, PoolTimeout
+
+_pools_lock = threading.Lock()
+
+
+def check_connection(connection):
+    """
+    Health check for pooled connections that sat idle: a round trip proves the server still answers.
+    """
+    if connection.closed:
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT 1')
+    return True
+
+
+def reset_connection(connection):
+    """
+    Rolls back whatever a returned connection left open, so the next borrower starts clean.
+    """
+    if connection.closed:
+        raise psycopg2.InterfaceError("The connection is closed.")
+    if connection.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+        connection.rollback()
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    PostgreSQL backend borrowing psycopg2 connections from a per-process ConnectionPool.
+
+    Django's own pool (OPTIONS['pool']) requires psycopg 3; this backend gives the pinned
+    psycopg2 the same behaviour. Configure it with the POOL entry of the database settings
+    (max_size, timeout, max_idle, max_lifetime, check_interval). Connections go back to the
+    pool when Django closes them at the end of each request, so CONN_MAX_AGE must be 0.
+    """
+    @property
+    def connection_pool(self):
+        pool = POOLS.get(self.alias)
+        if pool is None:
+            with _pools_lock:
+                pool = POOLS.get(self.alias)
+                if pool is None:
+                    if self.settings_dict.get('CONN_MAX_AGE', 0) != 0:
+                        raise ImproperlyConfigured("Pooled connections cannot be persistent; set CONN_MAX_AGE to 0.")
+                    params = self.get_connection_params()
+                    pool = ConnectionPool(
+                        lambda: self.open_connection(params),
+                        check=check_connection if self.settings_dict['CONN_HEALTH_CHECKS'] else None,
+                        reset=reset_connection,
+                        **(self.settings_dict.get('POOL') or {}),
+                    )
+                    POOLS[self.alias] = pool
+        return pool
+
+    def open_connection(self, conn_params):
+        """
+        Opens a physical connection, configured as Django's backend would configure its own.
+        """
+        connection = self.Database.connect(**conn_params)
+        isolation_level = self.settings_dict['OPTIONS'].get('isolation_level')
+        if isolation_level is not None:
+            connection.isolation_level = base.IsolationLevel(isolation_level)
+        psycopg2.extras.register_default_jsonb(conn_or_curs=connection, loads=lambda x: x)
+        return connection
+
+    def get_new_connection(self, conn_params):
+        isolation_level = self.settings_dict['OPTIONS'].get('isolation_level', base.IsolationLevel.READ_COMMITTED)
+        self.isolation_level = base.IsolationLevel(isolation_level)
+        try:
+            return self.connection_pool.getconn()
+        except PoolTimeout as error:
+            raise self.Database.OperationalError(str(error)) from error
+
+    def _close(self):
+        if self.connection is not None:
+            with self.wrap_database_errors:
+                self.connection_pool.putconn(self.connection, discard=self.errors_occurred and not self.is_usable())
+
+    def close_pool(self):
+        with _pools_lock:
+            pool = POOLS.pop(self.alias, None)
+        if pool is not None:
+            pool.close()
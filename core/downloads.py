@@ -0,0 +1,166 @@
+# downloads.py
+
+import hashlib
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse
+from django.utils.http import content_disposition_header, http_date, parse_http_date_safe
+
+from .conditional import not_modified
+from .models import Material
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+# Content-versioned URLs never change meaning; unversioned ones are revalidated with the ETag
+IMMUTABLE_CACHE_CONTROL = 'private, max-age=31536000, immutable'
+REVALIDATE_CACHE_CONTROL = 'private, no-cache'
+
+
+def file_checksum(field_file):
+    """
+    Returns the SHA-256 hex digest of a stored or freshly uploaded file, reading it in chunks.
+    """
+    digest = hashlib.sha256()
+    for chunk in field_file.chunks():
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def ensure_checksum(material):
+    """
+    Computes and stores the checksum of a material saved before checksums were recorded.
+    """
+    if material.file and not material.checksum:
+        with material.file.open('rb'):
+            material.checksum = file_checksum(material.file)
+        # Not a content change, so updated_at and the version tokens are left alone
+        Material.objects.filter(pk=material.pk).update(checksum=material.checksum)
+
+
+def parse_range(header, size):
+    """
+    Parses a single-range `Range: bytes=...` header into inclusive (start, end) offsets.
+
+    Returns None for a missing, malformed or multi-range header, which is answered with the
+    whole file, and raises ValueError when the range lies outside the file.
+    """
+    match = RANGE_RE.match(header or '')
+    if not match or match.groups() == ('', ''):
+        return None
+    first, last = match.groups()
+    if not first:
+        suffix_length = int(last)
+        if not suffix_length:
+            raise ValueError("Empty suffix range.")
+        return max(size - suffix_length, 0), size - 1
+    start = int(first)
+    if last and int(last) < start:
+        return None
+    if start >= size:
+        raise ValueError("Range starts beyond the end of the file.")
+    return start, min(int(last), size - 1) if last else size - 1
+
+
+def if_range_matches(request, etag, last_modified):
+    """
+    Evaluates `If-Range`: a range is only served if the client's copy is still current.
+    """
+    value = request.headers.get('If-Range')
+    if not value:
+        return True
+    if value.startswith('"'):
+        return value == etag
+    timestamp = parse_http_date_safe(value)
+    return timestamp is not None and timestamp == int(last_modified.timestamp())
+
+
+class RangeFile:
+    """
+    A read-only view of `length` bytes of a file, starting at `start`, for FileResponse.
+    """
+    def __init__(self, file, start, length):
+        file.seek(start)
+        self.file = file
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size) if size else b''
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+def nginx_accel_redirect(material):
+    # The location of the file within the storage, which content-addressed names do not spell out
+    location = os.path.relpath(material.file.path, material.file.storage.location).replace(os.sep, '/')
+    return 'X-Accel-Redirect', settings.MATERIAL_DOWNLOAD_ACCEL_PREFIX + quote(location)
+
+
+def x_sendfile(material):
+    return 'X-Sendfile', material.file.path
+
+
+# MATERIAL_DOWNLOAD_ACCEL value -> function returning the header that hands the file to the front proxy
+ACCELERATORS = {
+    'x-accel-redirect': nginx_accel_redirect,  # nginx
+    'x-sendfile': x_sendfile,  # Apache mod_xsendfile, lighttpd
+}
+
+
+def file_response(request, material, etag):
+    """
+    Streams the file, or the single byte range the client asked for, from storage.
+    """
+    filename = os.path.basename(material.file.name)
+    file = material.file.storage.open(material.file.name, 'rb')
+    size = material.file.size
+    try:
+        byte_range = parse_range(request.headers.get('Range'), size)
+    except ValueError:
+        file.close()
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+
+    if byte_range is None or not if_range_matches(request, etag, material.updated_at):
+        response = FileResponse(file, filename=filename)
+    else:
+        start, end = byte_range
+        response = FileResponse(RangeFile(file, start, end - start + 1), status=206, filename=filename)
+        response['Content-Length'] = end - start + 1
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    response['Accept-Ranges'] = 'bytes'
+    return response
+
+
+def serve_material(request, material):
+    """
+    Returns the response for a material download: 304 when the client's copy is current,
+    a header for the front proxy when MATERIAL_DOWNLOAD_ACCEL is set, otherwise the bytes.
+
+    The ETag is the file's SHA-256, so it is strong and identical across workers and deploys.
+    """
+    etag = f'"{material.checksum}"'
+    response = not_modified(request, etag=etag, last_modified=material.updated_at)
+    if response is None:
+        accelerator = ACCELERATORS.get(settings.MATERIAL_DOWNLOAD_ACCEL)
+        if accelerator:
+            filename = os.path.basename(material.file.name)
+            content_type, _ = mimetypes.guess_type(filename)
+            response = HttpResponse(content_type=content_type or 'application/octet-stream')
+            response['Content-Disposition'] = content_disposition_header(False, filename)
+            header, value = accelerator(material)
+            response[header] = value
+        else:
+            response = file_response(request, material, etag)
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(material.updated_at.timestamp())
+    return response
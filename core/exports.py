@@ -0,0 +1,192 @@
+# exports.py
+
+import csv
+import os
+import re
+import tempfile
+from datetime import timezone as dt_timezone
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from openpyxl import Workbook
+from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+
+from .models import ChatMessage, Enrollment, Feedback
+from .replicas import read_database
+
+EXPORT_CHUNK_SIZE = getattr(settings, 'EXPORT_CHUNK_SIZE', 2000)
+EXPORT_FORMATS = ('csv', 'xlsx')
+
+XLSX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+# Text starting with one of these is run as a formula by spreadsheet applications (CSV injection)
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+# Characters kept in download file names; anything else (quotes, semicolons, non-ASCII) becomes '_'
+UNSAFE_FILENAME_RE = re.compile(r'[^A-Za-z0-9._-]+')
+
+
+class Echo:
+    """
+    A file-like object whose write() returns the value instead of buffering it,
+    so csv.writer output can be yielded row by row.
+    """
+    def write(self, value):
+        return value
+
+
+# Rows are fetched while the response streams, after the request's replica routing has ended,
+# so each export picks its database up front with read_database()
+def feedback_rows(course):
+    """
+    Returns the export header and a lazily fetched row iterator for the feedback of a course.
+    """
+    header = ['Student', 'Rating', 'Feedback', 'Submitted']
+    rows = (
+        Feedback.objects.using(read_database()).filter(course=course)
+        .order_by('created_at', 'id')
+        .values_list('student__username', 'rating', 'content', 'created_at')
+        .iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    )
+    return header, rows
+
+
+def enrollment_rows(course):
+    """
+    Returns the export header and a lazily fetched row iterator for the enrollments of a course.
+    """
+    header = ['Username', 'First name', 'Last name', 'Email', 'Enrolled on', 'Blocked']
+    rows = (
+        Enrollment.objects.using(read_database()).filter(course=course)
+        .order_by('enrolled_on', 'id')
+        .values_list(
+            'student__username', 'student__first_name', 'student__last_name', 'student__email',
+            'enrolled_on', 'blocked',
+        )
+        .iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    )
+    return header, rows
+
+
+def chat_rows(room):
+    """
+    Returns the export header and a lazily fetched row iterator for the messages of a chat room.
+    """
+    header = ['Sent', 'Username', 'Message']
+    rows = (
+        ChatMessage.objects.using(read_database()).filter(room=room)
+        .order_by('timestamp', 'id')
+        .values_list('timestamp', 'user__username', 'message')
+        .iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    )
+    return header, rows
+
+
+def escape_formula(value):
+    """
+    Prefixes user-supplied text that a spreadsheet would evaluate as a formula with an apostrophe,
+    so it is shown as text.
+    """
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def stream_csv(header, rows):
+    """
+    Yields CSV-encoded lines for a header and rows without holding more than one row in memory.
+    """
+    writer = csv.writer(Echo())
+    yield writer.writerow(header)
+    for row in rows:
+        yield writer.writerow([escape_formula(value) for value in row])
+
+
+def _xlsx_value(value):
+    # openpyxl cannot store timezone-aware datetimes, so they are written as naive UTC
+    if getattr(value, 'tzinfo', None) is not None:
+        return value.astimezone(dt_timezone.utc).replace(tzinfo=None)
+    if isinstance(value, str):
+        # openpyxl refuses control characters and stores text starting with '=' as a formula
+        return escape_formula(ILLEGAL_CHARACTERS_RE.sub('', value))
+    return value
+
+
+def write_xlsx(header, rows):
+    """
+    Writes rows to an XLSX temporary file with openpyxl's write-only mode and returns it rewound.
+
+    Write-only worksheets flush rows to disk as they are appended, so memory use does not
+    depend on the number of rows.
+    """
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append(header)
+    for row in rows:
+        sheet.append([_xlsx_value(value) for value in row])
+
+    output = tempfile.TemporaryFile()
+    workbook.save(output)
+    output.seek(0)
+    return output
+
+
+def _next_batch(iterator, size):
+    return list(islice(iterator, size))
+
+
+async def _aiterate(iterator, batch_size):
+    """
+    Drains a synchronous iterator in batches on the sync thread, yielding asynchronously.
+
+    Daphne serves responses through ASGI, where Django would otherwise collect a synchronous
+    streaming iterator into one list before sending it.
+    """
+    while True:
+        batch = await sync_to_async(_next_batch)(iterator, batch_size)
+        if not batch:
+            return
+        for part in batch:
+            yield part
+
+
+def _read_file(file, block_size=64 * 1024):
+    try:
+        yield from iter(lambda: file.read(block_size), b'')
+    finally:
+        file.close()
+
+
+def export_response(request, basename, header, rows, export_format='csv'):
+    """
+    Builds a download response streaming the rows as CSV or XLSX.
+
+    Args:
+        request (HttpRequest): The incoming request, used to pick sync or async streaming.
+        basename (str): The download file name without extension; unsafe characters are replaced.
+        header (list): The column titles.
+        rows (iterator): Row tuples, typically from QuerySet.iterator().
+        export_format (str): Either 'csv' or 'xlsx'.
+    """
+    basename = UNSAFE_FILENAME_RE.sub('_', basename)
+    if export_format == 'xlsx':
+        output = write_xlsx(header, rows)
+        size = os.fstat(output.fileno()).st_size
+        content, batch_size = _read_file(output), 16
+        content_type, filename = XLSX_CONTENT_TYPE, f'{basename}.xlsx'
+    else:
+        size = None
+        content, batch_size = stream_csv(header, rows), EXPORT_CHUNK_SIZE
+        content_type, filename = 'text/csv', f'{basename}.csv'
+
+    if isinstance(getattr(request, '_request', request), ASGIRequest):
+        content = _aiterate(content, batch_size)
+
+    response = StreamingHttpResponse(content, content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    if size is not None:
+        response['Content-Length'] = size
+    return response
@@ -0,0 +1,153 @@
+# fast_serializers.py
+
+from functools import lru_cache
+
+from django.db import models
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+
+from .serializers import parse_field_paths
+
+# Field classes whose to_representation() is the identity for the Python type the database returns
+PASSTHROUGH_FIELDS = (serializers.CharField, serializers.IntegerField, serializers.BooleanField)
+
+
+class UnsupportedField(Exception):
+    """
+    Raised while compiling a plan for a field the fast path cannot reproduce exactly.
+    """
+
+
+class FieldPlan:
+    """
+    A precompiled mapping from `.values()` rows to the output of a serializer.
+
+    Each output key is bound to the values() lookup it reads and a converter reproducing the
+    field's to_representation(); nested serializers compile into nested plans.
+    """
+    def __init__(self, entries, pk_lookup):
+        self.entries = entries
+        self.pk_lookup = pk_lookup
+
+    @property
+    def lookups(self):
+        lookups = []
+        for key, lookup, converter, nested in self.entries:
+            lookups.extend([nested.pk_lookup, *nested.lookups] if nested else [lookup])
+        return list(dict.fromkeys(lookups))
+
+    def to_representation(self, row, request):
+        data = {}
+        for key, lookup, converter, nested in self.entries:
+            if nested is not None:
+                data[key] = None if row[nested.pk_lookup] is None else nested.to_representation(row, request)
+                continue
+            value = row[lookup]
+            data[key] = None if value is None else converter(value, request)
+        return data
+
+
+def _identity(value, request):
+    return value
+
+
+def _file_converter(field, model_field):
+    """
+    Reproduces FileField/ImageField.to_representation() from the stored file name.
+    """
+    storage = model_field.storage
+
+    def convert(name, request):
+        if not name:
+            return None
+        if not getattr(field, 'use_url', True):
+            return name
+        url = storage.url(name)
+        return request.build_absolute_uri(url) if request is not None else url
+    return convert
+
+
+def _field_converter(field):
+    to_representation = field.to_representation
+
+    def convert(value, request):
+        return to_representation(value)
+    return convert
+
+
+def compile_plan(serializer, prefix=''):
+    """
+    Compiles the readable fields of a bound serializer into a FieldPlan.
+
+    Args:
+        serializer (Serializer): A serializer instance with its fields, expansions and sparse fieldset applied.
+        prefix (str): The values() lookup prefix of a nested serializer, e.g. 'course__'.
+
+    Raises:
+        UnsupportedField: If a field cannot be reproduced from a values() column.
+    """
+    model = serializer.Meta.model
+    entries = []
+    for field in serializer._readable_fields:
+        source = field.source
+        if source == '*' or '.' in source:
+            raise UnsupportedField(field.field_name)
+        lookup = f'{prefix}{source}'
+
+        if isinstance(field, serializers.ModelSerializer):
+            entries.append((field.field_name, lookup, None, compile_plan(field, f'{lookup}__')))
+            continue
+
+        try:
+            model_field = model._meta.get_field(source)
+        except Exception:
+            raise UnsupportedField(field.field_name)
+
+        if isinstance(field, serializers.PrimaryKeyRelatedField):
+            converter = _identity  # values() yields the related primary key for a foreign key lookup
+        elif isinstance(field, serializers.FileField):
+            converter = _file_converter(field, model_field)
+        elif isinstance(field, serializers.ModelField):
+            raise UnsupportedField(field.field_name)
+        elif isinstance(field, PASSTHROUGH_FIELDS) and not isinstance(model_field, models.DecimalField):
+            converter = _identity
+        else:
+            converter = _field_converter(field)
+        entries.append((field.field_name, lookup, converter, None))
+
+    return FieldPlan(entries, f'{prefix}{model._meta.pk.name}')
+
+
+@lru_cache(maxsize=256)
+def get_field_plan(serializer_class, fields, expand):
+    """
+    Returns the cached FieldPlan of a serializer for raw `?fields=` and `?expand=` values,
+    or None when the serializer has fields the fast path cannot reproduce.
+    """
+    serializer = serializer_class(fields=parse_field_paths(fields) or None, expand=parse_field_paths(expand))
+    try:
+        return compile_plan(serializer)
+    except UnsupportedField:
+        return None
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer that reuses a prebuilt encoder for compact output instead of constructing one per response.
+
+    Output is byte-identical to JSONRenderer.
+    """
+    def __init__(self):
+        super().__init__()
+        separators = (',', ':') if self.compact else (', ', ': ')
+        self.compact_encoder = self.encoder_class(
+            ensure_ascii=self.ensure_ascii, allow_nan=not self.strict, separators=separators,
+        )
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+        ret = self.compact_encoder.encode(data)
+        return ret.replace('\u2028', '\\u2028').replace('\u2029', '\\u2029').encode()
@@ -0,0 +1,168 @@
+# feed.py
+
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db.models import Count, IntegerField, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from .models import Course, Enrollment, StatusUpdate, TimelineEntry
+
+# Entries kept per user timeline (python manage.py trim_feed_timelines deletes older ones)
+FEED_TIMELINE_LENGTH = getattr(settings, 'FEED_TIMELINE_LENGTH', 500)
+
+# Courses with more students than this are not fanned out to; their members' updates are read on demand
+FEED_FANOUT_MAX_COURSE_SIZE = getattr(settings, 'FEED_FANOUT_MAX_COURSE_SIZE', 500)
+
+FEED_PAGE_SIZE = getattr(settings, 'FEED_PAGE_SIZE', 20)
+
+# Recent updates copied into the timeline of a student who joins a course
+FEED_BACKFILL_LENGTH = 50
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+MICROSECOND = timedelta(microseconds=1)
+
+
+def split_courses(user_id):
+    """
+    Returns the ids of the courses a user takes or teaches, split into those small enough to
+    fan out to and the large ones, with a single query.
+    """
+    size = Enrollment.objects.filter(course=OuterRef('pk')).order_by().values('course').annotate(count=Count('id')).values('count')
+    rows = (
+        Course.objects.filter(Q(enrollments__student_id=user_id) | Q(teacher_id=user_id))
+        .annotate(size=Coalesce(Subquery(size, output_field=IntegerField()), Value(0)))
+        .values_list('pk', 'size').distinct()
+    )
+    small, large = [], []
+    for course_id, course_size in rows:
+        (small if course_size <= FEED_FANOUT_MAX_COURSE_SIZE else large).append(course_id)
+    return small, large
+
+
+def posted_by_members(course_ids):
+    """
+    Returns a status update condition matching authors who take or teach one of the courses.
+    """
+    return (
+        Q(user_id__in=Enrollment.objects.filter(course_id__in=course_ids).values('student_id'))
+        | Q(user_id__in=Course.objects.filter(pk__in=course_ids).values('teacher_id'))
+    )
+
+
+def member_ids(course_ids):
+    students = Enrollment.objects.filter(course_id__in=course_ids).values_list('student_id', flat=True)
+    return set(students.union(Course.objects.filter(pk__in=course_ids).values_list('teacher_id', flat=True)))
+
+
+def deliver(status_updates, user_ids):
+    TimelineEntry.objects.bulk_create(
+        [
+            TimelineEntry(user_id=user_id, status_update_id=status_update_id, timestamp=timestamp)
+            for status_update_id, timestamp in status_updates
+            for user_id in user_ids
+        ],
+        ignore_conflicts=True,
+        batch_size=1000,
+    )
+
+
+def fan_out(status_update):
+    """
+    Delivers a new status update to the timelines of its author and of everyone sharing one of
+    the author's small courses. Members of large courses pick it up when reading instead.
+    """
+    small, _ = split_courses(status_update.user_id)
+    recipients = member_ids(small) if small else set()
+    recipients.add(status_update.user_id)
+    deliver([(status_update.pk, status_update.timestamp)], recipients)
+
+
+def backfill_timeline(user_id, course_id):
+    """
+    Copies the recent updates of a small course's members into the timeline of a user who just
+    joined it, so the feed does not start empty.
+    """
+    backfill_timelines([user_id], course_id)
+
+
+def backfill_timelines(user_ids, course_id):
+    """
+    Same as backfill_timeline() for several users who joined a course together (e.g. from a
+    roster), with one query for the recent updates.
+    """
+    if not user_ids or Enrollment.objects.filter(course_id=course_id).count() > FEED_FANOUT_MAX_COURSE_SIZE:
+        return
+    recent = (
+        StatusUpdate.objects.filter(posted_by_members([course_id])).exclude(user_id__in=user_ids)
+        .order_by('-timestamp', '-id').values_list('pk', 'timestamp')[:FEED_BACKFILL_LENGTH]
+    )
+    deliver(recent, user_ids)
+
+
+def feed_queryset(user, queryset=None):
+    """
+    Returns the status updates in a user's feed: the newest FEED_TIMELINE_LENGTH delivered to the
+    user's timeline, plus those of the members of the user's large courses, read on demand.
+    """
+    queryset = StatusUpdate.objects.all() if queryset is None else queryset
+    timeline = (
+        TimelineEntry.objects.filter(user_id=user.pk).order_by('-timestamp', '-status_update')
+        .values('status_update')[:FEED_TIMELINE_LENGTH]
+    )
+    condition = Q(pk__in=timeline)
+    _, large = split_courses(user.pk)
+    if large:
+        condition |= posted_by_members(large)
+    return queryset.filter(condition)
+
+
+def encode_cursor(status_update):
+    return f'{(status_update.timestamp - EPOCH) // MICROSECOND}.{status_update.pk}'
+
+
+def decode_cursor(cursor):
+    """
+    Returns the (timestamp, id) position encoded in a cursor, or None for a malformed one.
+    """
+    try:
+        microseconds, pk = (int(part) for part in cursor.split('.'))
+        return EPOCH + microseconds * MICROSECOND, pk
+    except (AttributeError, ValueError, OverflowError):
+        return None
+
+
+def feed_page(user, cursor=None, page_size=FEED_PAGE_SIZE):
+    """
+    Returns one page of a user's feed, newest first, and the cursor of the next page (or None).
+
+    Pages seek past the (timestamp, id) of the last update shown, so deep pages cost the same
+    as the first and new posts do not shift the pages being read.
+    """
+    updates = feed_queryset(user).select_related('user').order_by('-timestamp', '-id')
+    position = decode_cursor(cursor) if cursor else None
+    if position:
+        timestamp, pk = position
+        updates = updates.filter(Q(timestamp__lt=timestamp) | Q(timestamp=timestamp, id__lt=pk))
+    updates = list(updates[:page_size + 1])
+    next_cursor = encode_cursor(updates[page_size - 1]) if len(updates) > page_size else None
+    return updates[:page_size], next_cursor
+
+
+def trim_timelines():
+    """
+    Deletes the timeline entries beyond the newest FEED_TIMELINE_LENGTH of every user.
+
+    Returns the number of entries deleted.
+    """
+    deleted = 0
+    overfull = TimelineEntry.objects.values('user').annotate(count=Count('id')).filter(count__gt=FEED_TIMELINE_LENGTH)
+    for user_id in overfull.values_list('user', flat=True):
+        entries = TimelineEntry.objects.filter(user_id=user_id)
+        oldest_kept = entries.order_by('-timestamp', '-status_update')[FEED_TIMELINE_LENGTH - 1]
+        count, _ = entries.filter(
+            Q(timestamp__lt=oldest_kept.timestamp)
+            | Q(timestamp=oldest_kept.timestamp, status_update_id__lt=oldest_kept.status_update_id)
+        ).delete()
+        deleted += count
+    return deleted
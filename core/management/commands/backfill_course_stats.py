@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from core.rollups import backfill_course_stats
+
+
+class Command(BaseCommand):
+    """
+    Rebuilds the per-course daily activity rollups from enrollments, feedback and materials.
+
+    The rollups are normally updated on every write; run this once after deploying them, or after
+    writes that bypassed the application.
+    """
+    help = "Rebuilds the CourseDailyStats rollups from the source tables."
+
+    def add_arguments(self, parser):
+        parser.add_argument('course_ids', nargs='*', type=int, help="Only rebuild these courses.")
+
+    def handle(self, *args, **options):
+        count = backfill_course_stats(options['course_ids'] or None)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {count} course day(s)."))
@@ -0,0 +1,68 @@
+import time
+
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY, get_user
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from rest_framework.request import Request
+
+from core.authentication import RoleTokenObtainPairSerializer, StatelessJWTAuthentication
+from core.models import CustomUser
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    """
+    Measures the per-request cost of authenticating an API read with the session versus a JWT.
+
+    The sample user and session are created inside a transaction that is rolled back afterwards.
+    """
+    help = "Benchmarks session authentication against stateless JWT authentication."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.run(options['requests'])
+                raise Rollback
+        except Rollback:
+            pass
+
+    def run(self, count):
+        user = CustomUser.objects.create_user(username='benchmark-auth', password='password123', is_teacher=True)
+        session = SessionStore()
+        session[SESSION_KEY] = str(user.pk)
+        session[BACKEND_SESSION_KEY] = settings.AUTHENTICATION_BACKENDS[0]
+        session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+        session.create()
+        access = str(RoleTokenObtainPairSerializer.get_token(user).access_token)
+        factory = RequestFactory()
+
+        def session_auth():
+            request = factory.get('/api/courses/')
+            request.session = SessionStore(session.session_key)
+            return get_user(request).is_teacher
+
+        def jwt_auth():
+            request = Request(factory.get('/api/courses/', HTTP_AUTHORIZATION=f'Bearer {access}'))
+            authenticated_user, _ = StatelessJWTAuthentication().authenticate(request)
+            return authenticated_user.is_teacher
+
+        for name, authenticate in (('session', session_auth), ('jwt', jwt_auth)):
+            with CaptureQueriesContext(connection) as queries:
+                authenticate()
+            start = time.perf_counter()
+            for _ in range(count):
+                authenticate()
+            elapsed = time.perf_counter() - start
+            self.stdout.write(
+                f"{name:<8} {elapsed / count * 1e6:>8.1f} us/request  {len(queries)} queries/request"
+            )
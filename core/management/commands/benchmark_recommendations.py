@@ -0,0 +1,44 @@
+import time
+import tracemalloc
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from core.recommendations import top_neighbors
+
+
+class Command(BaseCommand):
+    """
+    Measures the time and peak memory of the recommendation batch build on synthetic enrollments.
+
+    Course popularity follows a Zipf-like curve, so a few courses are in most students' lists.
+    Only the in-memory computation is measured; no rows are written.
+    """
+    help = "Benchmarks the co-enrollment neighbor computation at a given number of enrollments."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--enrollments', type=int, default=1_000_000)
+        parser.add_argument('--students', type=int, default=200_000)
+        parser.add_argument('--courses', type=int, default=5_000)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = np.random.default_rng(options['seed'])
+        popularity = 1 / np.arange(1, options['courses'] + 1) ** 0.8
+        students = rng.integers(options['students'], size=options['enrollments'])
+        courses = rng.choice(options['courses'], size=options['enrollments'], p=popularity / popularity.sum())
+        # Repeated (student, course) draws collapse into one enrollment, as the unique constraint does
+        pairs = np.unique(students * options['courses'] + courses)
+        students, courses = pairs // options['courses'], pairs % options['courses']
+
+        tracemalloc.start()
+        started = time.perf_counter()
+        course_ids, _, _, _ = top_neighbors(students, courses)
+        elapsed = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        self.stdout.write(
+            f"{len(pairs)} enrollments, {len(np.unique(courses))} courses: {len(course_ids)} neighbors "
+            f"in {elapsed:.2f}s, peak {peak / 1024 ** 2:.0f} MiB"
+        )
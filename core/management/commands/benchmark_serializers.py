@@ -0,0 +1,93 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from core.fast_serializers import FastJSONRenderer, get_field_plan
+from core.models import Course, CustomUser, Enrollment, Feedback, StatusUpdate
+from core.serializers import (
+    CourseSerializer, CustomUserSerializer, EnrollmentSerializer, FeedbackSerializer, StatusUpdateSerializer,
+    expansion_select_related, parse_field_paths,
+)
+
+# (name, queryset factory, serializer class, ?expand= value)
+BENCHMARKS = [
+    ('users', lambda: CustomUser.objects.all(), CustomUserSerializer, ''),
+    ('courses', lambda: Course.objects.all(), CourseSerializer, ''),
+    ('courses?expand=teacher', lambda: Course.objects.all(), CourseSerializer, 'teacher'),
+    ('enrollments?expand=student,course', lambda: Enrollment.objects.all(), EnrollmentSerializer, 'student,course'),
+    ('feedback', lambda: Feedback.objects.all(), FeedbackSerializer, ''),
+    ('status-updates?expand=user', lambda: StatusUpdate.objects.all(), StatusUpdateSerializer, 'user'),
+]
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    """
+    Compares the rows/sec of the ModelSerializer list path with the fast read path (API_FAST_READ_PATH).
+
+    Sample rows are created inside a transaction that is rolled back afterwards.
+    """
+    help = "Benchmarks ModelSerializer rendering against the precompiled .values() fast path."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=5000)
+        parser.add_argument('--repeat', type=int, default=3)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.create_rows(options['rows'])
+                for name, queryset, serializer_class, expand in BENCHMARKS:
+                    self.run(name, queryset, serializer_class, expand, options['repeat'])
+                raise Rollback
+        except Rollback:
+            pass
+
+    def create_rows(self, count):
+        teacher = CustomUser.objects.create_user(username='benchmark-teacher', is_teacher=True)
+        students = CustomUser.objects.bulk_create([
+            CustomUser(username=f'benchmark-student-{i}', first_name='Student', last_name=str(i),
+                       email=f'student{i}@example.com', is_student=True)
+            for i in range(count)
+        ])
+        courses = Course.objects.bulk_create([
+            Course(title=f'Course {i}', description='Benchmark course', teacher=teacher) for i in range(count)
+        ])
+        Enrollment.objects.bulk_create([Enrollment(student=s, course=c) for s, c in zip(students, courses)])
+        Feedback.objects.bulk_create([
+            Feedback(student=s, course=c, content='Benchmark feedback') for s, c in zip(students, courses)
+        ])
+        StatusUpdate.objects.bulk_create([StatusUpdate(user=s, content='Benchmark status') for s in students])
+
+    def run(self, name, queryset, serializer_class, expand, repeat):
+        expand_tree = parse_field_paths(expand)
+        renderer, fast_renderer = JSONRenderer(), FastJSONRenderer()
+
+        def serializer_path():
+            rows = queryset().select_related(*expansion_select_related(serializer_class, expand_tree))
+            data = serializer_class(rows, many=True, expand=expand_tree).data
+            return renderer.render(data)
+
+        def fast_path():
+            plan = get_field_plan(serializer_class, '', expand)
+            data = [plan.to_representation(row, None) for row in queryset().values(*plan.lookups)]
+            return fast_renderer.render(data)
+
+        count = queryset().count()
+        slow, fast = self.best_of(serializer_path, repeat), self.best_of(fast_path, repeat)
+        self.stdout.write(
+            f"{name:<36} {count / slow:>10.0f} rows/s  ->  {count / fast:>10.0f} rows/s  ({slow / fast:.1f}x)"
+        )
+
+    def best_of(self, func, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - start)
+        return min(timings)
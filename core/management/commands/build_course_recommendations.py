@@ -0,0 +1,22 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.recommendations import build_recommendations
+
+
+class Command(BaseCommand):
+    """
+    Recomputes the "students who took this also took" neighbors of every course.
+
+    Enrollment changes refresh the affected courses in the background worker; schedule this
+    (e.g. nightly) to rebuild everything consistently.
+    """
+    help = "Rebuilds the co-enrollment course recommendations from all enrollments."
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        count = build_recommendations()
+        self.stdout.write(self.style.SUCCESS(
+            f"Stored {count} course neighbor(s) in {time.perf_counter() - started:.1f}s."
+        ))
@@ -0,0 +1,20 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.sessions import clear_expired_sessions
+
+
+class Command(BaseCommand):
+    """
+    Batched alternative to Django's clearsessions, which deletes every expired row in one statement.
+
+    Schedule it (e.g. daily). Sessions kept only in the cache expire there on their own.
+    """
+    help = "Deletes expired sessions from the database in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=settings.SESSION_CLEANUP_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        count = clear_expired_sessions(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Deleted {count} expired session{'' if count == 1 else 's'}."))
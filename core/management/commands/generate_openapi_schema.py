@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from core.openapi import code_version, write_schemas
+
+
+class Command(BaseCommand):
+    """
+    Generates the compressed OpenAPI schema artifacts for the current code version.
+
+    Run it when building a release so no web worker has to introspect the API on a request.
+    """
+    help = "Writes the gzip-compressed OpenAPI schema (JSON and YAML) for the current code version."
+
+    def handle(self, *args, **options):
+        for path in write_schemas():
+            self.stdout.write(f"Wrote {path}")
+        self.stdout.write(self.style.SUCCESS(f"OpenAPI schema generated for code version {code_version()}."))
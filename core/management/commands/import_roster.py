@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import Course
+from core.roster import ROSTER_CHUNK_SIZE, RosterError, import_roster
+
+
+class Command(BaseCommand):
+    """
+    Bulk-enrolls the students listed in a CSV or XLSX roster file into a course.
+    """
+    help = "Enrolls the students of a CSV or XLSX roster (with a 'username' column) into a course."
+
+    def add_arguments(self, parser):
+        parser.add_argument('course_id', type=int)
+        parser.add_argument('path')
+        parser.add_argument('--chunk-size', type=int, default=ROSTER_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        try:
+            course = Course.objects.get(pk=options['course_id'])
+        except Course.DoesNotExist:
+            raise CommandError(f"Course {options['course_id']} does not exist.")
+
+        try:
+            with open(options['path'], 'rb') as roster:
+                report = import_roster(course, roster, options['path'], options['chunk_size'])
+        except (OSError, RosterError) as error:
+            raise CommandError(str(error))
+
+        for error in report['errors']:
+            self.stderr.write(f"Row {error['row']} ({error['username']}): {error['error']}")
+        self.stdout.write(self.style.SUCCESS(
+            f"{report['rows']} rows read: {report['enrolled']} enrolled, "
+            f"{report['already_enrolled']} already enrolled, {report['error_count']} errors."
+        ))
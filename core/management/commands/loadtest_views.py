@@ -0,0 +1,78 @@
+import asyncio
+import time
+from collections import Counter
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+
+from core.models import CustomUser
+
+
+async def fetch(host, port, path, cookie):
+    """
+    Issues one GET over a fresh HTTP/1.1 connection and returns the status code once the body is read.
+    """
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(
+        f'GET {path} HTTP/1.1\r\nHost: {host}\r\nCookie: {cookie}\r\nConnection: close\r\n\r\n'.encode()
+    )
+    await writer.drain()
+    status_line = await reader.readline()
+    await reader.read()
+    writer.close()
+    await writer.wait_closed()
+    return int(status_line.split()[1])
+
+
+class Command(BaseCommand):
+    """
+    Load-tests pages of a running server, e.g. a single daphne worker:
+
+        daphne -p 8001 elearning_project.asgi:application
+        python manage.py loadtest_views http://127.0.0.1:8001 /courses/ /courses/1/ --username alice
+
+    Running it against the same pages served by sync and by async views compares their
+    throughput per worker. The session is created directly in the configured session store.
+    """
+    help = "Issues concurrent GET requests to pages of a running server and reports requests/sec."
+
+    def add_arguments(self, parser):
+        parser.add_argument('server', help="Base URL of the server, e.g. http://127.0.0.1:8001")
+        parser.add_argument('paths', nargs='+')
+        parser.add_argument('--username', required=True, help="The user the requests are authenticated as.")
+        parser.add_argument('--requests', type=int, default=500)
+        parser.add_argument('--concurrency', type=int, default=20)
+
+    def handle(self, *args, **options):
+        try:
+            user = CustomUser.objects.get(username=options['username'])
+        except CustomUser.DoesNotExist:
+            raise CommandError(f"User {options['username']} does not exist.")
+
+        client = Client()
+        client.force_login(user)
+        cookie = f'{settings.SESSION_COOKIE_NAME}={client.cookies[settings.SESSION_COOKIE_NAME].value}'
+        server = urlsplit(options['server'])
+
+        for path in options['paths']:
+            elapsed, statuses = asyncio.run(self.load_test(
+                server.hostname, server.port or 80, path, cookie, options['requests'], options['concurrency'],
+            ))
+            summary = ', '.join(f'{count}x{status}' for status, count in sorted(statuses.items()))
+            self.stdout.write(f"{path:<40} {options['requests'] / elapsed:>8.1f} req/s  ({summary})")
+
+    async def load_test(self, host, port, path, cookie, total, concurrency):
+        await fetch(host, port, path, cookie)  # Warm up caches and templates
+
+        remaining = iter(range(total))
+        statuses = Counter()
+
+        async def worker():
+            for _ in remaining:
+                statuses[await fetch(host, port, path, cookie)] += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return time.perf_counter() - start, statuses
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+from django.template.defaultfilters import filesizeformat
+
+from core.storage import collect_garbage, storage_report
+
+
+class Command(BaseCommand):
+    """
+    Reports how much space content-addressed material storage saves.
+
+    With --collect it first recounts blob references from the materials and deletes blobs
+    nothing refers to, e.g. after a crash between a delete and its commit.
+    """
+    help = "Reports deduplicated material storage usage and optionally garbage-collects unreferenced blobs."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--collect', action='store_true', help="Remove unreferenced blobs before reporting.")
+
+    def handle(self, *args, **options):
+        if options['collect']:
+            self.stdout.write(f"Removed {collect_garbage()} unreferenced file(s).")
+
+        report = storage_report()
+        self.stdout.write(f"Distinct files:   {report['blobs']}")
+        self.stdout.write(f"References:       {report['references']}")
+        self.stdout.write(f"Stored:           {filesizeformat(report['stored_bytes'])}")
+        self.stdout.write(f"Without dedup:    {filesizeformat(report['referenced_bytes'])}")
+        self.stdout.write(self.style.SUCCESS(f"Saved:            {filesizeformat(report['saved_bytes'])}"))
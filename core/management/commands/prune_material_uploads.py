@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from core.uploads import prune_uploads
+
+
+class Command(BaseCommand):
+    """
+    Deletes abandoned chunked upload sessions and their stored chunks.
+
+    Schedule it (e.g. hourly) so interrupted uploads that are never resumed do not fill the storage.
+    """
+    help = "Deletes material upload sessions idle for longer than MATERIAL_UPLOAD_EXPIRY_HOURS."
+
+    def handle(self, *args, **options):
+        count = prune_uploads()
+        self.stdout.write(self.style.SUCCESS(f"Deleted {count} expired upload session(s)."))
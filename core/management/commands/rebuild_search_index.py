@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from core.search import rebuild_course_index, rebuild_user_index
+
+
+class Command(BaseCommand):
+    """
+    Rebuilds the full-text search tables from scratch.
+
+    Search entries are normally updated on every save; this recovers from bulk writes that skip signals.
+    """
+    help = "Rebuilds the full-text search indexes used by student and course search."
+
+    def handle(self, *args, **options):
+        rebuild_user_index()
+        rebuild_course_index()
+        self.stdout.write(self.style.SUCCESS("Search index rebuilt."))
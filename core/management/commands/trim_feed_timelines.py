@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from core.feed import trim_timelines
+
+
+class Command(BaseCommand):
+    """
+    Deletes classmate feed timeline entries beyond the newest FEED_TIMELINE_LENGTH per user.
+
+    Feeds never show older entries, so schedule it (e.g. daily) to bound the timeline table.
+    """
+    help = "Trims every user's feed timeline to FEED_TIMELINE_LENGTH entries."
+
+    def handle(self, *args, **options):
+        count = trim_timelines()
+        self.stdout.write(self.style.SUCCESS(f"Deleted {count} timeline entr{'y' if count == 1 else 'ies'}."))
@@ -0,0 +1,123 @@
+# middleware.py
+
+import threading
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+
+from .authentication import bearer_user_id
+from .replicas import REPLICA_PIN_COOKIE, pin_cache_key, replica_reads
+from .throttling import record_metric
+
+
+class AdmissionControlMiddleware:
+    """
+    Sheds load with 503 Service Unavailable once a worker is handling more than
+    ADMISSION_MAX_IN_FLIGHT requests at a time (0 disables it).
+
+    Rejecting early keeps latency bounded for the requests already admitted instead of
+    letting every request queue behind the database. The count is per process, so the
+    threshold applies to each worker separately.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.in_flight = 0
+        self.lock = threading.Lock()
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def admit(self):
+        limit = settings.ADMISSION_MAX_IN_FLIGHT
+        with self.lock:
+            if limit and self.in_flight >= limit:
+                return False
+            self.in_flight += 1
+            return True
+
+    def release(self):
+        with self.lock:
+            self.in_flight -= 1
+
+    def shed(self):
+        record_metric('shed')
+        response = HttpResponse("The server is busy, please retry shortly.", status=503, content_type='text/plain')
+        response['Retry-After'] = settings.ADMISSION_RETRY_AFTER
+        return response
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.admit():
+            return self.shed()
+        try:
+            return self.get_response(request)
+        finally:
+            self.release()
+
+    async def __acall__(self, request):
+        if not self.admit():
+            return self.shed()
+        try:
+            return await self.get_response(request)
+        finally:
+            self.release()
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Lets GET and HEAD requests read from the replicas in DATABASE_REPLICAS.
+
+    Any other request pins its client to the primary for REPLICA_STICKY_SECONDS, so clients read
+    their own writes while the replicas catch up. Browsers are pinned with a cookie; the user
+    behind a write is also pinned in the cache, which bearer-token clients (that usually keep no
+    cookies) are checked against.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def may_read_replica(self, request):
+        if not settings.DATABASE_REPLICAS or request.method not in ('GET', 'HEAD'):
+            return False
+        try:
+            if float(request.COOKIES.get(REPLICA_PIN_COOKIE, 0)) > time.time():
+                return False
+        except ValueError:
+            pass
+        user_id = bearer_user_id(request)
+        return user_id is None or cache.get(pin_cache_key(user_id)) is None
+
+    def pin(self, request, response):
+        if settings.DATABASE_REPLICAS and request.method not in ('GET', 'HEAD', 'OPTIONS'):
+            response.set_cookie(
+                REPLICA_PIN_COOKIE, f'{time.time() + settings.REPLICA_STICKY_SECONDS:.3f}',
+                max_age=settings.REPLICA_STICKY_SECONDS, httponly=True, samesite='Lax',
+            )
+            # DRF sets the authenticated user (session or token) on the underlying request
+            user = getattr(request, 'user', None)
+            if user is not None and user.is_authenticated:
+                cache.set(pin_cache_key(user.pk), True, settings.REPLICA_STICKY_SECONDS)
+        return response
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with replica_reads(self.may_read_replica(request)):
+            response = self.get_response(request)
+        return self.pin(request, response)
+
+    async def __acall__(self, request):
+        # Both hit the cache, and pin() may load the lazy request.user from the database
+        with replica_reads(await sync_to_async(self.may_read_replica)(request)):
+            response = await self.get_response(request)
+        return await sync_to_async(self.pin)(request, response)
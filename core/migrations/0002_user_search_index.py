@@ -0,0 +1,45 @@
+from django.db import migrations
+
+
+# Must stay identical to core.search.PG_USER_SEARCH_VECTOR so the planner can use the index
+PG_USER_SEARCH_VECTOR = (
+    "(setweight(to_tsvector('simple', coalesce(username, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(first_name, '') || ' ' || coalesce(last_name, '')), 'B'))"
+)
+
+
+def create_user_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute(
+            f"CREATE INDEX IF NOT EXISTS core_customuser_search_gin ON core_customuser "
+            f"USING gin ({PG_USER_SEARCH_VECTOR}) WHERE is_student"
+        )
+    elif vendor == 'sqlite':
+        schema_editor.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS core_customuser_search "
+            "USING fts5(username, first_name, last_name, prefix='2 3')"
+        )
+        schema_editor.execute(
+            "INSERT INTO core_customuser_search (rowid, username, first_name, last_name) "
+            "SELECT id, username, coalesce(first_name, ''), coalesce(last_name, '') FROM core_customuser"
+        )
+
+
+def drop_user_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute("DROP INDEX IF EXISTS core_customuser_search_gin")
+    elif vendor == 'sqlite':
+        schema_editor.execute("DROP TABLE IF EXISTS core_customuser_search")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_user_search_index, drop_user_search_index),
+    ]
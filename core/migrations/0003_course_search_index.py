@@ -0,0 +1,49 @@
+from django.db import migrations
+
+
+def create_course_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute(
+            "CREATE TABLE IF NOT EXISTS core_course_search ("
+            "course_id bigint PRIMARY KEY REFERENCES core_course (id) ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED, "
+            "document tsvector NOT NULL)"
+        )
+        schema_editor.execute(
+            "CREATE INDEX IF NOT EXISTS core_course_search_gin ON core_course_search USING gin (document)"
+        )
+        schema_editor.execute(
+            "INSERT INTO core_course_search (course_id, document) "
+            "SELECT c.id, "
+            "setweight(to_tsvector('english', coalesce(c.title, '')), 'A') || "
+            "setweight(to_tsvector('english', coalesce(string_agg(m.title, ' '), '')), 'B') || "
+            "setweight(to_tsvector('english', coalesce(c.description, '')), 'C') "
+            "FROM core_course c LEFT JOIN core_material m ON m.course_id = c.id GROUP BY c.id "
+            "ON CONFLICT (course_id) DO NOTHING"
+        )
+    elif vendor == 'sqlite':
+        schema_editor.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS core_course_search "
+            "USING fts5(title, materials, description, tokenize='porter unicode61', prefix='2 3')"
+        )
+        schema_editor.execute(
+            "INSERT INTO core_course_search (rowid, title, materials, description) "
+            "SELECT c.id, c.title, coalesce(group_concat(m.title, ' '), ''), c.description "
+            "FROM core_course c LEFT JOIN core_material m ON m.course_id = c.id GROUP BY c.id"
+        )
+
+
+def drop_course_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor in ('postgresql', 'sqlite'):
+        schema_editor.execute("DROP TABLE IF EXISTS core_course_search")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_user_search_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_course_search_index, drop_course_search_index),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1 on 2026-10-19 13:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_material_upload'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='material',
+            name='checksum',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+    ]
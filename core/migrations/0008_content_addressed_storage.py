@@ -0,0 +1,28 @@
+# Generated by Django 5.1 on 2026-10-19 13:12
+
+import core.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_material_checksum'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContentBlob',
+            fields=[
+                ('digest', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('size', models.BigIntegerField()),
+                ('ref_count', models.PositiveIntegerField(default=1)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='material',
+            name='file',
+            field=models.FileField(blank=True, max_length=255, null=True, storage=core.storage.get_material_storage, upload_to='course_materials/'),
+        ),
+    ]
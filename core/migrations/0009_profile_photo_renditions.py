@@ -0,0 +1,18 @@
+# Generated by Django 5.1 on 2026-10-19 13:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_content_addressed_storage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='profile_photo_renditions',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.1 on 2026-10-19 13:27
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_course_neighbor'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TimelineEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('timestamp', models.DateTimeField()),
+                ('status_update', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.statusupdate')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', '-timestamp', '-status_update'], name='timeline_user_recent_idx')],
+                'unique_together': {('user', 'status_update')},
+            },
+        ),
+    ]
@@ -0,0 +1,45 @@
+from django.db import migrations
+
+# Stemming also stems the prefix of a `term*` query, so partially typed words ("learni") never
+# matched; the course search documents are rebuilt with unstemmed tokens.
+
+
+def rebuild_course_search_index(config, tokenizer):
+    def rebuild(apps, schema_editor):
+        vendor = schema_editor.connection.vendor
+        if vendor == 'postgresql':
+            schema_editor.execute(
+                "INSERT INTO core_course_search (course_id, document) "
+                "SELECT c.id, "
+                f"setweight(to_tsvector('{config}', coalesce(c.title, '')), 'A') || "
+                f"setweight(to_tsvector('{config}', coalesce(string_agg(m.title, ' '), '')), 'B') || "
+                f"setweight(to_tsvector('{config}', coalesce(c.description, '')), 'C') "
+                "FROM core_course c LEFT JOIN core_material m ON m.course_id = c.id GROUP BY c.id "
+                "ON CONFLICT (course_id) DO UPDATE SET document = EXCLUDED.document"
+            )
+        elif vendor == 'sqlite':
+            schema_editor.execute("DROP TABLE IF EXISTS core_course_search")
+            schema_editor.execute(
+                "CREATE VIRTUAL TABLE core_course_search "
+                f"USING fts5(title, materials, description, tokenize='{tokenizer}', prefix='2 3')"
+            )
+            schema_editor.execute(
+                "INSERT INTO core_course_search (rowid, title, materials, description) "
+                "SELECT c.id, c.title, coalesce(group_concat(m.title, ' '), ''), c.description "
+                "FROM core_course c LEFT JOIN core_material m ON m.course_id = c.id GROUP BY c.id"
+            )
+    return rebuild
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_timeline_entry'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            rebuild_course_search_index('simple', 'unicode61'),
+            rebuild_course_search_index('english', 'porter unicode61'),
+        ),
+    ]
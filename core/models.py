@@ -1,7 +1,12 @@
+import uuid
+
 from django.db import models
 from django.contrib.auth.models import AbstractUser, Group, Permission
 from django.utils import timezone
 from django.conf import settings
+from django.urls import reverse
+
+from .storage import get_material_storage
 
 
 # Custom User Model
@@ -12,6 +17,8 @@ class CustomUser(AbstractUser):
     is_student = models.BooleanField(default=False)
     is_teacher = models.BooleanField(default=False)
     profile_photo = models.ImageField(upload_to='profile_photos/', blank=True, null=True)
+    # Resized copies of profile_photo built by the thumbnail worker, see core/thumbnails.py
+    profile_photo_renditions = models.JSONField(default=dict, blank=True, editable=False)
     bio = models.TextField(blank=True, null=True)
 
     # Avoid clashes with default user model relations
@@ -54,6 +61,7 @@ class Course(models.Model):
     title = models.CharField(max_length=200)
     description = models.TextField()
     teacher = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='courses')
+    updated_at = models.DateTimeField(auto_now=True)  # Used as the Last-Modified validator of the course
 
     def __str__(self):
         return self.title
@@ -70,6 +78,11 @@ class Feedback(models.Model):
     rating = models.IntegerField(default=5)  # Feedback rating field
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='feedback_created_at_idx'),  # Stable API pagination order
+        ]
+
     def __str__(self):
         return f'Feedback by {self.student.username} for {self.course.title}'
 
@@ -83,9 +96,13 @@ class Enrollment(models.Model):
     course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='enrollments')
     enrolled_on = models.DateTimeField(default=timezone.now)
     blocked = models.BooleanField(default=False)  # Indicates if the student is blocked
+    updated_at = models.DateTimeField(auto_now=True)  # Used as the Last-Modified validator of the enrollment
 
     class Meta:
         unique_together = ('student', 'course')  # Ensures unique enrollment per student and course
+        indexes = [
+            models.Index(fields=['enrolled_on', 'id'], name='enrollment_enrolled_on_idx'),  # Stable API pagination order
+        ]
 
     def __str__(self):
         return f"{self.student.username} enrolled in {self.course.title}"
@@ -100,10 +117,37 @@ class StatusUpdate(models.Model):
     content = models.TextField()
     timestamp = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['timestamp', 'id'], name='statusupdate_timestamp_idx'),  # Stable API pagination order
+        ]
+
     def __str__(self):
         return f"{self.user.username}: {self.content} ({self.timestamp})"
 
 
+# Timeline Entry Model
+class TimelineEntry(models.Model):
+    """
+    Represents a status update delivered to the feed of one user.
+
+    Entries are written when a status update is posted (see core/feed.py), so reading a feed
+    is a seek on the reader's own rows instead of a join across enrollments.
+    """
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='+')
+    status_update = models.ForeignKey(StatusUpdate, on_delete=models.CASCADE, related_name='+')
+    timestamp = models.DateTimeField()  # Copied from the status update to order the timeline without a join
+
+    class Meta:
+        unique_together = ('user', 'status_update')
+        indexes = [
+            models.Index(fields=['user', '-timestamp', '-status_update'], name='timeline_user_recent_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.status_update_id} for {self.user_id}"
+
+
 # Chat Room Model
 class ChatRoom(models.Model):
     """
@@ -175,7 +219,104 @@ class Material(models.Model):
     description = models.TextField(blank=True)
     course = models.ForeignKey('Course', on_delete=models.CASCADE, related_name='materials')
     created_at = models.DateTimeField(auto_now_add=True)
-    file = models.FileField(upload_to='course_materials/', blank=True, null=True)
+    file = models.FileField(
+        upload_to='course_materials/', storage=get_material_storage, max_length=255, blank=True, null=True,
+    )  # Identical files are stored once, see ContentAddressedStorage
+    checksum = models.CharField(max_length=64, blank=True)  # SHA-256 of the file, hex-encoded; versions download URLs
+    updated_at = models.DateTimeField(auto_now=True)  # Used as the Last-Modified validator of the material
 
     def __str__(self):
         return f"{self.title} for {self.course.title}"
+
+    def get_download_url(self):
+        """
+        Returns the download URL of the file, versioned by its content when the checksum is known
+        so browsers may cache it indefinitely.
+        """
+        if self.checksum:
+            return reverse('download_material_version', args=[self.pk, self.checksum[:16]])
+        return reverse('download_material', args=[self.pk])
+
+
+# Course Daily Stats Model
+class CourseDailyStats(models.Model):
+    """
+    Represents the activity counts of a course on one day.
+
+    The rows are pre-aggregated by the write paths (see core/rollups.py), so dashboards read one
+    row per day instead of scanning enrollments, feedback and materials.
+    """
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='daily_stats')
+    day = models.DateField()
+    enrollments = models.PositiveIntegerField(default=0)
+    unenrollments = models.PositiveIntegerField(default=0)
+    blocks = models.PositiveIntegerField(default=0)
+    feedback = models.PositiveIntegerField(default=0)
+    materials = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('course', 'day')  # One row per course and day, also serving range reads
+
+    def __str__(self):
+        return f"{self.course.title} on {self.day}"
+
+
+# Course Neighbor Model
+class CourseNeighbor(models.Model):
+    """
+    Represents one of the courses most often taken together with a course.
+
+    Rows are precomputed from co-enrollments (see core/recommendations.py), so the course page
+    reads its "also took" list with one indexed query.
+    """
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='neighbors')
+    neighbor = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='+')
+    score = models.FloatField()  # Cosine similarity of the two courses' student sets
+    co_enrollments = models.PositiveIntegerField()  # Students enrolled in both courses
+
+    class Meta:
+        unique_together = ('course', 'neighbor')
+
+    def __str__(self):
+        return f"{self.course.title} -> {self.neighbor.title} ({self.score:.3f})"
+
+
+# Content Blob Model
+class ContentBlob(models.Model):
+    """
+    Represents a distinct file content kept by ContentAddressedStorage and how many stored names refer to it.
+    """
+    digest = models.CharField(max_length=64, primary_key=True)  # SHA-256 of the content, hex-encoded
+    size = models.BigIntegerField()
+    ref_count = models.PositiveIntegerField(default=1)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.digest} ({self.ref_count} references)"
+
+
+# Material Upload Model
+class MaterialUpload(models.Model):
+    """
+    Represents a resumable, chunked upload of a material file.
+
+    Chunks are stored as they arrive; the Material is created (or its file replaced) only
+    once every byte has been received and the checksum matches.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='material_uploads')
+    uploaded_by = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='material_uploads')
+    # The material whose file is replaced, or the one created when the upload completes
+    material = models.ForeignKey(Material, on_delete=models.CASCADE, null=True, blank=True, related_name='uploads')
+    title = models.CharField(max_length=200, blank=True)
+    description = models.TextField(blank=True)
+    filename = models.CharField(max_length=255)
+    size = models.BigIntegerField()
+    checksum = models.CharField(max_length=64, blank=True)  # Expected SHA-256 of the whole file, hex-encoded
+    received = models.BigIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Upload of {self.filename} for {self.course.title}"
@@ -0,0 +1,126 @@
+# openapi.py
+
+import gzip
+import hashlib
+import threading
+from collections import namedtuple
+from functools import lru_cache
+from pathlib import Path
+
+import drf_yasg
+from django.conf import settings
+from django.core.cache import cache
+from drf_yasg import openapi
+from drf_yasg.codecs import OpenAPICodecJson, OpenAPICodecYaml
+from drf_yasg.generators import OpenAPISchemaGenerator
+
+from .conditional import make_etag
+
+API_INFO = openapi.Info(
+    title="ELearning API",
+    default_version='v1',
+    description="API documentation for ELearning project",
+    terms_of_service="https://www.google.com/policies/terms/",
+    contact=openapi.Contact(email="abishs@me.com"),
+    license=openapi.License(name="BSD License"),
+)
+
+# URL suffix -> (codec, content type)
+SCHEMA_FORMATS = {
+    '.json': (OpenAPICodecJson, 'application/json'),
+    '.yaml': (OpenAPICodecYaml, 'application/yaml'),
+}
+
+# Directories whose Python sources determine the schema
+SCHEMA_SOURCE_DIRS = ('core', 'elearning_project')
+
+SchemaArtifact = namedtuple('SchemaArtifact', ['compressed', 'content', 'content_type', 'version'])
+
+_artifacts = {}
+_lock = threading.Lock()
+
+
+@lru_cache(maxsize=None)
+def code_version():
+    """
+    Returns a short hash of the project's Python sources and the drf_yasg version, so a
+    schema artifact is reused exactly as long as the code it describes is unchanged.
+    """
+    digest = hashlib.sha1(drf_yasg.__version__.encode(), usedforsecurity=False)
+    base_dir = Path(settings.BASE_DIR)
+    for directory in SCHEMA_SOURCE_DIRS:
+        for path in sorted((base_dir / directory).rglob('*.py')):
+            digest.update(str(path.relative_to(base_dir)).encode())
+            digest.update(path.read_bytes())
+    return digest.hexdigest()[:16]
+
+
+def schema_path(version, suffix):
+    return Path(settings.OPENAPI_SCHEMA_DIR) / f'schema-{version}{suffix}.gz'
+
+
+def build_schemas():
+    """
+    Introspects every API view once and returns the gzip-compressed schema per format.
+    """
+    schema = OpenAPISchemaGenerator(API_INFO).get_schema(request=None, public=True)
+    return {
+        suffix: gzip.compress(codec(validators=[]).encode(schema), mtime=0)
+        for suffix, (codec, content_type) in SCHEMA_FORMATS.items()
+    }
+
+
+def write_schemas():
+    """
+    Generates the schema artifacts for the current code version into OPENAPI_SCHEMA_DIR
+    and the cache, returning the written paths.
+    """
+    version = code_version()
+    paths = []
+    for suffix, compressed in build_schemas().items():
+        path = schema_path(version, suffix)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(compressed)
+        cache.set(f'openapi:{version}{suffix}', compressed, None)
+        paths.append(path)
+    return paths
+
+
+def _load_compressed(version, suffix):
+    path = schema_path(version, suffix)
+    if path.exists():
+        return path.read_bytes()
+
+    # Another worker may already have generated this version
+    compressed = cache.get(f'openapi:{version}{suffix}')
+    if compressed is None:
+        for built_suffix, built in build_schemas().items():
+            cache.set(f'openapi:{version}{built_suffix}', built, None)
+            if built_suffix == suffix:
+                compressed = built
+    return compressed
+
+
+def get_schema_artifact(suffix):
+    """
+    Returns the schema of the current code version in one format, held in memory after first use.
+
+    Lookups fall back from memory to the artifact file written by `generate_openapi_schema`,
+    then to the shared cache, and only then generate the schema.
+    """
+    version = code_version()
+    artifact = _artifacts.get((version, suffix))
+    if artifact is None:
+        with _lock:
+            artifact = _artifacts.get((version, suffix))
+            if artifact is None:
+                compressed = _load_compressed(version, suffix)
+                artifact = SchemaArtifact(
+                    compressed, gzip.decompress(compressed), SCHEMA_FORMATS[suffix][1], version,
+                )
+                _artifacts[(version, suffix)] = artifact
+    return artifact
+
+
+def schema_etag(artifact, encoding):
+    return make_etag('openapi', artifact.version, artifact.content_type, encoding)
@@ -0,0 +1,27 @@
+# pagination.py
+
+from django.conf import settings
+from rest_framework.pagination import CursorPagination
+
+
+class StableCursorPagination(CursorPagination):
+    """
+    Cursor pagination for the router viewsets.
+
+    Each viewset declares a `cursor_ordering` backed by a database index; the pagination
+    then seeks from the last returned position instead of counting or offsetting, so the
+    cost of a page does not grow with the size of the table.
+    """
+    ordering = '-id'
+    page_size = getattr(settings, 'API_PAGE_SIZE', 50)
+    page_size_query_param = 'page_size'
+    max_page_size = getattr(settings, 'API_MAX_PAGE_SIZE', 200)
+
+    def get_ordering(self, request, queryset, view):
+        """
+        Uses the ordering declared on the viewset, falling back to the newest primary key first.
+        """
+        ordering = getattr(view, 'cursor_ordering', self.ordering)
+        if isinstance(ordering, str):
+            return (ordering,)
+        return tuple(ordering)
@@ -0,0 +1,209 @@
+# pooling.py
+
+import collections
+import threading
+import time
+
+# Pools by database alias, for the metrics endpoint
+POOLS = {}
+
+# Counters reported by ConnectionPool.stats()
+POOL_COUNTERS = ('requests', 'waits', 'timeouts', 'connections_opened', 'connections_closed', 'health_check_failures')
+
+
+class PoolTimeout(Exception):
+    """
+    Raised when no connection became available within the pool's timeout.
+    """
+
+
+class ConnectionPool:
+    """
+    A bounded pool of DB-API connections shared by all threads of a process.
+
+    At most `max_size` connections are open at once; a caller finding them all in use waits up
+    to `timeout` seconds for one to be returned. Idle connections are closed after `max_idle`
+    seconds and every connection after `max_lifetime` seconds, so the database can rebalance.
+    A connection idle for more than `check_interval` seconds is passed to `check` before being
+    handed out, and `reset` is applied to every returned connection (e.g. to roll back an
+    unfinished transaction); a failure of either discards the connection.
+    """
+    def __init__(self, connect, max_size=10, timeout=5.0, max_idle=300.0, max_lifetime=3600.0,
+                 check=None, check_interval=10.0, reset=None):
+        self.connect = connect
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self.max_lifetime = max_lifetime
+        self.check = check
+        self.check_interval = check_interval
+        self.reset = reset
+        self.idle = collections.deque()  # (connection, returned at); most recently returned on the right
+        self.opened_at = {}  # id(connection) -> time it was opened, for open connections
+        self.size = 0  # Open connections, idle or in use, plus those being opened
+        self.counters = dict.fromkeys(POOL_COUNTERS, 0)
+        self.wait_time = 0.0
+        self.condition = threading.Condition()
+        self.closed = False
+
+    def getconn(self):
+        """
+        Returns an idle connection, a new one while fewer than `max_size` are open, or the first
+        one returned within `timeout` seconds. Raises PoolTimeout otherwise.
+        """
+        started = time.monotonic()
+        deadline = started + self.timeout
+        with self.condition:
+            self.counters['requests'] += 1
+        while True:
+            connection, idle_for = self._reserve(deadline, started)
+            if connection is None:
+                return self._open()
+            if self.check is None or idle_for < self.check_interval or self._passes_check(connection):
+                return connection
+            with self.condition:
+                self.counters['health_check_failures'] += 1
+            self._discard(connection)
+
+    def _reserve(self, deadline, started):
+        """
+        Takes an idle connection, returning it with the seconds it was idle, or reserves room
+        for a new one, returning (None, None).
+        """
+        waited = False
+        stale = []
+        try:
+            with self.condition:
+                try:
+                    while True:
+                        stale += self._take_stale()
+                        if self.idle:
+                            connection, returned_at = self.idle.pop()
+                            return connection, time.monotonic() - returned_at
+                        if self.size < self.max_size:
+                            self.size += 1
+                            return None, None
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            self.counters['timeouts'] += 1
+                            raise PoolTimeout(f"No database connection became available within {self.timeout}s.")
+                        if not waited:
+                            waited = True
+                            self.counters['waits'] += 1
+                        self.condition.wait(remaining)
+                finally:
+                    if waited:
+                        self.wait_time += time.monotonic() - started
+        finally:
+            self._close_all(stale)
+
+    def _take_stale(self):
+        """
+        Removes idle connections past `max_idle` or `max_lifetime` from the pool and returns them.
+        Must be called with the condition held.
+        """
+        now = time.monotonic()
+        stale = [
+            connection for connection, returned_at in self.idle
+            if now - returned_at >= self.max_idle or now - self.opened_at[id(connection)] >= self.max_lifetime
+        ]
+        if stale:
+            stale_ids = {id(connection) for connection in stale}
+            self.idle = collections.deque(
+                (connection, returned_at) for connection, returned_at in self.idle if id(connection) not in stale_ids
+            )
+            for connection in stale:
+                self._forget(connection)
+        return stale
+
+    def _open(self):
+        try:
+            connection = self.connect()
+        except Exception:
+            with self.condition:
+                self.size -= 1
+                self.condition.notify()
+            raise
+        with self.condition:
+            self.opened_at[id(connection)] = time.monotonic()
+            self.counters['connections_opened'] += 1
+        return connection
+
+    def _passes_check(self, connection):
+        try:
+            return self.check(connection) is not False
+        except Exception:
+            return False
+
+    def putconn(self, connection, discard=False):
+        """
+        Returns a connection to the pool, or closes it if `discard` is set, the reset fails, it
+        outlived `max_lifetime` or the pool is closed.
+        """
+        if not discard and self.reset is not None:
+            try:
+                self.reset(connection)
+            except Exception:
+                discard = True
+        with self.condition:
+            opened_at = self.opened_at.get(id(connection))
+            if opened_at is None:
+                return  # Not ours, or already discarded
+            if discard or self.closed or time.monotonic() - opened_at >= self.max_lifetime:
+                self._forget(connection)
+            else:
+                self.idle.append((connection, time.monotonic()))
+                self.condition.notify()
+                return
+        self._close_all([connection])
+
+    def _discard(self, connection):
+        with self.condition:
+            self._forget(connection)
+        self._close_all([connection])
+
+    def _forget(self, connection):
+        """
+        Stops counting a connection as open. Must be called with the condition held.
+        """
+        self.opened_at.pop(id(connection), None)
+        self.size -= 1
+        self.counters['connections_closed'] += 1
+        self.condition.notify()
+
+    def _close_all(self, connections):
+        for connection in connections:
+            try:
+                connection.close()
+            except Exception:
+                pass
+
+    def close(self):
+        """
+        Closes the idle connections; connections in use are closed when returned.
+        """
+        with self.condition:
+            self.closed = True
+            idle = [connection for connection, _ in self.idle]
+            self.idle.clear()
+            for connection in idle:
+                self._forget(connection)
+        self._close_all(idle)
+
+    def stats(self):
+        with self.condition:
+            return {
+                'max_size': self.max_size,
+                'size': self.size,
+                'idle': len(self.idle),
+                'in_use': self.size - len(self.idle),
+                **self.counters,
+                'wait_time_ms': round(self.wait_time * 1000, 1),
+            }
+
+
+def get_pool_metrics():
+    """
+    Returns the statistics of this process's connection pools by database alias.
+    """
+    return {alias: pool.stats() for alias, pool in POOLS.items()}
@@ -0,0 +1,182 @@
+# recommendations.py
+
+import itertools
+import logging
+
+import numpy as np
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Q
+
+from .conditional import bump_version
+from .models import Course, CourseNeighbor, Enrollment
+from .routing import RECOMMENDATION_CHANNEL
+
+logger = logging.getLogger(__name__)
+
+RECOMMENDATION_NEIGHBORS = getattr(settings, 'RECOMMENDATION_NEIGHBORS', 10)
+
+# Students in more courses than this are left out of the batch build: each adds courses^2 pairs
+# while saying little about any single pair
+RECOMMENDATION_MAX_STUDENT_COURSES = getattr(settings, 'RECOMMENDATION_MAX_STUDENT_COURSES', 200)
+
+
+def group_ranges(lengths):
+    """
+    Returns 0..n-1 for every n in `lengths`, concatenated, e.g. [2, 3] -> [0, 1, 0, 1, 2].
+    """
+    return np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+
+
+def co_enrollment_pairs(students, courses):
+    """
+    Returns the upper triangle of the item-item co-occurrence matrix X^T X, where X is the binary
+    student x course matrix given as parallel arrays of enrollments, as (course, other, count).
+
+    Pairs are expanded per student, so work and memory grow with the sum of each student's
+    course count squared rather than with the number of courses squared.
+    """
+    order = np.lexsort((courses, students))
+    students, courses = students[order], courses[order]
+    starts = np.flatnonzero(np.r_[True, students[1:] != students[:-1]])
+    lengths = np.diff(np.r_[starts, len(students)])
+    kept = (lengths > 1) & (lengths <= RECOMMENDATION_MAX_STUDENT_COURSES)
+    starts, lengths = starts[kept], lengths[kept]
+
+    # Pair every enrollment of a student with each later enrollment of the same student
+    members = np.repeat(starts, lengths) + group_ranges(lengths)
+    later = np.repeat(lengths, lengths) - group_ranges(lengths) - 1
+    left = np.repeat(members, later)
+    right = left + 1 + group_ranges(later)
+
+    keys = courses[left] * (courses.max() + 1) + courses[right]
+    keys, counts = np.unique(keys, return_counts=True)
+    return keys // (courses.max() + 1), keys % (courses.max() + 1), counts
+
+
+def top_neighbors(students, courses, k=RECOMMENDATION_NEIGHBORS):
+    """
+    Returns the `k` most similar courses of every course as parallel arrays
+    (course id, neighbor id, cosine similarity, co-enrollments), best first per course.
+    """
+    course_ids, course_index = np.unique(courses, return_inverse=True)
+    if not len(course_ids):
+        return np.array([], dtype=np.int64), np.array([], dtype=np.int64), np.array([]), np.array([], dtype=np.int64)
+    sizes = np.bincount(course_index)
+    first, second, counts = co_enrollment_pairs(students, course_index)
+    first, second, counts = np.r_[first, second], np.r_[second, first], np.r_[counts, counts]
+    scores = counts / np.sqrt(sizes[first].astype(np.float64) * sizes[second])
+
+    order = np.lexsort((-counts, -scores, first))
+    first, second, scores, counts = first[order], second[order], scores[order], counts[order]
+    starts = np.flatnonzero(np.r_[True, first[1:] != first[:-1]])
+    rank = group_ranges(np.diff(np.r_[starts, len(first)]))
+    best = rank < k
+    return course_ids[first[best]], course_ids[second[best]], scores[best], counts[best]
+
+
+def load_enrollments():
+    """
+    Returns the (student ids, course ids) of all enrollments as two arrays, streamed from the
+    database without building a Python tuple per row.
+    """
+    rows = Enrollment.objects.values_list('student_id', 'course_id').order_by().iterator(chunk_size=10000)
+    pairs = np.fromiter(itertools.chain.from_iterable(rows), dtype=np.int64).reshape(-1, 2)
+    return pairs[:, 0], pairs[:, 1]
+
+
+def build_recommendations(k=RECOMMENDATION_NEIGHBORS):
+    """
+    Recomputes the neighbors of every course from all enrollments and replaces the stored ones.
+
+    Returns the number of neighbor rows stored.
+    """
+    students, courses = load_enrollments()
+    course_ids, neighbor_ids, scores, counts = top_neighbors(students, courses, k)
+    with transaction.atomic():
+        affected = set(CourseNeighbor.objects.values_list('course_id', flat=True).distinct())
+        CourseNeighbor.objects.all().delete()
+        CourseNeighbor.objects.bulk_create(
+            [
+                CourseNeighbor(course_id=course_id, neighbor_id=neighbor_id, score=score, co_enrollments=count)
+                for course_id, neighbor_id, score, count in zip(
+                    course_ids.tolist(), neighbor_ids.tolist(), scores.tolist(), counts.tolist(),
+                )
+            ],
+            batch_size=5000,
+        )
+    for course_id in affected.union(course_ids.tolist()):
+        bump_version('course_page', course_id)
+    return len(course_ids)
+
+
+def refresh_course_neighbors(course_ids, k=RECOMMENDATION_NEIGHBORS):
+    """
+    Recomputes the neighbors of a few courses with one co-enrollment count query each.
+
+    Unlike the batch build, every student counts; the next batch build evens this out.
+    """
+    for course_id in course_ids:
+        students = Enrollment.objects.filter(course_id=course_id).values('student_id')
+        co_enrollments = dict(
+            Enrollment.objects.filter(student_id__in=students).exclude(course_id=course_id)
+            .values('course_id').annotate(count=Count('id')).values_list('course_id', 'count').order_by()
+        )
+        neighbors = []
+        if co_enrollments:
+            sizes = dict(
+                Enrollment.objects.filter(course_id__in=[course_id, *co_enrollments])
+                .values('course_id').annotate(count=Count('id')).values_list('course_id', 'count').order_by()
+            )
+            neighbor_ids = np.fromiter(co_enrollments, dtype=np.int64)
+            counts = np.fromiter(co_enrollments.values(), dtype=np.int64)
+            neighbor_sizes = np.array([sizes[neighbor_id] for neighbor_id in neighbor_ids.tolist()], dtype=np.float64)
+            scores = counts / np.sqrt(sizes[course_id] * neighbor_sizes)
+            for index in np.lexsort((-counts, -scores))[:k].tolist():
+                neighbors.append(CourseNeighbor(
+                    course_id=course_id, neighbor_id=int(neighbor_ids[index]),
+                    score=float(scores[index]), co_enrollments=int(counts[index]),
+                ))
+        with transaction.atomic():
+            CourseNeighbor.objects.filter(course_id=course_id).delete()
+            CourseNeighbor.objects.bulk_create(neighbors)
+        bump_version('course_page', course_id)
+
+
+def refresh_after_enrollment_change(course_id, student_id=None):
+    """
+    Refreshes the neighbors of a course whose enrollments changed and of the student's other
+    courses, whose co-enrollments with it changed too.
+    """
+    courses = Q(pk=course_id)
+    if student_id is not None:
+        courses |= Q(enrollments__student_id=student_id)
+    refresh_course_neighbors(Course.objects.filter(courses).values_list('pk', flat=True).distinct())
+
+
+def schedule_refresh(course_id, student_id=None):
+    """
+    Asks the background worker to refresh the neighbors affected by an enrollment change once
+    the current transaction commits. If the worker cannot be reached the change is left to the
+    next batch build rather than slowing down the request.
+    """
+    def send():
+        try:
+            async_to_sync(get_channel_layer().send)(
+                RECOMMENDATION_CHANNEL, {'type': 'refresh.neighbors', 'course_id': course_id, 'student_id': student_id},
+            )
+        except Exception:
+            logger.exception("Could not queue a course recommendation refresh.")
+    transaction.on_commit(send)
+
+
+def recommended_courses(course, user=None, limit=RECOMMENDATION_NEIGHBORS):
+    """
+    Returns the stored neighbors of a course, best first, leaving out courses the user is already enrolled in.
+    """
+    neighbors = CourseNeighbor.objects.filter(course=course).select_related('neighbor').order_by('-score', '-co_enrollments')
+    if user is not None and user.is_authenticated:
+        neighbors = neighbors.exclude(neighbor__enrollments__student=user)
+    return neighbors[:limit]
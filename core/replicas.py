@@ -0,0 +1,119 @@
+# replicas.py
+
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DatabaseError, DEFAULT_DB_ALIAS, connections
+
+# Set while the current request (or block) may read from a replica: {'alias': <chosen replica or None>}
+_read_state = ContextVar('replica_read_state', default=None)
+
+# Replica alias -> (monotonic time of the last lag check, whether the replica was within REPLICA_MAX_LAG)
+_health = {}
+
+REPLICA_PIN_COOKIE = 'primary_until'
+
+
+def pin_cache_key(user_id):
+    """
+    Returns the cache key pinning a user's reads to the primary, for clients that keep no cookies.
+    """
+    return f'replica:pin:{user_id}'
+
+
+# Seconds since the last replayed transaction, or 0 when the replica has replayed everything it received
+POSTGRES_LAG_SQL = """
+    SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+                ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END
+"""
+
+
+def measure_lag(alias):
+    """
+    Returns how many seconds a replica is behind the primary. Only PostgreSQL replicas can lag;
+    other databases (e.g. a local SQLite copy) report 0.
+    """
+    connection = connections[alias]
+    if connection.vendor != 'postgresql':
+        return 0.0
+    with connection.cursor() as cursor:
+        cursor.execute(POSTGRES_LAG_SQL)
+        lag, = cursor.fetchone()
+    return float(lag or 0)
+
+
+def replica_healthy(alias):
+    """
+    Returns whether a replica answers and lags at most REPLICA_MAX_LAG seconds, measuring it at
+    most every REPLICA_CHECK_INTERVAL seconds per process.
+    """
+    checked_at, healthy = _health.get(alias, (None, False))
+    if checked_at is None or time.monotonic() - checked_at >= settings.REPLICA_CHECK_INTERVAL:
+        try:
+            healthy = measure_lag(alias) <= settings.REPLICA_MAX_LAG
+        except DatabaseError:
+            healthy = False
+        _health[alias] = (time.monotonic(), healthy)
+    return healthy
+
+
+def choose_replica():
+    """
+    Returns a random healthy replica alias, or None when there is none.
+    """
+    healthy = [alias for alias in settings.DATABASE_REPLICAS if replica_healthy(alias)]
+    return random.choice(healthy) if healthy else None
+
+
+def read_database():
+    """
+    Returns the replica the current reads should use, or None for the primary.
+
+    A request sticks to the replica chosen for its first read, so its queries see one consistent
+    snapshot; reads inside a transaction on the primary stay there.
+    """
+    state = _read_state.get()
+    if state is None or not settings.DATABASE_REPLICAS or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+        return None
+    if 'alias' not in state:
+        state['alias'] = choose_replica()
+    return state['alias']
+
+
+@contextmanager
+def replica_reads(enabled=True):
+    """
+    Lets the reads inside the block go to a replica, e.g. to load chat history outside a request.
+    """
+    token = _read_state.set({} if enabled else None)
+    try:
+        yield
+    finally:
+        _read_state.reset(token)
+
+
+class ReplicaRouter:
+    """
+    Sends reads to a replica where replica_reads() allows it, and everything else to the primary.
+
+    Related objects are read from the database their instance came from; replicas receive their
+    schema through replication, so migrations only run on the primary.
+    """
+    def db_for_read(self, model, **hints):
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db:
+            return instance._state.db
+        return read_database()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True  # Replicas hold the same data as the primary
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return False if db in settings.DATABASE_REPLICAS else None
+
@@ -0,0 +1,129 @@
+# rollups.py
+
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate, TruncWeek
+from django.utils import timezone
+
+from .models import CourseDailyStats, Enrollment, Feedback, Material
+
+# Daily counters kept per course
+ROLLUP_METRICS = ('enrollments', 'unenrollments', 'blocks', 'feedback', 'materials')
+
+ROLLUP_INTERVALS = ('day', 'week')
+
+ROLLUP_MAX_DAYS = 731  # Longest range a single read may cover
+
+
+def record_activity(course_id, metric, day=None, amount=1):
+    """
+    Adds `amount` to one daily counter of a course, creating the day's row on first use.
+
+    The increment happens in the database, so concurrent writers never lose counts.
+    """
+    day = day or timezone.localdate()
+    rows = CourseDailyStats.objects.filter(course_id=course_id, day=day)
+    if rows.update(**{metric: F(metric) + amount}):
+        return
+    try:
+        with transaction.atomic():
+            CourseDailyStats.objects.create(course_id=course_id, day=day, **{metric: amount})
+    except IntegrityError:
+        rows.update(**{metric: F(metric) + amount})  # Created by a concurrent writer in the meantime
+
+
+def period_starts(start, end, interval):
+    if interval == 'week':
+        start -= timedelta(days=start.weekday())
+    step = timedelta(days=7 if interval == 'week' else 1)
+    while start <= end:
+        yield start
+        start += step
+
+
+def get_course_timeseries(course_ids, start, end, interval='day'):
+    """
+    Returns the counters of one or more courses summed per day or per week (starting on Monday)
+    between `start` and `end` inclusive, with empty periods filled with zeros.
+    """
+    rows = CourseDailyStats.objects.filter(course_id__in=course_ids, day__range=(start, end))
+    period = TruncWeek('day') if interval == 'week' else F('day')
+    rows = rows.annotate(period=period).values('period').annotate(
+        **{metric: Sum(metric) for metric in ROLLUP_METRICS}
+    ).order_by()
+    totals = {row['period']: row for row in rows}
+
+    series = []
+    for period_start in period_starts(start, end, interval):
+        row = totals.get(period_start, {})
+        series.append({'start': period_start.isoformat(), **{metric: row.get(metric) or 0 for metric in ROLLUP_METRICS}})
+    return {
+        'interval': interval,
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'totals': {metric: sum(point[metric] for point in series) for metric in ROLLUP_METRICS},
+        'series': series,
+    }
+
+
+def get_recent_totals(course_ids, days=30):
+    """
+    Returns {course_id: {metric: count}} over the last `days` days, from a single query.
+    """
+    since = timezone.localdate() - timedelta(days=days - 1)
+    rows = CourseDailyStats.objects.filter(course_id__in=course_ids, day__gte=since).values('course_id').annotate(
+        **{metric: Sum(metric) for metric in ROLLUP_METRICS}
+    ).order_by()
+    totals = {course_id: dict.fromkeys(ROLLUP_METRICS, 0) for course_id in course_ids}
+    for row in rows:
+        totals[row.pop('course_id')] = row
+    return totals
+
+
+def backfill_course_stats(course_ids=None):
+    """
+    Rebuilds the enrollment, block, feedback and material counters from the source tables.
+
+    Unenrollments leave no trace in the source tables, so their recorded counts are kept. Blocks
+    are dated by the last change of each blocked enrollment, the closest record there is.
+
+    Returns the number of course days written.
+    """
+    sources = {
+        'enrollments': (Enrollment.objects.all(), 'enrolled_on'),
+        'blocks': (Enrollment.objects.filter(blocked=True), 'updated_at'),
+        'feedback': (Feedback.objects.all(), 'created_at'),
+        'materials': (Material.objects.all(), 'created_at'),
+    }
+    counts = defaultdict(dict)
+    for metric, (queryset, field) in sources.items():
+        if course_ids is not None:
+            queryset = queryset.filter(course_id__in=course_ids)
+        rows = queryset.annotate(day=TruncDate(field)).values('course_id', 'day').annotate(count=Count('id')).order_by()
+        for row in rows:
+            counts[row['course_id'], row['day']][metric] = row['count']
+
+    metrics = list(sources)
+    with transaction.atomic():
+        stats = CourseDailyStats.objects.select_for_update()
+        if course_ids is not None:
+            stats = stats.filter(course_id__in=course_ids)
+        existing = {(row.course_id, row.day): row for row in stats}
+        for row in existing.values():
+            for metric in metrics:
+                setattr(row, metric, 0)
+
+        created = []
+        for (course_id, day), values in counts.items():
+            row = existing.get((course_id, day))
+            if row is None:
+                row = CourseDailyStats(course_id=course_id, day=day)
+                created.append(row)
+            for metric, count in values.items():
+                setattr(row, metric, count)
+        CourseDailyStats.objects.bulk_update(existing.values(), metrics, batch_size=1000)
+        CourseDailyStats.objects.bulk_create(created, batch_size=1000)
+    return len(counts)
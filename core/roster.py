@@ -0,0 +1,196 @@
+# roster.py
+
+import os
+from zipfile import BadZipFile
+
+import pandas as pd
+from django.conf import settings
+from django.db import transaction
+from openpyxl import load_workbook
+from openpyxl.utils.exceptions import InvalidFileException
+
+from .conditional import bump_version
+from .dashboard import invalidate_dashboard
+from .feed import backfill_timelines
+from .models import CustomUser, Enrollment, Notification
+from .recommendations import schedule_refresh
+from .rollups import record_activity
+
+ROSTER_CHUNK_SIZE = getattr(settings, 'ROSTER_CHUNK_SIZE', 5000)
+ROSTER_MAX_REPORTED_ERRORS = getattr(settings, 'ROSTER_MAX_REPORTED_ERRORS', 1000)
+ROSTER_USERNAME_COLUMN = 'username'
+
+
+class RosterError(Exception):
+    """
+    Raised when a roster file cannot be read at all (unsupported type, malformed CSV or missing
+    username column).
+    """
+
+
+def _csv_chunks(file, chunk_size):
+    """
+    Yields lists of (row_number, username) from a CSV file, reading chunk_size rows at a time.
+
+    Only the username column is parsed, so trailing delimiters and ragged rows are tolerated and
+    never turn the first column into an index. A UTF-8 byte order mark is dropped and bytes that
+    are not UTF-8 are replaced, so their rows are reported instead of failing the file. Blank
+    lines are kept, so row numbers match the file.
+    """
+    try:
+        reader = pd.read_csv(
+            file, chunksize=chunk_size, dtype=str, keep_default_na=False, skipinitialspace=True,
+            usecols=lambda column: str(column).strip().lower() == ROSTER_USERNAME_COLUMN,
+            index_col=False, skip_blank_lines=False, encoding='utf-8-sig', encoding_errors='replace',
+        )
+        row_number = 2  # Data rows start on line 2, after the header
+        for frame in reader:
+            columns = {str(column).strip().lower(): column for column in frame.columns}
+            if ROSTER_USERNAME_COLUMN not in columns:
+                raise RosterError("The roster has no 'username' column.")
+            usernames = frame[columns[ROSTER_USERNAME_COLUMN]].str.strip()
+            yield list(zip(range(row_number, row_number + len(frame)), usernames.tolist()))
+            row_number += len(frame)
+    except pd.errors.EmptyDataError:
+        raise RosterError("The roster is empty.")
+    except pd.errors.ParserError:
+        raise RosterError("The roster is not a valid CSV file.")
+
+
+def _xlsx_chunks(file, chunk_size):
+    """
+    Yields lists of (row_number, username) from the first sheet of an XLSX file in read-only mode.
+    """
+    try:
+        workbook = load_workbook(file, read_only=True, data_only=True)
+    except (InvalidFileException, BadZipFile):
+        raise RosterError("The roster is not a valid XLSX file.")
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = [str(value or '').strip().lower() for value in next(rows, ())]
+        if ROSTER_USERNAME_COLUMN not in header:
+            raise RosterError("The roster has no 'username' column.")
+        position = header.index(ROSTER_USERNAME_COLUMN)
+
+        chunk = []
+        for row_number, row in enumerate(rows, start=2):
+            value = row[position] if position < len(row) else None
+            chunk.append((row_number, str(value).strip() if value is not None else ''))
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+    finally:
+        workbook.close()
+
+
+def read_roster_chunks(file, filename, chunk_size=ROSTER_CHUNK_SIZE):
+    """
+    Streams a CSV or XLSX roster as chunks of (row_number, username) pairs.
+
+    Args:
+        file: A binary file-like object.
+        filename (str): The original file name, used to pick the parser.
+        chunk_size (int): The number of rows per chunk.
+    """
+    extension = os.path.splitext(filename or '')[1].lower()
+    if extension == '.csv':
+        return _csv_chunks(file, chunk_size)
+    if extension in ('.xlsx', '.xlsm'):
+        return _xlsx_chunks(file, chunk_size)
+    raise RosterError("Only .csv and .xlsx rosters are supported.")
+
+
+def _import_chunk(course, chunk, seen, report):
+    """
+    Resolves one chunk of usernames in a single query and enrolls the valid students in bulk.
+    """
+    usernames = {username for _, username in chunk if username}
+    users = CustomUser.objects.filter(username__in=usernames).values_list('username', 'id', 'is_student')
+    students = {username: user_id for username, user_id, _ in users}
+    non_students = {username for username, _, is_student in users if not is_student}
+
+    student_ids = []
+    for row_number, username in chunk:
+        if not username:
+            error = "Username is blank."
+        elif '\ufffd' in username:
+            error = "Username is not valid UTF-8."
+        elif username not in students:
+            error = "No user with this username."
+        elif username in non_students:
+            error = "User is not a student."
+        elif username in seen:
+            error = "Duplicate of an earlier row."
+        else:
+            seen.add(username)
+            student_ids.append(students[username])
+            continue
+        report['error_count'] += 1
+        if len(report['errors']) < ROSTER_MAX_REPORTED_ERRORS:
+            report['errors'].append({'row': row_number, 'username': username, 'error': error})
+
+    if not student_ids:
+        return
+
+    already_enrolled = set(
+        Enrollment.objects.filter(course=course, student_id__in=student_ids).values_list('student_id', flat=True)
+    )
+    new_ids = [student_id for student_id in student_ids if student_id not in already_enrolled]
+    # ignore_conflicts keeps concurrent enrollments from failing the chunk on the (student, course) constraint
+    Enrollment.objects.bulk_create(
+        [Enrollment(student_id=student_id, course=course) for student_id in new_ids],
+        ignore_conflicts=True,
+    )
+    report['enrolled'] += len(new_ids)
+    report['already_enrolled'] += len(already_enrolled)
+
+    # bulk_create skips model signals, so invalidate what the enrollment handlers would have
+    invalidate_dashboard(*new_ids)
+    if new_ids:
+        record_activity(course.pk, 'enrollments', amount=len(new_ids))
+        schedule_refresh(course.pk)
+        backfill_timelines(new_ids, course.pk)
+
+
+def import_roster(course, file, filename, chunk_size=ROSTER_CHUNK_SIZE):
+    """
+    Enrolls every student listed in a CSV or XLSX roster into a course.
+
+    The file is streamed in chunks; each chunk resolves its usernames in one batch and is
+    enrolled with a single bulk insert. The teacher receives one summary notification.
+
+    Args:
+        course (Course): The course to enroll students into.
+        file: A binary file-like object holding the roster.
+        filename (str): The original file name (.csv or .xlsx).
+        chunk_size (int): The number of rows handled per batch.
+
+    Returns:
+        dict: Row, enrollment and error counts, plus up to ROSTER_MAX_REPORTED_ERRORS per-row errors.
+
+    Raises:
+        RosterError: If the file type is unsupported, the CSV is malformed or the username column
+            is missing. Chunks before a malformed CSV line have already been imported.
+    """
+    report = {'rows': 0, 'enrolled': 0, 'already_enrolled': 0, 'error_count': 0, 'errors': []}
+    seen = set()
+
+    for chunk in read_roster_chunks(file, filename, chunk_size):
+        report['rows'] += len(chunk)
+        with transaction.atomic():
+            _import_chunk(course, chunk, seen, report)
+
+    if report['enrolled']:
+        bump_version('enrollment')
+        bump_version('course_page', course.pk)
+
+    Notification.objects.create(
+        user=course.teacher,
+        content=(
+            f"Roster import for {course.title}: {report['enrolled']} students enrolled, "
+            f"{report['already_enrolled']} already enrolled, {report['error_count']} rows with errors."
+        ),
+    )
+    return report
@@ -4,3 +4,13 @@ from . import consumers
 websocket_urlpatterns = [
     re_path(r'ws/chat/(?P<room_name>\w+)/$', consumers.EchoConsumer.as_asgi()),
 ]
+
+# Channels consumed by the background worker: python manage.py runworker thumbnails recommendations
+THUMBNAIL_CHANNEL = 'thumbnails'
+RECOMMENDATION_CHANNEL = 'recommendations'
+
+# Background workers, reached with channel_layer.send(<channel>, message)
+channel_routes = {
+    THUMBNAIL_CHANNEL: consumers.ThumbnailConsumer.as_asgi(),
+    RECOMMENDATION_CHANNEL: consumers.RecommendationConsumer.as_asgi(),
+}
@@ -0,0 +1,319 @@
+# search.py
+
+import re
+from collections import namedtuple
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Exists, OuterRef, Q
+
+from .models import Course, CustomUser, Enrollment
+
+SEARCH_PAGE_SIZE = getattr(settings, 'SEARCH_PAGE_SIZE', 20)
+SEARCH_MAX_PAGE_SIZE = getattr(settings, 'SEARCH_MAX_PAGE_SIZE', 100)
+
+# SQLite full-text table mirroring the searchable user columns (rowid is the user id)
+USER_SEARCH_TABLE = 'core_customuser_search'
+
+# Must stay identical to the expression of the GIN index created in migration 0002,
+# otherwise Postgres falls back to a sequential scan
+PG_USER_SEARCH_VECTOR = (
+    "(setweight(to_tsvector('simple', coalesce(u.username, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(u.first_name, '') || ' ' || coalesce(u.last_name, '')), 'B'))"
+)
+
+# Course search documents, one row per course: a weighted tsvector on Postgres, an FTS5 row on SQLite
+COURSE_SEARCH_TABLE = 'core_course_search'
+
+# Titles weigh most, then material titles, then descriptions. Words are indexed unstemmed ('simple' on
+# Postgres, unicode61 without porter on SQLite, see migration 0013): stemming the prefix of a partially
+# typed word ("learni") would stop it from matching ("learning").
+PG_COURSE_DOCUMENT_SQL = (
+    "INSERT INTO core_course_search (course_id, document) "
+    "SELECT c.id, "
+    "setweight(to_tsvector('simple', coalesce(c.title, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(string_agg(m.title, ' '), '')), 'B') || "
+    "setweight(to_tsvector('simple', coalesce(c.description, '')), 'C') "
+    "FROM core_course c LEFT JOIN core_material m ON m.course_id = c.id "
+    "{where} GROUP BY c.id "
+    "ON CONFLICT (course_id) DO UPDATE SET document = EXCLUDED.document"
+)
+SQLITE_COURSE_DOCUMENT_SQL = (
+    "INSERT INTO core_course_search (rowid, title, materials, description) "
+    "SELECT c.id, c.title, coalesce(group_concat(m.title, ' '), ''), c.description "
+    "FROM core_course c LEFT JOIN core_material m ON m.course_id = c.id "
+    "{where} GROUP BY c.id"
+)
+
+SearchPage = namedtuple('SearchPage', ['results', 'page', 'has_next'])
+
+
+def tokenize(query):
+    """
+    Splits a search query into lowercase alphanumeric terms, dropping punctuation and underscores.
+    """
+    return [term.lower() for term in re.findall(r'[^\W_]+', query or '')]
+
+
+def clamp_page(page, page_size):
+    """
+    Normalises the requested page number and page size to sane, bounded values.
+    """
+    try:
+        page = max(int(page), 1)
+    except (TypeError, ValueError):
+        page = 1
+    try:
+        page_size = int(page_size) if page_size else SEARCH_PAGE_SIZE
+    except (TypeError, ValueError):
+        page_size = SEARCH_PAGE_SIZE
+    return page, min(max(page_size, 1), SEARCH_MAX_PAGE_SIZE)
+
+
+def fts_prefix_query(terms):
+    """
+    Builds an FTS5 MATCH expression requiring every term, each as a prefix.
+    """
+    return ' AND '.join(f'"{term}"*' for term in terms)
+
+
+def tsquery_prefix_query(terms):
+    """
+    Builds a Postgres tsquery requiring every term, each as a prefix.
+    """
+    return ' & '.join(f'{term}:*' for term in terms)
+
+
+def _fetch_ranked(sql, params, queryset):
+    """
+    Runs a query returning ids in rank order and loads the matching objects in one batch.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        ids = [row[0] for row in cursor.fetchall()]
+    objects = queryset.in_bulk(ids)
+    return [objects[pk] for pk in ids if pk in objects]
+
+
+def _enrolled_with(teacher):
+    """
+    Returns a subquery matching students enrolled in any course of the teacher.
+    """
+    return Exists(Enrollment.objects.filter(student=OuterRef('pk'), course__teacher=teacher))
+
+
+def _search_students_sqlite(terms, teacher, limit, offset):
+    sql = (
+        f"SELECT u.id FROM {USER_SEARCH_TABLE} s "
+        f"INNER JOIN core_customuser u ON u.id = s.rowid "
+        f"WHERE {USER_SEARCH_TABLE} MATCH %s AND u.is_student "
+    )
+    params = [fts_prefix_query(terms)]
+    if teacher is not None:
+        sql += (
+            "AND EXISTS (SELECT 1 FROM core_enrollment e INNER JOIN core_course c ON c.id = e.course_id "
+            "WHERE e.student_id = u.id AND c.teacher_id = %s) "
+        )
+        params.append(teacher.pk)
+    # Usernames weigh twice as much as first and last names
+    sql += f"ORDER BY bm25({USER_SEARCH_TABLE}, 2.0, 1.0, 1.0), u.id LIMIT %s OFFSET %s"
+    return _fetch_ranked(sql, params + [limit, offset], CustomUser.objects.all())
+
+
+def _search_students_postgres(terms, teacher, limit, offset):
+    sql = (
+        f"SELECT u.id FROM core_customuser u, to_tsquery('simple', %s) query "
+        f"WHERE u.is_student AND {PG_USER_SEARCH_VECTOR} @@ query "
+    )
+    params = [tsquery_prefix_query(terms)]
+    if teacher is not None:
+        sql += (
+            "AND EXISTS (SELECT 1 FROM core_enrollment e INNER JOIN core_course c ON c.id = e.course_id "
+            "WHERE e.student_id = u.id AND c.teacher_id = %s) "
+        )
+        params.append(teacher.pk)
+    sql += f"ORDER BY ts_rank({PG_USER_SEARCH_VECTOR}, query) DESC, u.id LIMIT %s OFFSET %s"
+    return _fetch_ranked(sql, params + [limit, offset], CustomUser.objects.all())
+
+
+def _search_students_fallback(terms, teacher, limit, offset):
+    students = CustomUser.objects.filter(is_student=True)
+    for term in terms:
+        students = students.filter(
+            Q(username__istartswith=term) | Q(first_name__istartswith=term) | Q(last_name__istartswith=term)
+        )
+    if teacher is not None:
+        students = students.filter(_enrolled_with(teacher))
+    return list(students.order_by('username')[offset:offset + limit])
+
+
+def search_students(query, teacher=None, page=1, page_size=None):
+    """
+    Searches students by username, first name and last name using the database's full-text index.
+
+    Every query term is matched as a prefix and results are ranked by relevance (Postgres tsvector
+    with a GIN index, SQLite FTS5 locally). An empty query lists students alphabetically.
+
+    Args:
+        query (str): The raw search text.
+        teacher (CustomUser, optional): When given, only students enrolled in this teacher's courses match.
+        page (int): The 1-based page number.
+        page_size (int, optional): Results per page, capped at SEARCH_MAX_PAGE_SIZE.
+
+    Returns:
+        SearchPage: The matching students, the page number and whether another page follows.
+    """
+    page, page_size = clamp_page(page, page_size)
+    offset = (page - 1) * page_size
+    # Fetch one extra row to know whether a next page exists without counting
+    limit = page_size + 1
+    terms = tokenize(query)
+
+    if not terms:
+        students = CustomUser.objects.filter(is_student=True)
+        if teacher is not None:
+            students = students.filter(_enrolled_with(teacher))
+        results = list(students.order_by('username')[offset:offset + limit])
+    elif connection.vendor == 'postgresql':
+        results = _search_students_postgres(terms, teacher, limit, offset)
+    elif connection.vendor == 'sqlite':
+        results = _search_students_sqlite(terms, teacher, limit, offset)
+    else:
+        results = _search_students_fallback(terms, teacher, limit, offset)
+
+    return SearchPage(results[:page_size], page, len(results) > page_size)
+
+
+def index_user(user):
+    """
+    Writes the searchable columns of a user into the SQLite full-text table.
+
+    Postgres indexes the expression directly, so this is a no-op there.
+    """
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {USER_SEARCH_TABLE} WHERE rowid = %s", [user.pk])
+        cursor.execute(
+            f"INSERT INTO {USER_SEARCH_TABLE} (rowid, username, first_name, last_name) VALUES (%s, %s, %s, %s)",
+            [user.pk, user.username, user.first_name or '', user.last_name or ''],
+        )
+
+
+def unindex_user(user_id):
+    """
+    Removes a user from the SQLite full-text table.
+    """
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {USER_SEARCH_TABLE} WHERE rowid = %s", [user_id])
+
+
+def rebuild_user_index():
+    """
+    Repopulates the SQLite full-text table from the user table in a single statement.
+    """
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {USER_SEARCH_TABLE}")
+        cursor.execute(
+            f"INSERT INTO {USER_SEARCH_TABLE} (rowid, username, first_name, last_name) "
+            f"SELECT id, username, coalesce(first_name, ''), coalesce(last_name, '') FROM core_customuser"
+        )
+
+
+def _search_courses_sqlite(terms, queryset, limit, offset):
+    sql = (
+        f"SELECT rowid FROM {COURSE_SEARCH_TABLE} WHERE {COURSE_SEARCH_TABLE} MATCH %s "
+        f"ORDER BY bm25({COURSE_SEARCH_TABLE}, 10.0, 4.0, 1.0), rowid LIMIT %s OFFSET %s"
+    )
+    return _fetch_ranked(sql, [fts_prefix_query(terms), limit, offset], queryset)
+
+
+def _search_courses_postgres(terms, queryset, limit, offset):
+    sql = (
+        f"SELECT s.course_id FROM {COURSE_SEARCH_TABLE} s, to_tsquery('simple', %s) query "
+        f"WHERE s.document @@ query "
+        f"ORDER BY ts_rank(s.document, query) DESC, s.course_id LIMIT %s OFFSET %s"
+    )
+    return _fetch_ranked(sql, [tsquery_prefix_query(terms), limit, offset], queryset)
+
+
+def _search_courses_fallback(terms, queryset, limit, offset):
+    for term in terms:
+        queryset = queryset.filter(
+            Q(title__icontains=term) | Q(description__icontains=term) | Q(materials__title__icontains=term)
+        )
+    return list(queryset.distinct().order_by('title', 'id')[offset:offset + limit])
+
+
+def search_courses(query, page=1, page_size=None, queryset=None):
+    """
+    Searches courses by title, description and the titles of their materials.
+
+    Results are ranked with course titles weighted above material titles, and those above
+    descriptions. An empty query lists courses alphabetically.
+
+    Args:
+        query (str): The raw search text.
+        page (int): The 1-based page number.
+        page_size (int, optional): Results per page, capped at SEARCH_MAX_PAGE_SIZE.
+        queryset (QuerySet, optional): The course queryset results are loaded from, e.g. with joins.
+
+    Returns:
+        SearchPage: The matching courses, the page number and whether another page follows.
+    """
+    page, page_size = clamp_page(page, page_size)
+    offset = (page - 1) * page_size
+    limit = page_size + 1
+    terms = tokenize(query)
+    queryset = Course.objects.all() if queryset is None else queryset
+
+    if not terms:
+        results = list(queryset.order_by('title', 'id')[offset:offset + limit])
+    elif connection.vendor == 'postgresql':
+        results = _search_courses_postgres(terms, queryset, limit, offset)
+    elif connection.vendor == 'sqlite':
+        results = _search_courses_sqlite(terms, queryset, limit, offset)
+    else:
+        results = _search_courses_fallback(terms, queryset, limit, offset)
+
+    return SearchPage(results[:page_size], page, len(results) > page_size)
+
+
+def index_course(course_id):
+    """
+    Recomputes the search document of one course from its title, description and material titles.
+    """
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(PG_COURSE_DOCUMENT_SQL.format(where="WHERE c.id = %s"), [course_id])
+        elif connection.vendor == 'sqlite':
+            cursor.execute(f"DELETE FROM {COURSE_SEARCH_TABLE} WHERE rowid = %s", [course_id])
+            cursor.execute(SQLITE_COURSE_DOCUMENT_SQL.format(where="WHERE c.id = %s"), [course_id])
+
+
+def unindex_course(course_id):
+    """
+    Removes a deleted course from the SQLite full-text table.
+
+    On Postgres the search row is removed by its foreign key cascade.
+    """
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {COURSE_SEARCH_TABLE} WHERE rowid = %s", [course_id])
+
+
+def rebuild_course_index():
+    """
+    Recomputes the search documents of every course.
+    """
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(PG_COURSE_DOCUMENT_SQL.format(where=""))
+        elif connection.vendor == 'sqlite':
+            cursor.execute(f"DELETE FROM {COURSE_SEARCH_TABLE}")
+            cursor.execute(SQLITE_COURSE_DOCUMENT_SQL.format(where=""))
@@ -1,8 +1,88 @@
+from django.conf import settings
 from rest_framework import serializers
-from .models import CustomUser, Course, Enrollment, Feedback, StatusUpdate
+from .models import CustomUser, Course, Enrollment, Feedback, MaterialUpload, StatusUpdate
+
+
+def parse_field_paths(value):
+    """
+    Parses a comma-separated list of dotted field paths into a tree.
+
+    For example, "course.teacher,student" becomes {'course': {'teacher': {}}, 'student': {}}.
+    """
+    tree = {}
+    for path in (value or '').split(','):
+        node = tree
+        for name in filter(None, (part.strip() for part in path.split('.'))):
+            node = node.setdefault(name, {})
+    return tree
+
+
+def expansion_select_related(serializer_class, expand, prefix=''):
+    """
+    Converts an expansion tree into the select_related() lookups needed to serialize it.
+
+    Names the serializer cannot expand are ignored, so arbitrary query strings never reach the ORM.
+    """
+    lookups = []
+    for name, children in expand.items():
+        child_class = getattr(serializer_class, 'expandable_fields', {}).get(name)
+        if child_class is None:
+            continue
+        lookup = f'{prefix}{name}'
+        lookups.append(lookup)
+        lookups.extend(expansion_select_related(child_class, children, f'{lookup}__'))
+    return lookups
+
+
+def expansion_models(serializer_class, expand):
+    """
+    Returns the models whose rows appear in a response for the given expansion tree.
+    """
+    models = [serializer_class.Meta.model]
+    for name, children in expand.items():
+        child_class = getattr(serializer_class, 'expandable_fields', {}).get(name)
+        if child_class is not None:
+            models.extend(expansion_models(child_class, children))
+    return models
+
+
+class DynamicFieldsMixin:
+    """
+    Adds sparse fieldsets and relation expansion to a ModelSerializer.
+
+    Top-level serializers read `?fields=` and `?expand=` from the request; nested serializers
+    receive their share of the dotted paths from their parent. Relations listed in
+    `expandable_fields` are rendered as primary keys unless expanded.
+    """
+    expandable_fields = {}
+
+    def __init__(self, *args, fields=None, expand=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        if fields is None and expand is None and request is not None:
+            fields = parse_field_paths(request.query_params.get('fields')) or None
+            expand = parse_field_paths(request.query_params.get('expand'))
+        self._requested_fields = fields
+        self._expand = expand or {}
+
+    def get_fields(self):
+        fields = super().get_fields()
+        for name, serializer_class in self.expandable_fields.items():
+            if name not in fields:
+                continue
+            if name in self._expand:
+                child_fields = (self._requested_fields or {}).get(name) or None
+                fields[name] = serializer_class(read_only=True, fields=child_fields, expand=self._expand[name])
+            else:
+                fields[name] = serializers.PrimaryKeyRelatedField(read_only=True)
+
+        if self._requested_fields:
+            fields = {name: field for name, field in fields.items() if name in self._requested_fields}
+        return fields
+
 
 # Custom User Serializer
-class CustomUserSerializer(serializers.ModelSerializer):
+class CustomUserSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """
     Serializer for CustomUser model to handle user data in the API.
     """
@@ -13,12 +93,12 @@ class CustomUserSerializer(serializers.ModelSerializer):
 
 
 # Course Serializer
-class CourseSerializer(serializers.ModelSerializer):
+class CourseSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """
     Serializer for Course model to handle course data in the API.
-    Includes nested serializer to provide detailed teacher information.
+    The teacher is returned as a primary key unless requested with `?expand=teacher`.
     """
-    teacher = CustomUserSerializer(read_only=True)  # Nested serializer for teacher details
+    expandable_fields = {'teacher': CustomUserSerializer}
 
     class Meta:
         model = Course
@@ -27,28 +107,26 @@ class CourseSerializer(serializers.ModelSerializer):
 
 
 # Enrollment Serializer
-class EnrollmentSerializer(serializers.ModelSerializer):
+class EnrollmentSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """
     Serializer for Enrollment model to handle enrollment data in the API.
-    Includes nested serializers to provide detailed student and course information.
+    Student and course are returned as primary keys unless expanded, e.g. `?expand=student,course.teacher`.
     """
-    student = CustomUserSerializer(read_only=True)  # Nested serializer for student details
-    course = CourseSerializer(read_only=True)  # Nested serializer for course details
+    expandable_fields = {'student': CustomUserSerializer, 'course': CourseSerializer}
 
     class Meta:
         model = Enrollment
         fields = ['id', 'student', 'course', 'enrolled_on']
-        read_only_fields = ['id', 'student', 'enrolled_on']  # Prevents changes to these fields via the API
+        read_only_fields = ['id', 'student', 'course', 'enrolled_on']  # Prevents changes to these fields via the API
 
 
 # Feedback Serializer
-class FeedbackSerializer(serializers.ModelSerializer):
+class FeedbackSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """
     Serializer for Feedback model to handle feedback data in the API.
-    Includes nested serializers to provide detailed course and student information.
+    Course and student are returned as primary keys unless expanded, e.g. `?expand=course,student`.
     """
-    course = CourseSerializer(read_only=True)  # Nested serializer for course details
-    student = CustomUserSerializer(read_only=True)  # Nested serializer for student details
+    expandable_fields = {'course': CourseSerializer, 'student': CustomUserSerializer}
 
     class Meta:
         model = Feedback
@@ -57,14 +135,58 @@ class FeedbackSerializer(serializers.ModelSerializer):
 
 
 # Status Update Serializer
-class StatusUpdateSerializer(serializers.ModelSerializer):
+class StatusUpdateSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """
     Serializer for StatusUpdate model to handle status update data in the API.
-    Includes a nested serializer to provide detailed user information.
+    The user is returned as a primary key unless requested with `?expand=user`.
     """
-    user = CustomUserSerializer(read_only=True)  # Nested serializer for user details
+    expandable_fields = {'user': CustomUserSerializer}
 
     class Meta:
         model = StatusUpdate
         fields = ['id', 'user', 'content', 'timestamp']
         read_only_fields = ['id', 'user', 'timestamp']  # Ensures the user and timestamp are read-only
+
+
+# Material Upload Serializer
+class MaterialUploadSerializer(serializers.ModelSerializer):
+    """
+    Serializer for MaterialUpload sessions, reporting their progress.
+    Passing `material` replaces that material's file; otherwise a title is required for the new material.
+    """
+    progress = serializers.SerializerMethodField()
+    chunk_size = serializers.SerializerMethodField()
+
+    class Meta:
+        model = MaterialUpload
+        fields = [
+            'id', 'material', 'title', 'description', 'filename', 'size', 'checksum',
+            'received', 'progress', 'chunk_size', 'completed_at',
+        ]
+        read_only_fields = ['id', 'received', 'completed_at']
+
+    def get_progress(self, upload):
+        return round(upload.received / upload.size, 4) if upload.size else 1.0
+
+    def get_chunk_size(self, upload):
+        return settings.MATERIAL_UPLOAD_CHUNK_SIZE
+
+    def validate_size(self, value):
+        if value <= 0:
+            raise serializers.ValidationError("The file must not be empty.")
+        if value > settings.MATERIAL_UPLOAD_MAX_SIZE:
+            raise serializers.ValidationError(f"Files may not exceed {settings.MATERIAL_UPLOAD_MAX_SIZE} bytes.")
+        return value
+
+    def validate_checksum(self, value):
+        if value and (len(value) != 64 or any(c not in '0123456789abcdef' for c in value.lower())):
+            raise serializers.ValidationError("Expected a hex-encoded SHA-256 digest.")
+        return value.lower()
+
+    def validate(self, attrs):
+        material = attrs.get('material')
+        if material is not None and material.course_id != self.context['course'].pk:
+            raise serializers.ValidationError({'material': "The material belongs to another course."})
+        if material is None and not attrs.get('title'):
+            raise serializers.ValidationError({'title': "A title is required for new material."})
+        return attrs
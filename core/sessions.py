@@ -0,0 +1,106 @@
+# sessions.py
+
+from channels.auth import AuthMiddleware, _get_user_session_key
+from channels.db import database_sync_to_async
+from channels.sessions import CookieMiddleware, SessionMiddleware
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, load_backend
+from django.core.cache import cache
+from django.utils import timezone
+from django.utils.crypto import constant_time_compare
+
+# Seconds a user loaded for a WebSocket handshake is reused (it is dropped from the cache on every save);
+# 0 disables the user cache, as it must be when the cache is not shared by every process
+SESSION_USER_CACHE_TIMEOUT = getattr(settings, 'SESSION_USER_CACHE_TIMEOUT', 0)
+
+# Expired sessions deleted per statement by clear_expired_sessions()
+SESSION_CLEANUP_BATCH_SIZE = getattr(settings, 'SESSION_CLEANUP_BATCH_SIZE', 1000)
+
+
+def user_cache_key(user_id):
+    """
+    Returns the cache key holding the user record looked up for session authentication.
+    """
+    return f'session:user:{user_id}'
+
+
+def get_cached_user(backend, user_id):
+    """
+    Returns the user with the given id as loaded by the authentication backend, from the cache
+    when possible. Unknown ids are not cached.
+    """
+    if not SESSION_USER_CACHE_TIMEOUT:
+        return backend.get_user(user_id)
+    key = user_cache_key(user_id)
+    user = cache.get(key)
+    if user is None:
+        user = backend.get_user(user_id)
+        if user is not None:
+            cache.set(key, user, SESSION_USER_CACHE_TIMEOUT)
+    return user
+
+
+def invalidate_cached_user(user_id):
+    cache.delete(user_cache_key(user_id))
+
+
+@database_sync_to_async
+def get_session_user(scope):
+    """
+    Same as channels.auth.get_user(), but reads the user through get_cached_user().
+
+    With a cache-backed session engine, a handshake then runs no query at all. The session hash
+    is still verified, so a password change logs out open connections on their next handshake.
+    """
+    from django.contrib.auth.models import AnonymousUser
+
+    session = scope['session']
+    user = None
+    try:
+        user_id = _get_user_session_key(session)
+        backend_path = session[BACKEND_SESSION_KEY]
+    except KeyError:
+        pass
+    else:
+        if backend_path in settings.AUTHENTICATION_BACKENDS:
+            user = get_cached_user(load_backend(backend_path), user_id)
+            if hasattr(user, 'get_session_auth_hash'):
+                session_hash = session.get(HASH_SESSION_KEY)
+                if not (session_hash and constant_time_compare(session_hash, user.get_session_auth_hash())):
+                    session.flush()
+                    user = None
+    return user or AnonymousUser()
+
+
+class CachedAuthMiddleware(AuthMiddleware):
+    """
+    Populates scope['user'] from the session like channels' AuthMiddleware, with a cached user lookup.
+    """
+    async def resolve_scope(self, scope):
+        scope['user']._wrapped = await get_session_user(scope)
+
+
+def CachedAuthMiddlewareStack(inner):
+    """
+    Drop-in replacement for channels.auth.AuthMiddlewareStack.
+    """
+    return CookieMiddleware(SessionMiddleware(CachedAuthMiddleware(inner)))
+
+
+def clear_expired_sessions(batch_size=SESSION_CLEANUP_BATCH_SIZE):
+    """
+    Deletes expired database sessions, `batch_size` rows per statement, so the cleanup never holds
+    locks on (or writes WAL for) the whole backlog at once.
+
+    Returns the number of sessions deleted.
+    """
+    from django.contrib.sessions.models import Session
+
+    expired = Session.objects.filter(expire_date__lt=timezone.now()).order_by('expire_date')
+    deleted = 0
+    while True:
+        keys = list(expired.values_list('pk', flat=True)[:batch_size])
+        if not keys:
+            return deleted
+        count, _ = Session.objects.filter(pk__in=keys).delete()
+        deleted += count
@@ -1,9 +1,22 @@
 # signals.py
 
 from django.apps import AppConfig
-from django.db.models.signals import post_migrate
+from django.db import transaction
+from django.db.models import QuerySet
+from django.db.models.signals import post_migrate, post_save, post_delete, pre_save
 from django.dispatch import receiver
-from .models import ChatRoom
+from django.utils import timezone
+from .analytics import invalidate_course_analytics, record_feedback
+from .authentication import update_deactivation
+from .conditional import bump_version
+from .dashboard import invalidate_dashboard, invalidate_notifications
+from .downloads import file_checksum
+from .feed import backfill_timeline, fan_out
+from .recommendations import schedule_refresh
+from .rollups import record_activity
+from .sessions import invalidate_cached_user
+from .search import index_course, index_user, unindex_course, unindex_user
+from .models import ChatRoom, Course, CustomUser, Enrollment, Feedback, Material, Notification, StatusUpdate
 
 
 @receiver(post_migrate)
@@ -27,3 +40,233 @@ def create_default_chatrooms(sender, **kwargs):
         # Iterate over the list and create each chat room if it does not exist
         for room_name in default_rooms:
             ChatRoom.objects.get_or_create(name=room_name)
+
+
+@receiver([post_save, post_delete], sender=CustomUser)
+def invalidate_user_dashboard(sender, instance, **kwargs):
+    """
+    Drops the cached dashboard of a user whenever the user record itself changes.
+    """
+    invalidate_dashboard(instance.pk)
+    invalidate_notifications(instance.pk)
+
+
+@receiver(post_save, sender=CustomUser)
+def track_user_deactivation(sender, instance, **kwargs):
+    """
+    Keeps the deactivation list read by stateless token authentication in step with is_active.
+    """
+    update_deactivation(instance.pk, instance.is_active)
+
+
+@receiver(post_delete, sender=CustomUser)
+def track_user_deletion(sender, instance, **kwargs):
+    update_deactivation(instance.pk, False)
+
+
+@receiver([post_save, post_delete], sender=CustomUser)
+def invalidate_session_user(sender, instance, **kwargs):
+    """
+    Drops the user record cached for WebSocket authentication, so role and password changes apply.
+    """
+    invalidate_cached_user(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=StatusUpdate)
+def invalidate_status_update_dashboard(sender, instance, **kwargs):
+    """
+    Drops the cached dashboard of the author of a status update.
+    """
+    invalidate_dashboard(instance.user_id)
+
+
+@receiver([post_save, post_delete], sender=Enrollment)
+def invalidate_enrollment_dashboard(sender, instance, **kwargs):
+    """
+    Drops the cached dashboard of the student of an enrollment.
+    """
+    invalidate_dashboard(instance.student_id)
+
+
+@receiver([post_save, post_delete], sender=Course)
+def invalidate_course_dashboard(sender, instance, created=False, **kwargs):
+    """
+    Drops the cached dashboards showing a course: its teacher's, and its enrolled
+    students' when an existing course is edited.
+    """
+    invalidate_dashboard(instance.teacher_id)
+    if kwargs.get('signal') is post_save and not created:
+        student_ids = Enrollment.objects.filter(course=instance).values_list('student_id', flat=True)
+        invalidate_dashboard(*student_ids)
+
+
+@receiver([post_save, post_delete], sender=Notification)
+def invalidate_notification_summary(sender, instance, **kwargs):
+    """
+    Drops the cached unread notification summary of the notified user.
+    """
+    invalidate_notifications(instance.user_id)
+
+
+@receiver(post_save, sender=CustomUser)
+def update_user_search_index(sender, instance, **kwargs):
+    """
+    Keeps the full-text search entry of a user in step with its name fields.
+    """
+    index_user(instance)
+
+
+@receiver(post_delete, sender=CustomUser)
+def remove_user_search_index(sender, instance, **kwargs):
+    """
+    Removes a deleted user from the full-text search index.
+    """
+    unindex_user(instance.pk)
+
+
+@receiver(post_save, sender=Course)
+def update_course_search_index(sender, instance, **kwargs):
+    """
+    Recomputes the search document of a course after it is created or edited.
+    """
+    index_course(instance.pk)
+
+
+@receiver(post_delete, sender=Course)
+def remove_course_search_index(sender, instance, **kwargs):
+    """
+    Removes a deleted course from the full-text search index.
+    """
+    unindex_course(instance.pk)
+
+
+@receiver(pre_save, sender=Material)
+def update_material_checksum(sender, instance, **kwargs):
+    """
+    Hashes a newly uploaded material file before it is stored, for its ETag and versioned download URL.
+    """
+    if not instance.file:
+        instance.checksum = ''
+    elif not instance.file._committed:
+        instance.checksum = file_checksum(instance.file)
+
+
+@receiver(pre_save, sender=Material)
+def release_replaced_material_file(sender, instance, **kwargs):
+    """
+    Releases the previous file of a material whose file is replaced or cleared, once the change is committed.
+    """
+    if instance.pk is None or (instance.file and instance.file._committed):
+        return
+    previous = Material.objects.filter(pk=instance.pk).values_list('file', flat=True).first()
+    if previous:
+        storage = instance.file.storage
+        transaction.on_commit(lambda: storage.delete(previous))
+
+
+@receiver(post_delete, sender=Material)
+def release_deleted_material_file(sender, instance, **kwargs):
+    """
+    Releases the file of a deleted material (including those deleted with their course) once the deletion is committed.
+    """
+    if instance.file:
+        storage, name = instance.file.storage, instance.file.name
+        transaction.on_commit(lambda: storage.delete(name))
+
+
+@receiver([post_save, post_delete], sender=Material)
+def update_material_course_search_index(sender, instance, **kwargs):
+    """
+    Recomputes the search document of a course when one of its materials changes.
+    """
+    index_course(instance.course_id)
+
+
+@receiver([post_save, post_delete], sender=Feedback)
+def update_feedback_analytics(sender, instance, created=False, **kwargs):
+    """
+    Folds new feedback into the cached course analytics; edits and deletions force a rebuild.
+    Both wait for the commit, so a rolled-back change never reaches the cache.
+    """
+    if created:
+        transaction.on_commit(lambda: record_feedback(instance))
+    else:
+        course_id = instance.course_id
+        transaction.on_commit(lambda: invalidate_course_analytics(course_id))
+
+
+@receiver(post_save, sender=StatusUpdate)
+def fan_out_status_update(sender, instance, created, **kwargs):
+    """
+    Delivers a new status update to the feeds of the author's classmates and teachers.
+    """
+    if created:
+        fan_out(instance)
+
+@receiver(pre_save, sender=Enrollment)
+def detect_enrollment_block(sender, instance, **kwargs):
+    """
+    Notes whether this save blocks a previously unblocked enrollment, for the daily rollups.
+    """
+    instance._newly_blocked = bool(
+        instance.blocked and instance.pk
+        and Enrollment.objects.filter(pk=instance.pk, blocked=False).exists()
+    )
+
+
+@receiver(post_save, sender=Enrollment)
+def roll_up_enrollment(sender, instance, created, **kwargs):
+    """
+    Counts new enrollments and blocks in the course's daily rollup, queues a recommendation refresh
+    and fills the new student's feed with the course's recent status updates.
+    """
+    if created:
+        record_activity(instance.course_id, 'enrollments', timezone.localdate(instance.enrolled_on))
+        schedule_refresh(instance.course_id, instance.student_id)
+        backfill_timeline(instance.student_id, instance.course_id)
+    elif getattr(instance, '_newly_blocked', False):
+        record_activity(instance.course_id, 'blocks')
+
+
+@receiver(post_delete, sender=Enrollment)
+def roll_up_unenrollment(sender, instance, origin=None, **kwargs):
+    """
+    Counts removed enrollments in the course's daily rollup and queues a recommendation refresh.
+
+    Only deletions of the enrollments themselves count; cascades from a deleted user or course
+    may be taking the course, and its rollup rows, with them.
+    """
+    origin_model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    if origin_model is Enrollment:
+        record_activity(instance.course_id, 'unenrollments')
+        schedule_refresh(instance.course_id, instance.student_id)
+
+
+@receiver(post_save, sender=Feedback)
+@receiver(post_save, sender=Material)
+def roll_up_course_content(sender, instance, created, **kwargs):
+    """
+    Counts new feedback and materials in the course's daily rollup.
+    """
+    if created:
+        record_activity(instance.course_id, 'feedback' if sender is Feedback else 'materials')
+
+
+@receiver([post_save, post_delete], sender=CustomUser)
+@receiver([post_save, post_delete], sender=Course)
+@receiver([post_save, post_delete], sender=Enrollment)
+@receiver([post_save, post_delete], sender=Feedback)
+@receiver([post_save, post_delete], sender=StatusUpdate)
+@receiver([post_save, post_delete], sender=Material)
+def bump_conditional_versions(sender, instance, **kwargs):
+    """
+    Replaces the version tokens behind the ETags of the written row, its collection and,
+    for course content, the course page.
+    """
+    model_name = sender._meta.model_name
+    bump_version(model_name)
+    bump_version(model_name, instance.pk)
+    if sender is Course:
+        bump_version('course_page', instance.pk)
+    elif sender in (Material, Feedback, Enrollment):
+        bump_version('course_page', instance.course_id)
@@ -0,0 +1,156 @@
+# storage.py
+
+import hashlib
+import os
+import posixpath
+import re
+import tempfile
+import time
+from collections import Counter
+
+from django.apps import apps
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.utils.deconstruct import deconstructible
+
+TEMP_FILE_MAX_AGE = 3600  # Seconds after which an unfinished save's temporary file is garbage
+
+# Content-addressed names look like "<upload_to>/<sha256>/<original filename>"
+CONTENT_NAME_RE = re.compile(r'(?:^|/)([0-9a-f]{64})/[^/]+$')
+
+
+@deconstructible(path='core.storage.ContentAddressedStorage')
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    File system storage that keeps each distinct content once, as blobs/<aa>/<sha256>.
+
+    Saving hashes the content while streaming it to a temporary file, which is then moved into
+    place or, if the blob already exists, discarded. Names keep the original filename for
+    downloads (e.g. "course_materials/<sha256>/notes.pdf"), and each saved name holds one
+    reference on its blob (ContentBlob.ref_count); deleting the last name removes the blob.
+
+    Names without a digest, stored before deduplication, behave as in FileSystemStorage.
+    """
+    blob_directory = 'blobs'
+
+    def digest(self, name):
+        match = CONTENT_NAME_RE.search(name or '')
+        return match.group(1) if match else None
+
+    def blob_name(self, digest):
+        return f'{self.blob_directory}/{digest[:2]}/{digest}'
+
+    def path(self, name):
+        digest = self.digest(name)
+        return super().path(self.blob_name(digest) if digest else name)
+
+    def get_available_name(self, name, max_length=None):
+        return name  # The stored name is derived from the content in _save()
+
+    def _save(self, name, content):
+        temp_directory = super().path(f'{self.blob_directory}/tmp')
+        os.makedirs(temp_directory, exist_ok=True)
+        digest = hashlib.sha256()
+        size = 0
+        with tempfile.NamedTemporaryFile(dir=temp_directory, delete=False) as temp:
+            for chunk in content.chunks():
+                digest.update(chunk)
+                temp.write(chunk)
+                size += len(chunk)
+        digest = digest.hexdigest()
+        self.add_reference(digest, size, temp.name)
+
+        directory, filename = posixpath.split(name)
+        return posixpath.join(directory, digest, filename)
+
+    def add_reference(self, digest, size, temp_path):
+        """
+        Counts one more name for a blob, moving the freshly written content into place if the
+        blob is new. The blob row stays locked while the file is moved, so a concurrent delete
+        of the last reference cannot remove it in between.
+        """
+        ContentBlob = apps.get_model('core', 'ContentBlob')
+        blob_path = super().path(self.blob_name(digest))
+        with transaction.atomic():
+            blob, created = ContentBlob.objects.select_for_update().get_or_create(digest=digest, defaults={'size': size})
+            if not created:
+                ContentBlob.objects.filter(pk=digest).update(ref_count=F('ref_count') + 1)
+            if os.path.exists(blob_path):
+                os.remove(temp_path)
+            else:
+                os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+                os.replace(temp_path, blob_path)
+                if self.file_permissions_mode is not None:
+                    os.chmod(blob_path, self.file_permissions_mode)
+
+    def delete(self, name):
+        digest = self.digest(name)
+        if digest is None:
+            return super().delete(name)
+
+        ContentBlob = apps.get_model('core', 'ContentBlob')
+        with transaction.atomic():
+            blob = ContentBlob.objects.select_for_update().filter(pk=digest).first()
+            if blob is not None and blob.ref_count > 1:
+                ContentBlob.objects.filter(pk=digest).update(ref_count=F('ref_count') - 1)
+                return
+            if blob is not None:
+                blob.delete()
+            super().delete(self.blob_name(digest))
+
+
+def get_material_storage():
+    return ContentAddressedStorage()
+
+
+def storage_report():
+    """
+    Summarises deduplication: distinct blobs, the names referring to them, bytes on disk and
+    bytes that would be on disk without deduplication.
+    """
+    ContentBlob = apps.get_model('core', 'ContentBlob')
+    totals = ContentBlob.objects.aggregate(
+        blobs=Count('digest'), references=Sum('ref_count'), stored_bytes=Sum('size'),
+        referenced_bytes=Sum(F('size') * F('ref_count')),
+    )
+    report = {key: value or 0 for key, value in totals.items()}
+    report['saved_bytes'] = report['referenced_bytes'] - report['stored_bytes']
+    return report
+
+
+def collect_garbage(storage=None):
+    """
+    Recounts blob references from the stored material names and removes blobs nothing refers to,
+    including files left behind by saves whose transaction was rolled back.
+
+    Returns the number of blobs removed.
+    """
+    ContentBlob = apps.get_model('core', 'ContentBlob')
+    Material = apps.get_model('core', 'Material')
+    storage = storage or Material._meta.get_field('file').storage
+    references = Counter(storage.digest(name) for name in Material.objects.values_list('file', flat=True))
+    references.pop(None, None)
+
+    removed = 0
+    with transaction.atomic():
+        for blob in ContentBlob.objects.select_for_update():
+            if not references[blob.digest]:
+                storage.delete(storage.blob_name(blob.digest))
+                blob.delete()
+                removed += 1
+            elif references[blob.digest] != blob.ref_count:
+                ContentBlob.objects.filter(pk=blob.digest).update(ref_count=references[blob.digest])
+
+        known = set(ContentBlob.objects.values_list('digest', flat=True))
+        temp_directory = storage.path(f'{storage.blob_directory}/tmp')
+        for directory, _, files in os.walk(storage.path(storage.blob_directory)):
+            for filename in files:
+                path = os.path.join(directory, filename)
+                # Temporary files of saves still in progress are left alone
+                if directory == temp_directory and os.path.getmtime(path) > time.time() - TEMP_FILE_MAX_AGE:
+                    continue
+                if filename not in known:
+                    os.remove(path)
+                    removed += 1
+    return removed
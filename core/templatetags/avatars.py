@@ -0,0 +1,42 @@
+# core/templatetags/avatars.py
+
+from django import template
+from django.urls import reverse
+from django.utils.html import format_html
+
+from core.thumbnails import pick_rendition
+
+register = template.Library()
+
+
+@register.simple_tag
+def avatar(user, size=48, css_class='rounded-circle'):
+    """
+    Renders a user's profile photo as a `size` x `size` pixel image.
+
+    Picks the smallest renditions covering the size on standard and high-density screens,
+    offering WebP with a JPEG fallback. The original photo is used until the thumbnail worker
+    has built the renditions, and nothing is rendered for users without a photo.
+
+    Usage: {% load avatars %}{% avatar enrollment.student 32 %}
+    """
+    if not user.profile_photo:
+        return ''
+    standard, high_density = pick_rendition(user, size), pick_rendition(user, size * 2)
+    if standard is None:
+        return format_html(
+            '<img src="{}" alt="{}" width="{}" height="{}" class="{}">',
+            user.profile_photo.url, user.username, size, size, css_class,
+        )
+
+    def srcset(extension):
+        url = reverse('profile_photo_rendition', args=[standard[extension]])
+        high_density_url = reverse('profile_photo_rendition', args=[high_density[extension]])
+        return f'{url} 1x, {high_density_url} 2x'
+
+    return format_html(
+        '<picture><source type="image/webp" srcset="{}">'
+        '<img src="{}" srcset="{}" alt="{}" width="{}" height="{}" class="{}" loading="lazy"></picture>',
+        srcset('webp'), reverse('profile_photo_rendition', args=[standard['jpg']]), srcset('jpg'),
+        user.username, size, size, css_class,
+    )
@@ -0,0 +1,161 @@
+# throttling.py
+
+import math
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+from rest_framework.throttling import BaseThrottle
+
+THROTTLE_CACHE = getattr(settings, 'THROTTLE_CACHE', 'default')
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_rate(rate):
+    """
+    Parses a rate such as '30/min' into (capacity, period in seconds).
+    """
+    count, period = rate.split('/')
+    return int(count), PERIODS[period[0]]
+
+
+def take_token(key, rate, now=None):
+    """
+    Takes one token from the bucket stored under a cache key.
+
+    A bucket holds up to `capacity` tokens and refills continuously at capacity/period tokens
+    per second, so clients may burst up to the full rate and are then held to the average.
+    Buckets live in the THROTTLE_CACHE (locmem locally, Redis in production); the read and
+    write are not atomic, so concurrent requests can occasionally overdraw a bucket by a token.
+
+    Returns:
+        float: 0 if a token was taken, otherwise the seconds until one becomes available.
+    """
+    capacity, period = parse_rate(rate)
+    refill = capacity / period
+    now = time.time() if now is None else now
+    cache = caches[THROTTLE_CACHE]
+
+    tokens, updated = cache.get(key, (capacity, now))
+    tokens = min(capacity, tokens + (now - updated) * refill)
+    if tokens < 1:
+        return (1 - tokens) / refill
+    cache.set(key, (tokens - 1, now), period)
+    return 0
+
+
+def metric_cache_key(*parts):
+    return 'metrics:' + ':'.join(str(part) for part in parts)
+
+
+def record_metric(*parts):
+    """
+    Increments a counter shared by every worker through the THROTTLE_CACHE.
+    """
+    cache = caches[THROTTLE_CACHE]
+    key = metric_cache_key(*parts)
+    cache.add(key, 0, None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # The counter was evicted between add() and incr()
+        cache.set(key, 1, None)
+
+
+def get_metrics():
+    """
+    Returns the throttled request counts per scope and the number of requests shed by admission control.
+    """
+    scopes = sorted({name.rsplit('_', 1)[0] for name in settings.THROTTLE_RATES})
+    keys = {metric_cache_key('throttled', scope): scope for scope in scopes}
+    keys[metric_cache_key('shed')] = None
+    counts = caches[THROTTLE_CACHE].get_many(list(keys))
+    return {
+        'throttled': {scope: counts.get(key, 0) for key, scope in keys.items() if scope is not None},
+        'shed': counts.get(metric_cache_key('shed'), 0),
+    }
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Base token-bucket throttle. Rates come from THROTTLE_RATES['<scope>_<kind>'].
+
+    The scope is the class's own `scope` (see `for_scope`) or the view's `throttle_scope`;
+    views with neither are not throttled.
+    """
+    kind = None
+    scope = None
+
+    @classmethod
+    def for_scope(cls, scope):
+        """
+        Returns a subclass bound to a scope, for function views that cannot set `throttle_scope`.
+        """
+        return type(f'{cls.__name__}_{scope}', (cls,), {'scope': scope})
+
+    def get_throttle_ident(self, request):
+        raise NotImplementedError
+
+    def allow_request(self, request, view):
+        self.wait_time = 0
+        scope = self.scope or getattr(view, 'throttle_scope', None)
+        rate = settings.THROTTLE_RATES.get(f'{scope}_{self.kind}') if scope else None
+        ident = self.get_throttle_ident(request) if rate else None
+        if ident is None:
+            return True
+
+        self.wait_time = take_token(f'throttle:{scope}:{self.kind}:{ident}', rate)
+        if self.wait_time:
+            record_metric('throttled', scope)
+            return False
+        return True
+
+    def wait(self):
+        return self.wait_time
+
+
+class UserTokenBucketThrottle(TokenBucketThrottle):
+    """
+    Throttles authenticated users by id. Anonymous requests are left to the IP throttle.
+    """
+    kind = 'user'
+
+    def get_throttle_ident(self, request):
+        return request.user.pk if request.user and request.user.is_authenticated else None
+
+
+class IPTokenBucketThrottle(TokenBucketThrottle):
+    """
+    Throttles every request by client address.
+
+    Only the X-Forwarded-For entry added by the trusted proxies is used (REST_FRAMEWORK['NUM_PROXIES']);
+    with no proxy configured the header is ignored, since clients can set it to anything.
+    """
+    kind = 'ip'
+
+    def get_throttle_ident(self, request):
+        return self.get_ident(request)
+
+
+def scoped_throttles(scope):
+    """
+    Returns the per-user and per-IP throttle classes of a scope, for use with @throttle_classes.
+    """
+    return [UserTokenBucketThrottle.for_scope(scope), IPTokenBucketThrottle.for_scope(scope)]
+
+
+def throttle_response(request, scope):
+    """
+    Applies a scope's per-user and per-IP throttles to a plain Django view.
+
+    Returns a 429 response with Retry-After when the request is throttled, otherwise None.
+    """
+    for throttle_class in scoped_throttles(scope):
+        throttle = throttle_class()
+        if not throttle.allow_request(request, None):
+            response = HttpResponse("Too many requests, please retry shortly.", status=429, content_type='text/plain')
+            response['Retry-After'] = math.ceil(throttle.wait())
+            return response
+    return None
@@ -0,0 +1,109 @@
+# thumbnails.py
+
+import hashlib
+import io
+import logging
+import posixpath
+import re
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+from .models import CustomUser
+from .routing import THUMBNAIL_CHANNEL
+
+logger = logging.getLogger(__name__)
+
+# Edge lengths, in pixels, of the square renditions built for every profile photo
+THUMBNAIL_SIZES = (48, 96, 160, 320)
+
+# Rendition extension -> (Pillow format, save options)
+THUMBNAIL_FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 6}),
+    'jpg': ('JPEG', {'quality': 85, 'optimize': True, 'progressive': True}),
+}
+
+# e.g. profile_photos/alice.160.1a2b3c4d.webp; the hash makes the name change whenever the content does
+RENDITION_NAME_RE = re.compile(r'profile_photos/[^/]+\.\d+\.[0-9a-f]{8}\.(webp|jpg)')
+
+
+def rendition_name(source, size, extension, content):
+    stem, _ = posixpath.splitext(source)
+    return f'{stem}.{size}.{hashlib.md5(content, usedforsecurity=False).hexdigest()[:8]}.{extension}'
+
+
+def rendition_names(renditions):
+    return {name for formats in (renditions or {}).get('sizes', {}).values() for name in formats.values()}
+
+
+def render(image, size, image_format, options):
+    """
+    Crops an image to a centred square of `size` pixels and returns it encoded in `image_format`.
+    """
+    buffer = io.BytesIO()
+    ImageOps.fit(image, (size, size), Image.LANCZOS).save(buffer, image_format, **options)
+    return buffer.getvalue()
+
+
+def generate_renditions(user_id):
+    """
+    Builds the WebP and JPEG renditions of a user's profile photo next to the original and
+    records them in `profile_photo_renditions`, removing those of a previous photo.
+    """
+    user = CustomUser.objects.filter(pk=user_id).first()
+    if user is None:
+        return
+    photo = user.profile_photo
+    storage = photo.storage
+    renditions = {}
+    if photo:
+        with photo.open('rb'):
+            image = ImageOps.exif_transpose(Image.open(photo)).convert('RGB')
+        sizes = {}
+        for size in THUMBNAIL_SIZES:
+            for extension, (image_format, options) in THUMBNAIL_FORMATS.items():
+                content = render(image, size, image_format, options)
+                name = rendition_name(photo.name, size, extension, content)
+                if not storage.exists(name):
+                    name = storage.save(name, ContentFile(content))
+                sizes.setdefault(str(size), {})[extension] = name
+        renditions = {'source': photo.name, 'sizes': sizes}
+
+    # Only record the renditions if the photo was not replaced again in the meantime
+    recorded = CustomUser.objects.filter(pk=user_id, profile_photo=photo.name).update(
+        profile_photo_renditions=renditions,
+    )
+    current = rendition_names(renditions)
+    stale = rendition_names(user.profile_photo_renditions) - current if recorded else current
+    for name in stale:
+        storage.delete(name)
+
+
+def schedule_renditions(user):
+    """
+    Asks the background worker to build the renditions of a user's profile photo.
+
+    Falls back to building them in the request if the channel layer cannot be reached.
+    """
+    try:
+        async_to_sync(get_channel_layer().send)(
+            THUMBNAIL_CHANNEL, {'type': 'generate.renditions', 'user_id': user.pk},
+        )
+    except Exception:
+        logger.exception("Could not queue profile photo renditions; building them in the request.")
+        generate_renditions(user.pk)
+
+
+def pick_rendition(user, size):
+    """
+    Returns the renditions ({'webp': name, 'jpg': name}) of the smallest size covering `size`
+    pixels, the largest one if none does, or None while they have not been built.
+    """
+    renditions = user.profile_photo_renditions or {}
+    if not user.profile_photo or renditions.get('source') != user.profile_photo.name:
+        return None
+    sizes = sorted(int(edge) for edge in renditions['sizes'])
+    edge = next((edge for edge in sizes if edge >= size), sizes[-1])
+    return renditions['sizes'][str(edge)]
@@ -0,0 +1,209 @@
+# uploads.py
+
+import hashlib
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Material, MaterialUpload
+from .utils import notify_enrolled_students_on_new_material
+
+
+class UploadError(Exception):
+    """
+    Raised when a chunk or a finished upload is rejected; `status` is the HTTP status to respond with.
+    """
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+class HashingReader(File):
+    """
+    Reads at most `length` bytes from a stream, hashing them on their way to storage.
+
+    Storages consume it through `chunks()`, so a chunk is never held in memory as a whole.
+    """
+    def __init__(self, stream, length, name=None):
+        super().__init__(stream, name)
+        self.size = length
+        self.remaining = length
+        self.bytes_read = 0
+        self.digest = hashlib.sha256()
+
+    def read(self, num_bytes=-1):
+        if num_bytes is None or num_bytes < 0 or num_bytes > self.remaining:
+            num_bytes = self.remaining
+        data = self.file.read(num_bytes) if num_bytes else b''
+        self.remaining -= len(data)
+        self.bytes_read += len(data)
+        self.digest.update(data)
+        return data
+
+    def chunks(self, chunk_size=None):
+        chunk_size = chunk_size or self.DEFAULT_CHUNK_SIZE
+        while data := self.read(chunk_size):
+            yield data
+
+    def hexdigest(self):
+        return self.digest.hexdigest()
+
+
+class PartsStream:
+    """
+    A read-only stream over stored chunk files, opened one at a time in order.
+    """
+    def __init__(self, names):
+        self.names = list(names)
+        self.current = None
+
+    def read(self, num_bytes):
+        while self.names or self.current:
+            if self.current is None:
+                self.current = default_storage.open(self.names.pop(0), 'rb')
+            data = self.current.read(num_bytes)
+            if data:
+                return data
+            self.close()
+        return b''
+
+    def close(self):
+        if self.current is not None:
+            self.current.close()
+            self.current = None
+
+
+def parts_directory(upload):
+    return f'material_uploads/{upload.pk}'
+
+
+def part_names(upload):
+    """
+    Returns the storage names of an upload's chunks in offset order.
+    """
+    try:
+        _, files = default_storage.listdir(parts_directory(upload))
+    except FileNotFoundError:
+        return []
+    return [f'{parts_directory(upload)}/{name}' for name in sorted(files)]
+
+
+def discard_parts(upload):
+    for name in part_names(upload):
+        default_storage.delete(name)
+
+
+def write_chunk(upload, stream, offset, length, checksum=''):
+    """
+    Streams one chunk of `length` bytes from `stream` into storage at `offset`.
+
+    Chunks must arrive in order, so a client resumes by asking for `received` and sending
+    from there. An optional per-chunk SHA-256 catches corruption before it is stored.
+    Completes the upload once the last byte has arrived.
+
+    Returns the material when the upload completed, otherwise None.
+    """
+    if upload.completed_at:
+        raise UploadError("This upload has already been completed.", status=409)
+    if offset != upload.received:
+        raise UploadError(f"Expected a chunk at offset {upload.received}.", status=409)
+    if length <= 0 or offset + length > upload.size:
+        raise UploadError("The chunk does not fit within the declared file size.")
+    if length > settings.MATERIAL_UPLOAD_CHUNK_SIZE:
+        raise UploadError(f"Chunks may not exceed {settings.MATERIAL_UPLOAD_CHUNK_SIZE} bytes.", status=413)
+
+    # Zero-padded offsets keep the chunk files sorted in upload order
+    name = f'{parts_directory(upload)}/{offset:016d}.part'
+    default_storage.delete(name)  # Left behind by an attempt that failed before being recorded
+    reader = HashingReader(stream, length)
+    name = default_storage.save(name, reader)
+
+    if reader.bytes_read != length:
+        default_storage.delete(name)
+        raise UploadError("The chunk ended before Content-Length bytes were received.")
+    if checksum and reader.hexdigest() != checksum.lower():
+        default_storage.delete(name)
+        raise UploadError("The chunk does not match its checksum.")
+
+    # Guard against a concurrent request that stored the same chunk first
+    recorded = MaterialUpload.objects.filter(pk=upload.pk, received=offset).update(
+        received=offset + length, updated_at=timezone.now(),
+    )
+    if not recorded:
+        default_storage.delete(name)
+        upload.refresh_from_db()
+        raise UploadError(f"Expected a chunk at offset {upload.received}.", status=409)
+
+    upload.received = offset + length
+    if upload.received == upload.size:
+        return complete_upload(upload)
+    return None
+
+
+def complete_upload(upload):
+    """
+    Assembles the stored chunks into the material's file, verifying the whole-file checksum
+    on the way, and creates or updates the Material.
+
+    A mismatching upload is reset so the client can send it again from offset 0.
+    """
+    material = upload.material or Material(
+        course=upload.course, title=upload.title, description=upload.description,
+    )
+    created = material.pk is None
+    previous = material.file.name
+    stream = PartsStream(part_names(upload))
+    reader = HashingReader(stream, upload.size)
+    try:
+        material.file.save(upload.filename, reader, save=False)
+    finally:
+        stream.close()
+
+    if reader.bytes_read != upload.size or (upload.checksum and reader.hexdigest() != upload.checksum.lower()):
+        material.file.delete(save=False)
+        discard_parts(upload)
+        MaterialUpload.objects.filter(pk=upload.pk).update(received=0, updated_at=timezone.now())
+        upload.received = 0
+        raise UploadError("The assembled file does not match its checksum; the upload has been reset.", status=422)
+
+    with transaction.atomic():
+        if not created and upload.title:
+            material.title = upload.title
+            material.description = upload.description
+        material.checksum = reader.hexdigest()
+        material.save()
+        if previous:
+            storage = material.file.storage
+            transaction.on_commit(lambda: storage.delete(previous))
+        upload.material = material
+        upload.completed_at = timezone.now()
+        upload.save(update_fields=['material', 'completed_at', 'updated_at'])
+    discard_parts(upload)
+
+    if created:
+        notify_enrolled_students_on_new_material(material.course, material)
+    return material
+
+
+def abort_upload(upload):
+    discard_parts(upload)
+    upload.delete()
+
+
+def prune_uploads(now=None):
+    """
+    Deletes upload sessions untouched for MATERIAL_UPLOAD_EXPIRY_HOURS along with their chunks.
+
+    Returns the number of sessions deleted.
+    """
+    cutoff = (now or timezone.now()) - timedelta(hours=settings.MATERIAL_UPLOAD_EXPIRY_HOURS)
+    expired = MaterialUpload.objects.filter(updated_at__lt=cutoff)
+    count = 0
+    for upload in expired.iterator():
+        abort_upload(upload)
+        count += 1
+    return count
@@ -3,7 +3,7 @@ from django.contrib import admin
 from rest_framework import permissions
 from rest_framework.routers import DefaultRouter
 from drf_yasg.views import get_schema_view
-from drf_yasg import openapi
+from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 from django.conf import settings
 from django.conf.urls.static import static
 from django.contrib.auth import views as auth_views
@@ -11,22 +11,19 @@ from django.contrib.auth import views as auth_views
 from .views import (
     HomeView, enroll, search_users, post_status, room, LoginView, LogoutView, chat_home,
     user_type_check, leave_feedback, view_feedback, register, edit_course, delete_course, create_course,
-    course_detail, course_list, create_room, user_profile,
+    course_detail, course_list, course_search, create_room, user_profile,
     CustomUserViewSet, CourseViewSet, EnrollmentViewSet, FeedbackViewSet, StatusUpdateViewSet, add_material,
     notifications, mark_notification_read, edit_material, remove_student, block_student, unblock_student,
-    teacher_courses
+    teacher_courses, import_course_roster, export_feedback, export_enrollments, export_chat,
+    throttling_metrics, revoke_tokens, openapi_schema, course_feedback_analytics, teacher_feedback_analytics, start_material_upload, material_upload, download_material,
+    profile_photo_rendition, course_stats, teacher_stats, classmate_feed
 )
+from .openapi import API_INFO
 
 # Set up Swagger schema view for API documentation
+# The UIs load the precomputed schema from openapi_schema (see SWAGGER_SETTINGS)
 schema_view = get_schema_view(
-    openapi.Info(
-        title="ELearning API",
-        default_version='v1',
-        description="API documentation for ELearning project",
-        terms_of_service="https://www.google.com/policies/terms/",
-        contact=openapi.Contact(email="abishs@me.com"),
-        license=openapi.License(name="BSD License"),
-    ),
+    API_INFO,
     public=True,
     permission_classes=[permissions.AllowAny],
 )
@@ -50,11 +47,15 @@ urlpatterns = [
     path('', HomeView.as_view(), name='home'),
     path('courses/', course_list, name='course_list'),
     path('courses/create/', create_course, name='create_course'),
+    path('courses/search/', course_search, name='course_search'),
     path('courses/<int:course_id>/', course_detail, name='course_detail'),
     path('courses/<int:course_id>/enroll/', enroll, name='enroll'),
     path('courses/<int:course_id>/add_material/', add_material, name='add_material'),
     path('courses/<int:course_id>/materials/<int:material_id>/edit/', edit_material, name='edit_material'),
+    path('materials/<int:material_id>/download/', download_material, name='download_material'),
+    path('materials/<int:material_id>/download/<str:version>/', download_material, name='download_material_version'),
     path('courses/<int:course_id>/edit/', edit_course, name='edit_course'),
+    path('courses/<int:course_id>/roster/import/', import_course_roster, name='import_course_roster'),
     path('courses/<int:course_id>/delete/', delete_course, name='delete_course'),
     path('courses/<int:course_id>/students/<int:student_id>/remove/', remove_student, name='remove_student'),
     path('courses/<int:course_id>/students/<int:student_id>/block/', block_student, name='block_student'),
@@ -62,19 +63,28 @@ urlpatterns = [
 
     # User Profile URL
     path('profile/', user_profile, name='user_profile'),
+    path('profile/photos/<path:name>', profile_photo_rendition, name='profile_photo_rendition'),
 
     # Feedback and User Management URLs
     path('search_users/', search_users, name='search_users'),
     path('post_status/', post_status, name='post_status'),
+    path('feed/', classmate_feed, name='classmate_feed'),
     path('user_type_check/', user_type_check, name='user_type_check'),
     path('courses/<int:course_id>/feedback/', leave_feedback, name='leave_feedback'),
     path('courses/<int:course_id>/view_feedback/', view_feedback, name='view_feedback'),
+    path('courses/<int:course_id>/feedback/export/', export_feedback, name='export_feedback'),
+    path('courses/<int:course_id>/feedback/analytics/', course_feedback_analytics, name='course_feedback_analytics'),
+    path('courses/<int:course_id>/enrollments/export/', export_enrollments, name='export_enrollments'),
+    path('courses/<int:course_id>/stats/', course_stats, name='course_stats'),
 
     path('teacher/courses/', teacher_courses, name='teacher_courses'),
+    path('teacher/feedback/analytics/', teacher_feedback_analytics, name='teacher_feedback_analytics'),
+    path('teacher/stats/', teacher_stats, name='teacher_stats'),
     # Chat URLs
     path('chat/', chat_home, name='chat_home'),
     path('chat/create/', create_room, name='create_room'),
     path('chat/<str:room_name>/', room, name='room'),
+    path('chat/<str:room_name>/export/', export_chat, name='export_chat'),
 
     # Password reset URLs
     path('password_reset/', auth_views.PasswordResetView.as_view(template_name='registration/password_reset_form.html'),
@@ -93,11 +103,19 @@ urlpatterns = [
     path('notifications/', notifications, name='notifications'),
     path('notifications/<int:notification_id>/read/', mark_notification_read, name='mark_notification_read'),
 
+    # Metrics URLs
+    path('metrics/throttling/', throttling_metrics, name='throttling_metrics'),
+
     # API URLs
+    path('api/token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
+    path('api/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+    path('api/token/revoke/', revoke_tokens, name='token_revoke'),
+    path('api/courses/<int:course_id>/uploads/', start_material_upload, name='start_material_upload'),
+    path('api/uploads/<uuid:upload_id>/', material_upload, name='material_upload'),
     path('api/', include(router.urls)),  # Include the router URLs for the REST API
 
     # Swagger and API Documentation URLs
-    re_path(r'^swagger(?P<format>\.json|\.yaml)$', schema_view.without_ui(cache_timeout=0), name='schema-json'),
+    re_path(r'^swagger(?P<format>\.json|\.yaml)$', openapi_schema, name='schema-json'),
     path('swagger/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
     path('redoc/', schema_view.with_ui('redoc', cache_timeout=0), name='schema-redoc'),
 
@@ -14,6 +14,14 @@ def notify_student_on_new_material(student, course, material):
     Notification.objects.create(user=student, content=content)
 
 
+def notify_enrolled_students_on_new_material(course, material):
+    """
+    Notifies every student enrolled in the course about new material.
+    """
+    for student in get_user_model().objects.filter(enrollments__course=course):
+        notify_student_on_new_material(student, course, material)
+
+
 def notify_all_students(message):
     """
     Sends a notification to all students in the system.
@@ -1,20 +1,54 @@
+from datetime import timedelta
+
+from django.conf import settings
 from django.contrib import messages
-from django.contrib.auth import login, get_user_model
+from django.contrib.auth import login
 from django.contrib.auth import views as auth_views
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.core.exceptions import PermissionDenied
+from django.core.files.storage import default_storage
+from django.db.models import OuterRef, Prefetch, Subquery, prefetch_related_objects
+from django.http import FileResponse, Http404, HttpResponse
 from django.shortcuts import render, redirect, get_object_or_404
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from django.utils.http import http_date
+from django.views.decorators.http import require_safe
 from rest_framework import status, viewsets, permissions
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import action, api_view, authentication_classes, permission_classes, throttle_classes
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 from rest_framework.views import APIView
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.tokens import RefreshToken
 
 # Import forms, models, and serializers
 from .forms import CourseForm, CustomUserCreationForm, FeedbackForm, UserProfileForm, MaterialForm, StatusUpdateForm
-from .models import Course, Enrollment, StatusUpdate, CustomUser, Feedback, ChatRoom, Material, Notification
-from .serializers import CustomUserSerializer, CourseSerializer, EnrollmentSerializer, FeedbackSerializer, StatusUpdateSerializer
-from .utils import notify_teacher_on_enrollment, notify_student_on_new_material, notify_all_students
+from .models import Course, Enrollment, StatusUpdate, CustomUser, Feedback, ChatRoom, Material, MaterialUpload, Notification
+from .serializers import (
+    CustomUserSerializer, CourseSerializer, EnrollmentSerializer, FeedbackSerializer, StatusUpdateSerializer,
+    MaterialUploadSerializer, expansion_models, expansion_select_related, parse_field_paths
+)
+from .analytics import TREND_WINDOWS, get_course_feedback_analytics, get_teacher_feedback_analytics
+from .authentication import API_AUTHENTICATION_CLASSES, revoke_token
+from .conditional import get_versions, make_etag, not_modified
+from .fast_serializers import get_field_plan
+from .openapi import get_schema_artifact, schema_etag
+from .dashboard import get_dashboard, get_notification_summary
+from .downloads import IMMUTABLE_CACHE_CONTROL, REVALIDATE_CACHE_CONTROL, ensure_checksum, serve_material
+from .exports import EXPORT_FORMATS, chat_rows, enrollment_rows, export_response, feedback_rows
+from .feed import feed_page, feed_queryset
+from .pooling import get_pool_metrics
+from .recommendations import recommended_courses
+from .roster import RosterError, import_roster
+from .rollups import ROLLUP_INTERVALS, ROLLUP_MAX_DAYS, get_course_timeseries, get_recent_totals
+from .search import search_courses, search_students
+from .throttling import get_metrics, scoped_throttles, throttle_response
+from .thumbnails import RENDITION_NAME_RE, schedule_renditions
+from .uploads import UploadError, abort_upload, write_chunk
+from .utils import notify_teacher_on_enrollment, notify_enrolled_students_on_new_material, notify_all_students
 
 import logging
 
@@ -72,41 +106,26 @@ class HomeView(LoginRequiredMixin, APIView):
     permission_classes = [IsAuthenticated]
     login_url = '/accounts/login/'
 
+    def get_throttles(self):
+        # The status form posts here, so it shares the limits of the status API
+        if self.request.method == 'POST':
+            return [throttle() for throttle in scoped_throttles('status')]
+        return []
+
     def get(self, request):
         if not isinstance(request.user, CustomUser):
             return render(request, 'error.html', {"message": "User is not an instance of CustomUser."})
 
-        # Fetch user-specific data
-        user_courses = Enrollment.objects.filter(student=request.user)
-        status_updates = StatusUpdate.objects.filter(user=request.user).order_by('-timestamp')
-        created_courses = Course.objects.filter(teacher=request.user) if request.user.is_teacher else []
+        # Fetch the bounded, cached dashboard payload for this user
+        context = get_dashboard(request.user)
         students = None  # Initialize students as None
 
-        # If user is a teacher and search query is present, fetch student data
+        # If user is a teacher and search query is present, fetch the first page of matching students
         if request.user.is_teacher and 'q' in request.GET:
-            query = request.GET.get('q', '')
-            students = CustomUser.objects.filter(is_student=True)
-            if query:
-                students = students.filter(
-                    username__icontains=query
-                ) | students.filter(
-                    first_name__icontains=query
-                ) | students.filter(
-                    last_name__icontains=query
-                )
-
-        # Fetch unread notifications
-        notification_count = request.user.notifications.filter(read=False).count()
-        unread_notifications = request.user.notifications.filter(read=False)
-
-        return render(request, 'home.html', {
-            'courses': user_courses,
-            'status_updates': status_updates,
-            'created_courses': created_courses,
-            'students': students,
-            'notification_count': notification_count,
-            'unread_notifications': unread_notifications,
-        })
+            students = search_students(request.GET.get('q', '')).results
+
+        return render(request, 'home.html', {**context, 'students': students})
+
     def post(self, request):
         # Handle posting a status update
         status_update_form = StatusUpdateForm(request.POST)
@@ -123,55 +142,181 @@ class HomeView(LoginRequiredMixin, APIView):
 # API Views using Django REST Framework
 # ---------------------------------------------------------
 
-class CustomUserViewSet(viewsets.ModelViewSet):
+class ExpandableViewSetMixin:
+    """
+    Joins only the relations a request expands with `?expand=`, so unexpanded
+    (primary key) relations cost neither a join nor a per-row query.
+    """
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.request is None:  # Schema generation introspects views without a request
+            return queryset
+        expand = parse_field_paths(self.request.query_params.get('expand'))
+        lookups = expansion_select_related(self.get_serializer_class(), expand)
+        return queryset.select_related(*lookups) if lookups else queryset
+
+
+class ConditionalViewSetMixin:
+    """
+    Answers conditional GETs with 304 Not Modified before anything is serialized.
+
+    ETags combine the request path with cached version tokens of every model the response
+    draws on (expanded relations included), which signal handlers replace on each write.
+    """
+    def get_response_etag(self, *resource):
+        serializer_class = self.get_serializer_class()
+        expand = parse_field_paths(self.request.query_params.get('expand'))
+        keys = [(model._meta.model_name,) for model in expansion_models(serializer_class, expand)]
+        if resource:
+            keys[0] = resource
+        return make_etag(self.request.get_full_path(), *get_versions(*keys))
+
+    def list(self, request, *args, **kwargs):
+        etag = self.get_response_etag()
+        response = not_modified(request, etag=etag)
+        if response is None:
+            response = super().list(request, *args, **kwargs)
+        response['ETag'] = etag
+        return response
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        etag = self.get_response_etag(instance._meta.model_name, instance.pk)
+        # updated_at only describes the row itself, so it is a valid validator only without expansions
+        last_modified = None if request.query_params.get('expand') else getattr(instance, 'updated_at', None)
+        response = not_modified(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = Response(self.get_serializer(instance).data)
+            if last_modified:
+                response['Last-Modified'] = http_date(last_modified.timestamp())
+        response['ETag'] = etag
+        return response
+
+
+class FastReadViewSetMixin:
+    """
+    Opt-in (API_FAST_READ_PATH) list path that skips ModelSerializer instances per row.
+
+    Rows are fetched with `.values()` and mapped through a precompiled FieldPlan whose output
+    matches the serializer's exactly. Non-JSON renderers (e.g. the browsable API) and
+    serializers with fields the plan cannot reproduce use the regular path.
+    """
+    def list(self, request, *args, **kwargs):
+        plan = None
+        if getattr(settings, 'API_FAST_READ_PATH', False) and isinstance(request.accepted_renderer, JSONRenderer):
+            plan = get_field_plan(
+                self.get_serializer_class(),
+                request.query_params.get('fields', ''),
+                request.query_params.get('expand', ''),
+            )
+        if plan is None:
+            return super().list(request, *args, **kwargs)
+
+        # The cursor paginator reads its position from the ordering columns of each row
+        ordering = [name.lstrip('-') for name in getattr(self, 'cursor_ordering', ())]
+        queryset = self.filter_queryset(self.get_queryset()).select_related(None)
+        queryset = queryset.values(*dict.fromkeys(plan.lookups + ordering))
+
+        page = self.paginate_queryset(queryset)
+        rows = queryset if page is None else page
+        data = [plan.to_representation(row, request) for row in rows]
+        if page is not None:
+            return self.get_paginated_response(data)
+        return Response(data)
+
+
+class CustomUserViewSet(ConditionalViewSetMixin, FastReadViewSetMixin, viewsets.ModelViewSet):
     """
     API view for managing users.
     """
     queryset = CustomUser.objects.all()
     serializer_class = CustomUserSerializer
+    cursor_ordering = ('id',)
+    throttle_scope = 'api'
+    authentication_classes = API_AUTHENTICATION_CLASSES
     permission_classes = [permissions.IsAuthenticated]
 
-class CourseViewSet(viewsets.ModelViewSet):
+class CourseViewSet(ConditionalViewSetMixin, FastReadViewSetMixin, ExpandableViewSetMixin, viewsets.ModelViewSet):
     """
     API view for managing courses.
     """
     queryset = Course.objects.all()
     serializer_class = CourseSerializer
+    cursor_ordering = ('-id',)
+    throttle_scope = 'api'
+    authentication_classes = API_AUTHENTICATION_CLASSES
     permission_classes = [permissions.IsAuthenticated]
 
     def perform_create(self, serializer):
         serializer.save(teacher=self.request.user)
 
-class EnrollmentViewSet(viewsets.ModelViewSet):
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        """
+        Ranked full-text search over course titles, descriptions and material titles.
+        """
+        results = search_courses(
+            request.query_params.get('q', ''),
+            page=request.query_params.get('page', 1),
+            page_size=request.query_params.get('page_size'),
+            queryset=self.get_queryset(),
+        )
+        serializer = self.get_serializer(results.results, many=True)
+        return Response({'page': results.page, 'has_next': results.has_next, 'results': serializer.data})
+
+class EnrollmentViewSet(ConditionalViewSetMixin, FastReadViewSetMixin, ExpandableViewSetMixin, viewsets.ModelViewSet):
     """
     API view for managing enrollments.
     """
     queryset = Enrollment.objects.all()
     serializer_class = EnrollmentSerializer
+    cursor_ordering = ('-enrolled_on', '-id')  # Backed by the (enrolled_on, id) index
+    throttle_scope = 'api'
+    authentication_classes = API_AUTHENTICATION_CLASSES
     permission_classes = [permissions.IsAuthenticated]
 
     def perform_create(self, serializer):
         serializer.save(student=self.request.user)
 
-class FeedbackViewSet(viewsets.ModelViewSet):
+class FeedbackViewSet(ConditionalViewSetMixin, FastReadViewSetMixin, ExpandableViewSetMixin, viewsets.ModelViewSet):
     """
     API view for managing feedbacks.
     """
     queryset = Feedback.objects.all()
     serializer_class = FeedbackSerializer
+    cursor_ordering = ('-created_at', '-id')  # Backed by the (created_at, id) index
+    throttle_scope = 'api'
+    authentication_classes = API_AUTHENTICATION_CLASSES
     permission_classes = [permissions.IsAuthenticated]
 
-class StatusUpdateViewSet(viewsets.ModelViewSet):
+class StatusUpdateViewSet(ConditionalViewSetMixin, FastReadViewSetMixin, ExpandableViewSetMixin, viewsets.ModelViewSet):
     """
     API view for managing status updates.
     """
     queryset = StatusUpdate.objects.all()
     serializer_class = StatusUpdateSerializer
+    cursor_ordering = ('-timestamp', '-id')  # Backed by the (timestamp, id) index
+    throttle_scope = 'api'
+    authentication_classes = API_AUTHENTICATION_CLASSES
     permission_classes = [permissions.IsAuthenticated]
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == 'feed':
+            queryset = feed_queryset(self.request.user, queryset)
+        return queryset
+
+    @action(detail=False, methods=['get'])
+    def feed(self, request):
+        """
+        Status updates of the requesting user's classmates and teachers (and their own), newest first.
+        """
+        page = self.paginate_queryset(self.filter_queryset(self.get_queryset()))
+        return self.get_paginated_response(self.get_serializer(page, many=True).data)
+
 # ---------------------------------------------------------
 # Course Management Views
 # ---------------------------------------------------------
@@ -217,58 +362,98 @@ def course_list(request):
     courses = Course.objects.all()
     return render(request, 'course_list.html', {'courses': courses})
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def course_search(request):
+    """
+    Searches courses by title, description and material titles, ranked and paginated.
+    """
+    query = request.GET.get('q', '')
+    results = search_courses(query, page=request.GET.get('page', 1), page_size=request.GET.get('page_size'))
+    return render(request, 'course_search.html', {
+        'courses': results.results,
+        'query': query,
+        'page': results.page,
+        'has_next': results.has_next,
+    })
+
 @api_view(['GET', 'POST'])
 @permission_classes([IsAuthenticated])
 def course_detail(request, course_id):
     """
     Displays details of a specific course.
     """
-    course = get_object_or_404(Course, id=course_id)
-    feedbacks = Feedback.objects.filter(course=course).order_by('-created_at')
-    materials = Material.objects.filter(course=course).order_by('-created_at')  # Fetch materials
-
-    # Check if the user is a student
-    is_student = getattr(request.user, 'is_student', False)
-    # Check if the user is enrolled in the course
-    is_enrolled = Enrollment.objects.filter(student=request.user, course=course).exists()
-    feedback_form = FeedbackForm() if is_enrolled else None  # Show feedback form only if enrolled
-
-    # Fetch unread notifications for this user
-    user_notifications = Notification.objects.filter(user=request.user, read=False)
+    course = get_object_or_404(Course.objects.select_related('teacher'), id=course_id)
 
     if request.method == 'POST':
-        if is_student:
-            if 'submit_feedback' in request.POST and is_enrolled:
-                feedback_form = FeedbackForm(request.POST)
-                if feedback_form.is_valid():
-                    feedback = feedback_form.save(commit=False)
-                    feedback.course = course
-                    feedback.student = request.user
-                    feedback.save()
-                    messages.success(request, "Your feedback has been submitted.")
-                    return redirect('course_detail', course_id=course.id)
-            elif 'unenroll' in request.POST and is_enrolled:
-                Enrollment.objects.filter(student=request.user, course=course).delete()
-                messages.success(request, f'You have been unenrolled from the course "{course.title}".')
-                return redirect('course_detail', course_id=course.id)
-            elif 'enroll' in request.POST and not is_enrolled:
-                Enrollment.objects.create(student=request.user, course=course)
-                notify_teacher_on_enrollment(request.user, course)
-                messages.success(request, f'You have been enrolled in the course "{course.title}".')
-                return redirect('course_detail', course_id=course.id)
+        return _course_detail_post(request, course)
+
+    # Answer revalidations from the cached version tokens before loading feedback and materials.
+    # Pending flash messages are rendered into the page, so they always force a full response.
+    etag = None
+    unread_notifications = get_notification_summary(request.user)['unread_notifications']
+    if not len(messages.get_messages(request)):
+        etag = make_etag(
+            request.user.pk,
+            *get_versions(('course_page', course.pk), ('customuser', request.user.pk)),
+            *(notification.pk for notification in unread_notifications),
+        )
+        response = not_modified(request, etag=etag)
+        if response is not None:
+            response['ETag'] = etag
+            return response
 
-        return redirect('course_detail', course_id=course.id)
+    feedbacks = Feedback.objects.filter(course=course).select_related('student').order_by('-created_at')
+    materials = Material.objects.filter(course=course).order_by('-created_at')  # Fetch materials
+    is_enrolled = Enrollment.objects.filter(student=request.user, course=course).exists()
+    if request.user.is_teacher and course.teacher_id == request.user.pk:
+        # The teacher's view lists every enrolled student
+        prefetch_related_objects([course], Prefetch('enrollments', Enrollment.objects.select_related('student')))
 
     context = {
         'course': course,
         'feedbacks': feedbacks,
         'materials': materials,
-        'is_student': is_student,
+        'is_student': getattr(request.user, 'is_student', False),
         'is_enrolled': is_enrolled,
-        'feedback_form': feedback_form,
-        'user_notifications': user_notifications,  # Pass notifications to the context
+        'feedback_form': FeedbackForm() if is_enrolled else None,  # Show feedback form only if enrolled
+        'user_notifications': unread_notifications,
+        'recommendations': recommended_courses(course, request.user),
     }
-    return render(request, 'course_detail.html', context)
+    response = render(request, 'course_detail.html', context)
+    if etag:
+        response['ETag'] = etag
+        response['Cache-Control'] = 'private, no-cache'  # Browsers must revalidate, but may reuse their copy
+    return response
+
+
+def _course_detail_post(request, course):
+    """
+    Handles the feedback, enroll and unenroll forms posted from the course detail page.
+    """
+    is_enrolled = Enrollment.objects.filter(student=request.user, course=course).exists()
+
+    if getattr(request.user, 'is_student', False):
+        if 'submit_feedback' in request.POST and is_enrolled:
+            throttled = throttle_response(request, 'feedback')
+            if throttled is not None:
+                return throttled
+            feedback_form = FeedbackForm(request.POST)
+            if feedback_form.is_valid():
+                feedback = feedback_form.save(commit=False)
+                feedback.course = course
+                feedback.student = request.user
+                feedback.save()
+                messages.success(request, "Your feedback has been submitted.")
+        elif 'unenroll' in request.POST and is_enrolled:
+            Enrollment.objects.filter(student=request.user, course=course).delete()
+            messages.success(request, f'You have been unenrolled from the course "{course.title}".')
+        elif 'enroll' in request.POST and not is_enrolled:
+            Enrollment.objects.create(student=request.user, course=course)
+            notify_teacher_on_enrollment(request.user, course)
+            messages.success(request, f'You have been enrolled in the course "{course.title}".')
+
+    return redirect('course_detail', course_id=course.id)
 
 
 @api_view(['POST'])
@@ -290,6 +475,28 @@ def enroll(request, course_id):
 
     return redirect('course_detail', course_id=course.id)
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def import_course_roster(request, course_id):
+    """
+    Bulk-enrolls the students listed in an uploaded CSV or XLSX roster. Only accessible to the course's teacher.
+    """
+    course = get_object_or_404(Course, id=course_id)
+
+    if request.user != course.teacher:
+        return Response({"error": "You are not authorized to import a roster for this course."}, status=status.HTTP_403_FORBIDDEN)
+
+    roster = request.FILES.get('roster')
+    if roster is None:
+        return Response({"error": "Upload the roster as a 'roster' file."}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        report = import_roster(course, roster, roster.name)
+    except RosterError as error:
+        return Response({"error": str(error)}, status=status.HTTP_400_BAD_REQUEST)
+
+    return Response(report, status=status.HTTP_200_OK)
+
 @api_view(['GET', 'POST'])
 @permission_classes([IsAuthenticated])
 def delete_course(request, course_id):
@@ -336,29 +543,35 @@ def edit_course(request, course_id):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@throttle_classes(scoped_throttles('search'))
 def search_users(request):
     """
-    Allows teachers to search for students.
+    Allows teachers to search for students, with ranked prefix matching and pagination.
     """
     if not request.user.is_teacher:
         return Response({"detail": "You are not authorized to search for students."}, status=status.HTTP_403_FORBIDDEN)
 
     query = request.GET.get('q', '')
-    students = CustomUser.objects.filter(is_student=True)
-
-    if query:
-        students = students.filter(
-            username__icontains=query
-        ) | students.filter(
-            first_name__icontains=query
-        ) | students.filter(
-            last_name__icontains=query
-        )
-
-    return render(request, 'search_results.html', {'students': students, 'query': query})
+    # Optionally restrict results to students enrolled in this teacher's courses
+    enrolled_only = request.GET.get('enrolled') == '1'
+    results = search_students(
+        query,
+        teacher=request.user if enrolled_only else None,
+        page=request.GET.get('page', 1),
+        page_size=request.GET.get('page_size'),
+    )
+
+    return render(request, 'search_results.html', {
+        'students': results.results,
+        'query': query,
+        'enrolled_only': enrolled_only,
+        'page': results.page,
+        'has_next': results.has_next,
+    })
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
+@throttle_classes(scoped_throttles('status'))
 def post_status(request):
     """
     Posts a status update by the user.
@@ -369,6 +582,14 @@ def post_status(request):
         return Response({"message": "Status update posted successfully."}, status=status.HTTP_201_CREATED)
     return Response({"error": "Content cannot be empty."}, status=status.HTTP_400_BAD_REQUEST)
 
+@login_required
+def classmate_feed(request):
+    """
+    Displays the status updates of the user's classmates and teachers, one page at a time.
+    """
+    updates, next_cursor = feed_page(request.user, request.GET.get('cursor'))
+    return render(request, 'feed.html', {'updates': updates, 'next_cursor': next_cursor})
+
 @login_required
 def room(request, room_name):
     """
@@ -418,6 +639,7 @@ def create_room(request):
     return redirect('chat_home')
 
 @api_view(['GET'])
+@authentication_classes(API_AUTHENTICATION_CLASSES)
 @permission_classes([IsAuthenticated])
 def user_type_check(request):
     """
@@ -426,7 +648,24 @@ def user_type_check(request):
     return Response({'is_teacher': request.user.is_teacher})
 
 @api_view(['POST'])
+@authentication_classes(API_AUTHENTICATION_CLASSES)
 @permission_classes([IsAuthenticated])
+def revoke_tokens(request):
+    """
+    Logs out an API client by revoking its access token and, if given, its refresh token.
+    """
+    if request.data.get('refresh'):
+        try:
+            revoke_token(RefreshToken(request.data['refresh']))
+        except TokenError:
+            return Response({"error": "Invalid refresh token."}, status=status.HTTP_400_BAD_REQUEST)
+    if request.auth is not None and not isinstance(request.auth, str):
+        revoke_token(request.auth)
+    return Response({"message": "Tokens revoked."}, status=status.HTTP_200_OK)
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+@throttle_classes(scoped_throttles('feedback'))
 def leave_feedback(request, course_id):
     """
     Allows students to leave feedback on a course.
@@ -450,7 +689,174 @@ def view_feedback(request, course_id):
 
     feedbacks = Feedback.objects.filter(course=course).order_by('-created_at')
 
-    return Response({"feedbacks": list(feedbacks.values('student__username', 'content', 'created_at'))}, status=status.HTTP_200_OK)
+    return Response({
+        "feedbacks": list(feedbacks.values('student__username', 'content', 'created_at')),
+        "analytics": get_course_feedback_analytics(course, _trend_window(request)),
+    }, status=status.HTTP_200_OK)
+
+def _trend_window(request):
+    """
+    Returns the feedback trend window requested with ?window= (week, month or quarter), defaulting to week.
+    """
+    window = request.GET.get('window', 'week')
+    return window if window in TREND_WINDOWS else 'week'
+
+@api_view(['GET'])
+@authentication_classes(API_AUTHENTICATION_CLASSES)
+@permission_classes([IsAuthenticated])
+def course_feedback_analytics(request, course_id):
+    """
+    Returns the rating histogram, mean with 95% confidence interval, response rate and rating trend of a course.
+    Only accessible to the course's teacher and staff.
+    """
+    course = get_object_or_404(Course, id=course_id)
+    if course.teacher_id != request.user.pk and not request.user.is_staff:
+        return Response({"error": "You are not authorized to view this feedback."}, status=status.HTTP_403_FORBIDDEN)
+    return Response(get_course_feedback_analytics(course, _trend_window(request)))
+
+@api_view(['GET'])
+@authentication_classes(API_AUTHENTICATION_CLASSES)
+@permission_classes([IsAuthenticated])
+def teacher_feedback_analytics(request):
+    """
+    Returns feedback analytics across all of the requesting teacher's courses, with a per-course breakdown.
+    """
+    if not request.user.is_teacher:
+        return Response({"error": "Only teachers can view feedback analytics."}, status=status.HTTP_403_FORBIDDEN)
+    courses = list(Course.objects.filter(teacher_id=request.user.pk).order_by('id').only('id', 'title'))
+    return Response(get_teacher_feedback_analytics(courses, _trend_window(request)))
+
+def _stats_range(request):
+    """
+    Returns the (start, end, interval) requested with ?start=, ?end= (ISO dates, defaulting to the
+    last 30 days) and ?interval= (day or week), raising ValueError for an invalid range.
+    """
+    end = parse_date(request.GET.get('end', '')) or timezone.localdate()
+    start = parse_date(request.GET.get('start', '')) or end - timedelta(days=29)
+    if start > end or (end - start).days >= ROLLUP_MAX_DAYS:
+        raise ValueError(f"start must precede end, at most {ROLLUP_MAX_DAYS} days apart.")
+    interval = request.GET.get('interval', 'day')
+    return start, end, interval if interval in ROLLUP_INTERVALS else 'day'
+
+@api_view(['GET'])
+@authentication_classes(API_AUTHENTICATION_CLASSES)
+@permission_classes([IsAuthenticated])
+def course_stats(request, course_id):
+    """
+    Returns the daily or weekly enrollment, unenrollment, block, feedback and material counts of a course.
+    Only accessible to the course's teacher and staff.
+    """
+    course = get_object_or_404(Course, id=course_id)
+    if course.teacher_id != request.user.pk and not request.user.is_staff:
+        return Response({"error": "You are not authorized to view these statistics."}, status=status.HTTP_403_FORBIDDEN)
+    try:
+        start, end, interval = _stats_range(request)
+    except ValueError as error:
+        return Response({"error": str(error)}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(get_course_timeseries([course.pk], start, end, interval))
+
+@api_view(['GET'])
+@authentication_classes(API_AUTHENTICATION_CLASSES)
+@permission_classes([IsAuthenticated])
+def teacher_stats(request):
+    """
+    Returns the activity counts summed over all of the requesting teacher's courses.
+    """
+    if not request.user.is_teacher:
+        return Response({"error": "Only teachers can view course statistics."}, status=status.HTTP_403_FORBIDDEN)
+    try:
+        start, end, interval = _stats_range(request)
+    except ValueError as error:
+        return Response({"error": str(error)}, status=status.HTTP_400_BAD_REQUEST)
+    course_ids = list(Course.objects.filter(teacher_id=request.user.pk).values_list('id', flat=True))
+    return Response(get_course_timeseries(course_ids, start, end, interval))
+
+def _export_format(request):
+    """
+    Returns the export format requested with ?file_format=, defaulting to CSV.
+
+    DRF reserves ?format= for renderer selection, hence the separate parameter.
+    """
+    export_format = request.GET.get('file_format', 'csv')
+    return export_format if export_format in EXPORT_FORMATS else 'csv'
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def export_feedback(request, course_id):
+    """
+    Streams the feedback of a course as CSV or XLSX. Only accessible to the course's teacher and staff.
+    """
+    course = get_object_or_404(Course, id=course_id)
+
+    if course.teacher != request.user and not request.user.is_staff:
+        return Response({"error": "You are not authorized to export this feedback."}, status=status.HTTP_403_FORBIDDEN)
+
+    header, rows = feedback_rows(course)
+    return export_response(request, f'feedback-course-{course.id}', header, rows, _export_format(request))
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def export_enrollments(request, course_id):
+    """
+    Streams the enrollments of a course as CSV or XLSX. Only accessible to the course's teacher and staff.
+    """
+    course = get_object_or_404(Course, id=course_id)
+
+    if course.teacher != request.user and not request.user.is_staff:
+        return Response({"error": "You are not authorized to export these enrollments."}, status=status.HTTP_403_FORBIDDEN)
+
+    header, rows = enrollment_rows(course)
+    return export_response(request, f'enrollments-course-{course.id}', header, rows, _export_format(request))
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def export_chat(request, room_name):
+    """
+    Streams the message log of a chat room as CSV or XLSX. Only accessible to staff.
+    """
+    if not request.user.is_staff:
+        return Response({"error": "You are not authorized to export chat logs."}, status=status.HTTP_403_FORBIDDEN)
+
+    room = get_object_or_404(ChatRoom, name=room_name)
+    header, rows = chat_rows(room)
+    return export_response(request, f'chat-{room.name}', header, rows, _export_format(request))
+
+
+@require_safe
+def openapi_schema(request, format):
+    """
+    Serves the precomputed OpenAPI schema as JSON or YAML, gzip-compressed when the client accepts it.
+    """
+    artifact = get_schema_artifact(format)
+    encoding = 'gzip' if 'gzip' in request.headers.get('Accept-Encoding', '') else 'identity'
+    etag = schema_etag(artifact, encoding)
+
+    response = not_modified(request, etag=etag)
+    if response is None:
+        response = HttpResponse(
+            artifact.compressed if encoding == 'gzip' else artifact.content, content_type=artifact.content_type,
+        )
+        if encoding == 'gzip':
+            response['Content-Encoding'] = 'gzip'
+    response['ETag'] = etag
+    response['Vary'] = 'Accept-Encoding'
+    response['Cache-Control'] = 'public, no-cache'  # The schema changes only on deploy, so revalidation is cheap
+    return response
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def throttling_metrics(request):
+    """
+    Returns the throttled request counts per scope, the admission-control shed count and the statistics of
+    this process's database connection pools. Only accessible to staff.
+    """
+    if not request.user.is_staff:
+        return Response({"error": "You are not authorized to view metrics."}, status=status.HTTP_403_FORBIDDEN)
+    return Response({**get_metrics(), 'database_pools': get_pool_metrics()})
 
 @api_view(['GET', 'POST'])
 @permission_classes([IsAuthenticated])
@@ -466,6 +872,8 @@ def user_profile(request):
         form = UserProfileForm(request.POST, request.FILES, instance=user)
         if form.is_valid():
             form.save()
+            if 'profile_photo' in form.changed_data:
+                schedule_renditions(user)
             messages.success(request, "Your profile has been updated successfully.")
             return redirect('user_profile')
         else:
@@ -494,10 +902,7 @@ def add_material(request, course_id):
             material.save()
 
             # Notify all enrolled students about the new material
-            enrolled_students = Enrollment.objects.filter(course=course).values_list('student', flat=True)
-            for student_id in enrolled_students:
-                student = get_user_model().objects.get(id=student_id)
-                notify_student_on_new_material(student, course, material)
+            notify_enrolled_students_on_new_material(course, material)
 
             messages.success(request, "New material has been added to the course.")
             return redirect('course_detail', course_id=course.id)
@@ -532,6 +937,98 @@ def edit_material(request, course_id, material_id):
 
     return render(request, 'edit_material.html', {'form': form, 'course': course, 'material': material})
 
+@require_safe
+@login_required
+def download_material(request, material_id, version=None):
+    """
+    Serves a material's file to the course teacher and to enrolled students who are not blocked.
+
+    Access is decided with a single query. Versioned URLs (see Material.get_download_url) may be
+    cached indefinitely; a stale version redirects to the current one.
+    """
+    enrollment = Enrollment.objects.filter(course=OuterRef('course'), student=request.user)
+    material = get_object_or_404(
+        Material.objects.select_related('course').annotate(blocked=Subquery(enrollment.values('blocked')[:1])),
+        id=material_id,
+    )
+    # `blocked` is None when the user is not enrolled at all
+    if material.course.teacher_id != request.user.pk and material.blocked is not False:
+        raise PermissionDenied("You do not have access to this course's materials.")
+    if not material.file:
+        raise Http404("This material has no file.")
+
+    ensure_checksum(material)
+    if version is not None and version != material.checksum[:16]:
+        return redirect(material.get_download_url())
+
+    response = serve_material(request, material)
+    response['Cache-Control'] = IMMUTABLE_CACHE_CONTROL if version else REVALIDATE_CACHE_CONTROL
+    return response
+
+@require_safe
+@login_required
+def profile_photo_rendition(request, name):
+    """
+    Serves a resized profile photo. Rendition names change with their content, so browsers keep them for a year.
+    """
+    if not RENDITION_NAME_RE.fullmatch(name) or not default_storage.exists(name):
+        raise Http404("No such profile photo.")
+    response = FileResponse(default_storage.open(name, 'rb'))
+    response['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+    return response
+
+@api_view(['POST'])
+@authentication_classes(API_AUTHENTICATION_CLASSES)
+@permission_classes([IsAuthenticated])
+def start_material_upload(request, course_id):
+    """
+    Opens a resumable upload session for new material, or for replacing the file of a material.
+
+    Chunks are then sent to the session with `material_upload`; the material is only
+    created once the last chunk arrives.
+    """
+    course = get_object_or_404(Course, id=course_id)
+    if course.teacher_id != request.user.pk:
+        return Response({"error": "You are not authorized to add material to this course."}, status=status.HTTP_403_FORBIDDEN)
+
+    serializer = MaterialUploadSerializer(data=request.data, context={'course': course})
+    serializer.is_valid(raise_exception=True)
+    serializer.save(course=course, uploaded_by=request.user)
+    return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+@api_view(['GET', 'PUT', 'DELETE'])
+@authentication_classes(API_AUTHENTICATION_CLASSES)
+@permission_classes([IsAuthenticated])
+def material_upload(request, upload_id):
+    """
+    Reports the progress of an upload session (GET), appends a chunk to it (PUT) or aborts it (DELETE).
+
+    A chunk is the raw request body, sent with an `Upload-Offset` header equal to the bytes
+    received so far and optionally an `Upload-Checksum` header with its SHA-256 hex digest.
+    """
+    upload = get_object_or_404(
+        MaterialUpload.objects.select_related('course', 'material'), pk=upload_id, uploaded_by_id=request.user.pk,
+    )
+
+    if request.method == 'DELETE':
+        abort_upload(upload)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    if request.method == 'PUT':
+        try:
+            offset = int(request.headers['Upload-Offset'])
+            length = int(request.headers['Content-Length'])
+        except (KeyError, ValueError):
+            return Response(
+                {"error": "Upload-Offset and Content-Length headers are required."}, status=status.HTTP_400_BAD_REQUEST,
+            )
+        try:
+            write_chunk(upload, request.stream, offset, length, request.headers.get('Upload-Checksum', ''))
+        except UploadError as e:
+            return Response({"error": str(e), "received": upload.received}, status=e.status)
+
+    return Response(MaterialUploadSerializer(upload).data)
+
 
 @login_required
 def notifications(request):
@@ -648,9 +1145,13 @@ def teacher_courses(request):
     print(f"Courses: {teacher_courses}")
     print(f"Course Students: {course_students}")
 
+    # Activity of the last 30 days, read from the daily rollups
+    course_activity = get_recent_totals([course.id for course in teacher_courses])
+
     # Render the template with the course and student data
     return render(request, 'teacher_courses.html', {
         'teacher_courses': teacher_courses,
         'course_students': course_students,
+        'course_activity': course_activity,
     })
 
@@ -1,16 +1,18 @@
 import os
-from django.core.asgi import get_asgi_application
-from channels.routing import ProtocolTypeRouter, URLRouter
-from channels.auth import AuthMiddlewareStack
-from core import routing
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'elearning_project.settings')
 
+from django.core.asgi import get_asgi_application
+from channels.routing import ChannelNameRouter, ProtocolTypeRouter, URLRouter
+from core import routing
+from core.sessions import CachedAuthMiddlewareStack
+
 application = ProtocolTypeRouter({
     "http": get_asgi_application(),
-    "websocket": AuthMiddlewareStack(
+    "websocket": CachedAuthMiddlewareStack(
         URLRouter(
             routing.websocket_urlpatterns
         )
     ),
+    "channel": ChannelNameRouter(routing.channel_routes),
 })
@@ -10,10 +10,11 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
+from datetime import timedelta
 from pathlib import Path
 from django.contrib.messages import constants as messages
 import os
-from decouple import config  # For environment variables management
+from decouple import Csv, config  # For environment variables management
 import dj_database_url  # For Heroku PostgreSQL database configuration
 
 # Base directory of the project
@@ -43,13 +44,85 @@ INSTALLED_APPS = [
 
 # REST Framework configuration
 REST_FRAMEWORK = {
-    'DEFAULT_SCHEMA_CLASS': 'rest_framework.schemas.coreapi.AutoSchema'
+    'DEFAULT_SCHEMA_CLASS': 'rest_framework.schemas.coreapi.AutoSchema',
+    'DEFAULT_PAGINATION_CLASS': 'core.pagination.StableCursorPagination',
+    'DEFAULT_RENDERER_CLASSES': [
+        'core.fast_serializers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_THROTTLE_CLASSES': [
+        'core.throttling.UserTokenBucketThrottle',
+        'core.throttling.IPTokenBucketThrottle',
+    ],
+    # Proxies in front of the app, whose X-Forwarded-For entries are trusted for per-IP throttling
+    # (Heroku's router adds one; 0 ignores the client-controlled header)
+    'NUM_PROXIES': config('NUM_PROXIES', default=1 if 'DYNO' in os.environ else 0, cast=int),
 }
 
+# JWT authentication for the API (obtain tokens at /api/token/, revoke them at /api/token/revoke/)
+SIMPLE_JWT = {
+    'ACCESS_TOKEN_LIFETIME': timedelta(minutes=config('JWT_ACCESS_TOKEN_MINUTES', default=15, cast=int)),
+    'REFRESH_TOKEN_LIFETIME': timedelta(days=config('JWT_REFRESH_TOKEN_DAYS', default=1, cast=int)),
+    'TOKEN_OBTAIN_SERIALIZER': 'core.authentication.RoleTokenObtainPairSerializer',
+    'TOKEN_REFRESH_SERIALIZER': 'core.authentication.RevocableTokenRefreshSerializer',
+}
+
+# Token-bucket throttle rates, keyed '<scope>_user' (per authenticated user) and '<scope>_ip' (per client address)
+THROTTLE_RATES = {
+    'api_user': config('THROTTLE_API_USER_RATE', default='300/min'),
+    'api_ip': config('THROTTLE_API_IP_RATE', default='600/min'),
+    'status_user': config('THROTTLE_STATUS_USER_RATE', default='10/min'),
+    'status_ip': config('THROTTLE_STATUS_IP_RATE', default='60/min'),
+    'feedback_user': config('THROTTLE_FEEDBACK_USER_RATE', default='10/min'),
+    'feedback_ip': config('THROTTLE_FEEDBACK_IP_RATE', default='60/min'),
+    'search_user': config('THROTTLE_SEARCH_USER_RATE', default='60/min'),
+    'search_ip': config('THROTTLE_SEARCH_IP_RATE', default='120/min'),
+}
+THROTTLE_CACHE = 'default'  # Buckets and throttle metrics must live in a cache shared by every worker in production
+
+# Admission control: each worker answers 503 once this many requests are in flight (0 disables it)
+ADMISSION_MAX_IN_FLIGHT = config('ADMISSION_MAX_IN_FLIGHT', default=100, cast=int)
+ADMISSION_RETRY_AFTER = config('ADMISSION_RETRY_AFTER', default=5, cast=int)
+
+# Chunked material uploads: largest file, largest chunk per request, and how long an idle session is kept
+MATERIAL_UPLOAD_MAX_SIZE = config('MATERIAL_UPLOAD_MAX_SIZE', default=2 * 1024 ** 3, cast=int)
+MATERIAL_UPLOAD_CHUNK_SIZE = config('MATERIAL_UPLOAD_CHUNK_SIZE', default=8 * 1024 ** 2, cast=int)
+MATERIAL_UPLOAD_EXPIRY_HOURS = config('MATERIAL_UPLOAD_EXPIRY_HOURS', default=24, cast=int)
+
+# Material downloads: 'x-accel-redirect' (nginx) or 'x-sendfile' (Apache, lighttpd) lets the front proxy
+# send the file; empty streams it from Django. nginx needs an internal location at the prefix aliased to MEDIA_ROOT.
+MATERIAL_DOWNLOAD_ACCEL = config('MATERIAL_DOWNLOAD_ACCEL', default='')
+MATERIAL_DOWNLOAD_ACCEL_PREFIX = config('MATERIAL_DOWNLOAD_ACCEL_PREFIX', default='/protected-media/')
+
+# Classmate feed: entries kept per timeline, the course size above which updates are read on demand
+# instead of fanned out on write, and the page size of the feed page
+FEED_TIMELINE_LENGTH = config('FEED_TIMELINE_LENGTH', default=500, cast=int)
+FEED_FANOUT_MAX_COURSE_SIZE = config('FEED_FANOUT_MAX_COURSE_SIZE', default=500, cast=int)
+FEED_PAGE_SIZE = 20
+
+# Course recommendations: neighbors kept per course, and the course count above which a student is
+# left out of the batch build (python manage.py build_course_recommendations)
+RECOMMENDATION_NEIGHBORS = config('RECOMMENDATION_NEIGHBORS', default=10, cast=int)
+RECOMMENDATION_MAX_STUDENT_COURSES = config('RECOMMENDATION_MAX_STUDENT_COURSES', default=200, cast=int)
+
+# The OpenAPI schema is generated once per code version (see core/openapi.py); the UIs load it from /swagger.json
+OPENAPI_SCHEMA_DIR = config('OPENAPI_SCHEMA_DIR', default=str(BASE_DIR / 'openapi'))
+SWAGGER_SETTINGS = {'SPEC_URL': ('schema-json', {'format': '.json'})}
+REDOC_SETTINGS = {'SPEC_URL': ('schema-json', {'format': '.json'})}
+
+# Serve API list endpoints from .values() rows instead of per-row ModelSerializer instances
+API_FAST_READ_PATH = config('API_FAST_READ_PATH', default=False, cast=bool)
+
+# API page sizes (clients may request up to API_MAX_PAGE_SIZE rows with ?page_size=)
+API_PAGE_SIZE = config('API_PAGE_SIZE', default=50, cast=int)
+API_MAX_PAGE_SIZE = config('API_MAX_PAGE_SIZE', default=200, cast=int)
+
 # Middleware configuration
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',  # For serving static files on Heroku
+    'core.middleware.AdmissionControlMiddleware',  # Sheds load before sessions or the database are touched
+    'core.middleware.ReplicaRoutingMiddleware',  # Lets safe requests, sessions included, read from replicas
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -102,13 +175,88 @@ CHANNEL_LAYERS = {
     },
 }
 
+# Cache configuration: the Redis behind the channel layer (REDIS_URL) unless REDIS_CACHE_URL names another,
+# and local memory only when neither is set. Dashboards, ETag version tokens, recommendations and throttle
+# buckets are invalidated or counted through this cache by every web and worker process, so it must be shared
+# wherever more than one process runs (python manage.py check --deploy warns otherwise).
+REDIS_CACHE_URL = config('REDIS_CACHE_URL', default=config('REDIS_URL', default=''))
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': REDIS_CACHE_URL,
+    } if REDIS_CACHE_URL else {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'elearning-default',
+    },
+}
+
+# With a shared Redis cache, sessions are read from the cache and written through to the database (cached_db),
+# so page views and WebSocket handshakes skip the django_session query, and handshakes reuse the cached user
+# for SESSION_USER_CACHE_TIMEOUT seconds. A per-process local memory cache would let a logged-out session or an
+# old password keep working in other processes, so without Redis sessions stay in the database and the user
+# cache is off (0). With a persistent Redis, SESSION_ENGINE=django.contrib.sessions.backends.cache drops the
+# database writes as well. Expired rows are removed by python manage.py clear_expired_sessions.
+SESSION_ENGINE = config(
+    'SESSION_ENGINE',
+    default='django.contrib.sessions.backends.cached_db' if REDIS_CACHE_URL else 'django.contrib.sessions.backends.db',
+)
+SESSION_CACHE_ALIAS = 'default'
+SESSION_USER_CACHE_TIMEOUT = config('SESSION_USER_CACHE_TIMEOUT', default=300 if REDIS_CACHE_URL else 0, cast=int)
+SESSION_CLEANUP_BATCH_SIZE = 1000
+
+# Home page dashboard caching and list bounds
+DASHBOARD_CACHE_TIMEOUT = config('DASHBOARD_CACHE_TIMEOUT', default=300, cast=int)
+DASHBOARD_STATUS_UPDATE_LIMIT = 20
+DASHBOARD_ENROLLMENT_LIMIT = 50
+DASHBOARD_CREATED_COURSE_LIMIT = 50
+DASHBOARD_NOTIFICATION_LIMIT = 10
+
 # Database configuration (using PostgreSQL on Heroku)
+# PostgreSQL connections come from a per-process pool shared by all threads (core/pooling.py), since
+# daphne runs sync code on short-lived threads that would each hold a persistent connection of their own.
+# Without the pool, DATABASE_CONN_MAX_AGE keeps each thread's connection open for that many seconds.
+# django_heroku is told to leave DATABASES alone (see the end of this file), so SSL is required here on dynos.
+DATABASE_POOL = config('DATABASE_POOL', default=True, cast=bool)
+DATABASE_SSL_REQUIRE = config('DATABASE_SSL_REQUIRE', default='DYNO' in os.environ, cast=bool)
 DATABASES = {
     'default': dj_database_url.config(
-        default=config('DATABASE_URL')
+        default=config('DATABASE_URL'),
+        conn_max_age=config('DATABASE_CONN_MAX_AGE', default=0, cast=int),
+        conn_health_checks=True,  # Persistent connections are checked before their first use in a request
+        ssl_require=DATABASE_SSL_REQUIRE,
     )
 }
 
+# Read replicas, as comma-separated database URLs (e.g. sqlite:////path/to/copy.sqlite3 locally). GET and HEAD
+# requests, chat history and exports read from them (core/replicas.py); clients that just wrote are pinned to
+# the primary for REPLICA_STICKY_SECONDS, and replicas lagging more than REPLICA_MAX_LAG seconds are skipped.
+DATABASE_REPLICAS = []
+for number, url in enumerate(config('DATABASE_REPLICA_URLS', default='', cast=Csv()), start=1):
+    DATABASES[f'replica{number}'] = {
+        **dj_database_url.parse(
+            url, conn_max_age=DATABASES['default']['CONN_MAX_AGE'], conn_health_checks=True, ssl_require=DATABASE_SSL_REQUIRE,
+        ),
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(f'replica{number}')
+DATABASE_ROUTERS = ['core.replicas.ReplicaRouter']
+REPLICA_STICKY_SECONDS = config('REPLICA_STICKY_SECONDS', default=10, cast=int)
+REPLICA_MAX_LAG = config('REPLICA_MAX_LAG', default=5.0, cast=float)
+REPLICA_CHECK_INTERVAL = 5  # Seconds between lag measurements of a replica, per process
+
+for database in DATABASES.values():
+    if DATABASE_POOL and database['ENGINE'] == 'django.db.backends.postgresql':
+        database.update({
+            'ENGINE': 'core.db_backends.postgresql',
+            'CONN_MAX_AGE': 0,  # Connections go back to the pool after every request
+            'POOL': {
+                'max_size': config('DATABASE_POOL_MAX_SIZE', default=10, cast=int),
+                'timeout': config('DATABASE_POOL_TIMEOUT', default=5.0, cast=float),  # Seconds to wait for a free connection
+                'max_idle': config('DATABASE_POOL_MAX_IDLE', default=300.0, cast=float),
+                'max_lifetime': config('DATABASE_POOL_MAX_LIFETIME', default=3600.0, cast=float),
+            },
+        })
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
@@ -154,9 +302,10 @@ EMAIL_HOST_USER = config('EMAIL_HOST_USER')
 EMAIL_HOST_PASSWORD = config('EMAIL_HOST_PASSWORD')
 DEFAULT_FROM_EMAIL = config('DEFAULT_FROM_EMAIL', default='webmaster@localhost')
 
-# Activate Django-Heroku.
+# Activate Django-Heroku. Its DATABASES handling would replace the pooled engine, replicas and
+# DATABASE_CONN_MAX_AGE configured above with a plain persistent connection, so it is disabled.
 import django_heroku
-django_heroku.settings(locals())
+django_heroku.settings(locals(), databases=False)
 
 # Logging configuration
 LOGGING = {